@@ -1,186 +1,695 @@
 import argparse
+import collections
+import importlib
 import os
+import shlex
 import sys
+import time
 
-from config import DEFAULT_REGION
-from dms import (create_dms_tasks, create_iam_role_for_dms_cloudwatch_logs,
-                 delete_all_dms_tasks, delete_dms_tasks, describe_db_log_files,
-                 describe_endpoints, describe_table_statistics,
-                 fetch_cloudwatch_logs_for_a_task, list_dms_tasks,
-                 run_dms_tasks, test_db_connection)
-from process_input_files import process_input_files
-from utils import get_aws_cli_profile, print_messages
-
-# --------------------------------------------------------------------------------------------------#
-# Main section                                                                                      #
-# --------------------------------------------------------------------------------------------------#
-parser = argparse.ArgumentParser()
-parser.add_argument("--profile", help="AWS CLI Profile to be used", type=str)
-parser.add_argument("--region", help="Region", type=str)
-
-actions = [
-    "[1] generate_json_files",
-    "[2] create_dms_tasks",
-    "[3] list_dms_tasks",
-    "[4] delete_dms_tasks",
-    "[5] run_dms_tasks",
-    "[6] test_db_connection_from_replication_instance",
-    "[7] describe_table_statistics",
-    "[8] create_iam_role_for_dms_cloudwatch_logs",
-    "[9] fetch_cloudwatch_logs_for_a_task",
-    "[10] describe_endpoints",
-    "[11] describe_db_log_files",
-    "[12] delete_all_dms_tasks",
-]
-
-parser.add_argument(
-    "--action",
-    help="Specify the action to be performed " + ", ".join(actions),
-    metavar="",
-)
-
-parser.add_argument("--task_arn", help="Specify the task arn", type=str)
-
-args = parser.parse_args()
-
-# See if any CLI profiles are already configured
-profiles = get_aws_cli_profile()
+from config import DB_LOG_TAIL_LINES, DEFAULT_REGION
+from utils import OUTPUT_FORMATS, get_aws_cli_profile, print_messages
 
 icon = "->"
 
 # --------------------------------------------------------------------------------------------------#
-# Is action passed?                                                                                 #
-# --------------------------------------------------------------------------------------------------#
-if args.action is None:
-    print_messages(
-        [[f"{icon} No action specified. Please specify the action to be performed."]],
-        ["Error"],
-    )
-    parser.print_help(sys.stderr)
-    sys.exit(1)
+# Action registry                                                                                   #
+#                                                                                                   #
+# Each action names the module that implements it. The module is imported only when the action    #
+# runs, so that actions that do not talk to AWS (E.g., generate_json_files) do not pay for          #
+# importing boto3. Profile & region are resolved only for the actions that need AWS.               #
+#                                                                                                   #
+# Several actions can be run one after the other in the same process (--actions 1,2,5,7), or from  #
+# an interactive shell (--shell). They share the AWS clients, and the ARNs of the tasks created     #
+# are passed on in "args.task_arn_list" rather than read back from "task_arn_file".                #
+# --------------------------------------------------------------------------------------------------#
+Action = collections.namedtuple("Action", "id, name, module, needs_aws, run")
 
-# --------------------------------------------------------------------------------------------------#
-# Which profile to use?                                                                             #
-# --------------------------------------------------------------------------------------------------#
-if args.profile:
-    print(f"{icon} Profile specified: {args.profile}")
+ACTIONS = collections.OrderedDict()
 
-    if args.profile not in profiles:
-        print_messages(
-            [[f"{icon} Profile {args.profile} not found in ~/.aws/config"]], ["Error"]
-        )
-        sys.exit(1)
-    elif args.profile in profiles:
-        print(f"{icon} Profile {args.profile} found in ~/.aws/config")
-else:
-    if "default" in profiles:
-        print(f"{icon} Default profile found. Using it.")
-        args.profile = "default"
-    else:
-        print_messages(
-            [
-                [
-                    f"{icon} No 'default' profile found in ~/.aws/config. Please specify the profile to be used."
-                ]
-            ],
-            ["Error"],
-        )
-        sys.exit(1)
 
-# --------------------------------------------------------------------------------------------------#
-# What's the region are we dealing with?                                                           #
-# --------------------------------------------------------------------------------------------------#
-if args.region:
-    print(f"{icon} Region specified: {args.region}")
-else:
-    args.region = DEFAULT_REGION
-    print(
-        f"{icon} No region specified. Using the default region specified in the config file: {args.region}"
-    )
+def action(action_id, name, module, needs_aws=True):
+    """
+    Registers the decorated function as the runner of an action. The runner is called
+    with the imported module and the parsed CLI arguments.
+    """
 
-# --------------------------------------------------------------------------------------------------#
-# Create following directories
-# --------------------------------------------------------------------------------------------------#
-if not os.path.exists("../logs"):
-    os.mkdir("../logs")
+    def register(run):
+        ACTIONS[action_id] = Action(action_id, name, module, needs_aws, run)
+        return run
+
+    return register
 
-if not os.path.exists("../json_files"):
-    os.mkdir("../json_files")
 
 # --------------------------------------------------------------------------------------------------#
 # Process the Input CSV Files & generate JSON Configurations                                        #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "generate_json_files" or args.action == "1":
-    process_input_files()
+@action("1", "generate_json_files", "process_input_files", needs_aws=False)
+def generate_json_files(module, args):
+    source_url = None
+
+    if args.save_table_catalog:
+        source_url = args.source_url
+
+        if not source_url:
+            prepare_aws(args)
+            source_url, _ = importlib.import_module("dms").get_db_urls(
+                args.profile, args.region
+            )
+
+    module.process_input_files(verbose=args.verbose, source_url=source_url)
+    args.json_files_generated = True
+
 
 # --------------------------------------------------------------------------------------------------#
 # Create DMS tasks                                                                                  #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "create_dms_tasks" or args.action == "2":
-    create_dms_tasks(args.profile, args.region)
+@action("2", "create_dms_tasks", "dms")
+def create_dms_tasks(module, args):
+    args.task_arn_list = module.create_dms_tasks(
+        args.profile, args.region, generate=not args.json_files_generated
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # List DMS tasks                                                                                    #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "list_dms_tasks" or args.action == "3":
-    list_dms_tasks(args.profile, args.region, display_result=True)
+@action("3", "list_dms_tasks", "dms")
+def list_dms_tasks(module, args):
+    module.list_dms_tasks(
+        args.profile,
+        args.region,
+        display_result=True,
+        fields=args.fields,
+        output=args.output,
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Delete DMS tasks                                                                                  #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "delete_dms_tasks" or args.action == "4":
-    delete_dms_tasks(args.profile, args.region)
+@action("4", "delete_dms_tasks", "dms")
+def delete_dms_tasks(module, args):
+    module.delete_dms_tasks(args.profile, args.region, task_arn_list=args.task_arn_list)
+
 
 # --------------------------------------------------------------------------------------------------#
 # Start DMS tasks                                                                                   #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "run_dms_tasks" or args.action == "5":
-    run_dms_tasks(args.profile, args.region)
+@action("5", "run_dms_tasks", "dms")
+def run_dms_tasks(module, args):
+    module.run_dms_tasks(
+        args.profile,
+        args.region,
+        wait=args.wait,
+        task_arn_list=args.task_arn_list,
+        max_running_tasks=args.max_running_tasks,
+        backpressure=args.backpressure,
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Test DB Connection from Replication Instance.                                                     #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "test_db_connection_from_replication_instance" or args.action == "6":
-    test_db_connection(args.profile, args.region)
+@action("6", "test_db_connection_from_replication_instance", "dms")
+def test_db_connection(module, args):
+    module.test_db_connection(args.profile, args.region)
+
 
 # --------------------------------------------------------------------------------------------------#
 # Describe table statistics                                                                         #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "describe_table_statistics" or args.action == "7":
-    describe_table_statistics(args.profile, args.region)
+@action("7", "describe_table_statistics", "dms")
+def describe_table_statistics(module, args):
+    module.describe_table_statistics(
+        args.profile,
+        args.region,
+        with_db_logs=args.with_db_logs,
+        save_table_sizes=args.save_table_sizes,
+        output=args.output,
+        task_arn_list=args.task_arn_list,
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Create IAM Role required for DMS Service to create CloudWatch logs.                               #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "create_iam_role_for_dms_cloudwatch_logs" or args.action == "8":
-    create_iam_role_for_dms_cloudwatch_logs(args.profile, args.region)
+@action("8", "create_iam_role_for_dms_cloudwatch_logs", "dms")
+def create_iam_role_for_dms_cloudwatch_logs(module, args):
+    module.create_iam_role_for_dms_cloudwatch_logs(args.profile, args.region)
+
 
 # --------------------------------------------------------------------------------------------------#
 # Fetch CloudWatch logs for a DMS task.                                                             #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "fetch_cloudwatch_logs_for_a_task" or args.action == "9":
+@action("9", "fetch_cloudwatch_logs_for_a_task", "dms")
+def fetch_cloudwatch_logs_for_a_task(module, args):
     if args.task_arn is None:
         msg1 = "Please specify a task arn"
         msg2 = "Usage: python app.py --action fetch_cloudwatch_logs_for_a_task --task_arn <task arn>"
         print_messages([[msg1], [msg2]], ["Error"])
     else:
-        fetch_cloudwatch_logs_for_a_task(
-            args.profile, args.region, args.task_arn)
+        module.fetch_cloudwatch_logs_for_a_task(
+            args.profile,
+            args.region,
+            args.task_arn,
+            start_time=args.start_time,
+            end_time=args.end_time,
+            filter_pattern=args.filter_pattern,
+            follow=args.follow,
+            output=args.output,
+        )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Describe DMS End points                                                                           #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "describe_endpoints" or args.action == "10":
-    describe_endpoints(args.profile, args.region, print_result=True)
+@action("10", "describe_endpoints", "dms")
+def describe_endpoints(module, args):
+    module.describe_endpoints(
+        args.profile, args.region, print_result=True, output=args.output
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Get log files from a database                                                                     #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "describe_db_log_files" or args.action == "11":
-    describe_db_log_files(args.profile, args.region)
+@action("11", "describe_db_log_files", "dms")
+def describe_db_log_files(module, args):
+    module.describe_db_log_files(
+        args.profile, args.region, tail_lines=args.tail_lines, output=args.output
+    )
+
 
 # --------------------------------------------------------------------------------------------------#
 # Delete all DMS Tasks                                                                              #
 # --------------------------------------------------------------------------------------------------#
-if args.action == "delete_all_dms_tasks" or args.action == "12":
-    delete_all_dms_tasks(args.profile, args.region)
+@action("12", "delete_all_dms_tasks", "dms")
+def delete_all_dms_tasks(module, args):
+    module.delete_all_dms_tasks(args.profile, args.region)
+
+
+# --------------------------------------------------------------------------------------------------#
+# Compare the data of the Source & Target DBs                                                       #
+#                                                                                                   #
+# AWS is needed only to build the URLs of the DBs from the DMS endpoints, so that the validation   #
+# can be run against any two DBs (E.g., two SQLite files) with --source_url & --target_url.        #
+# --------------------------------------------------------------------------------------------------#
+@action("13", "validate_data", "data_validator", needs_aws=False)
+def validate_data(module, args):
+    source_url, target_url = args.source_url, args.target_url
+
+    if not (source_url and target_url):
+        prepare_aws(args)
+        source_url, target_url = importlib.import_module("dms").get_db_urls(
+            args.profile, args.region, source_url, target_url
+        )
+
+    module.validate_data(
+        source_url, target_url, table_names=args.table_name, output=args.output
+    )
+
+
+# --------------------------------------------------------------------------------------------------#
+# Copy CloudWatch logs of the tasks to the local log store                                          #
+# --------------------------------------------------------------------------------------------------#
+@action("16", "sync_task_logs", "dms")
+def sync_task_logs(module, args):
+    module.sync_task_logs(
+        args.profile,
+        args.region,
+        task_arn=args.task_arn,
+        task_arn_list=args.task_arn_list,
+    )
+
+
+# --------------------------------------------------------------------------------------------------#
+# Search the local log store                                                                        #
+# --------------------------------------------------------------------------------------------------#
+@action("17", "search_task_logs", "log_store", needs_aws=False)
+def search_task_logs(module, args):
+    module.search_task_logs(
+        text=args.search,
+        task_arn=args.task_arn,
+        severity=args.severity,
+        component=args.component,
+        start_time=args.start_time,
+        end_time=args.end_time,
+        limit=args.limit,
+        output=args.output,
+    )
+
+
+# --------------------------------------------------------------------------------------------------#
+# Create, run & collect the statistics of all the tasks, in a single pipelined run                  #
+# --------------------------------------------------------------------------------------------------#
+@action("18", "run_migration", "orchestrator")
+def run_migration(module, args):
+    args.task_arn_list = module.run_migration(
+        args.profile,
+        args.region,
+        generate=not args.json_files_generated,
+        output=args.output,
+        max_running_tasks=args.max_running_tasks,
+        backpressure=args.backpressure,
+    )
+
+
+def find_action(value):
+    """
+    Returns the registered action, given its numeric ID or name. None if not found.
+    """
+    if value in ACTIONS:
+        return ACTIONS[value]
+
+    for registered_action in ACTIONS.values():
+        if registered_action.name == value:
+            return registered_action
+
+    return None
+
+
+def non_negative_int(value):
+    """
+    argparse type of the options that take a count of 0 or more.
+    """
+    number = int(value)
+
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more: {value}")
+
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", help="AWS CLI Profile to be used", type=str)
+    parser.add_argument("--region", help="Region", type=str)
+
+    actions = [f"[{a.id}] {a.name}" for a in ACTIONS.values()]
+
+    parser.add_argument(
+        "--action",
+        help="Specify the action to be performed " + ", ".join(actions),
+        metavar="",
+    )
+
+    parser.add_argument(
+        "--actions",
+        help="Comma separated list of actions to be run one after the other in the same "
+        "process (E.g., 1,2,5,7)",
+        type=lambda value: [v.strip() for v in value.split(",") if v.strip()],
+    )
+
+    parser.add_argument(
+        "--shell",
+        help="Start an interactive shell, to run actions one after the other in the same "
+        "process",
+        action="store_true",
+    )
+
+    parser.add_argument("--task_arn", help="Specify the task arn", type=str)
+
+    parser.add_argument(
+        "--wait",
+        help="Wait for the tasks started by run_dms_tasks to complete",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--max_running_tasks",
+        help="Max no of tasks running at the same time on a replication instance "
+        "(run_dms_tasks & run_migration). Overrides MAX_RUNNING_TASKS. 0 means no limit",
+        type=non_negative_int,
+    )
+
+    parser.add_argument(
+        "--backpressure",
+        help="run_dms_tasks, run_migration: Pause starting tasks while the CloudWatch metrics "
+        "of the replication instance are past BACKPRESSURE_THRESHOLDS",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--with_db_logs",
+        help="Also fetch the latest Source & Target DB logs after describe_table_statistics",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--save_table_sizes",
+        help="Save the full load rows of each table, reported by describe_table_statistics, "
+        "to the table sizes file used to balance tasks",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--save_table_catalog",
+        help="generate_json_files: Save all the tables of the schemas in the include files, "
+        "read from the Source DB, to the table catalog file used by COMPACT_TABLE_MAPPINGS",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        help="Print each row of the input CSV files while generating JSON files",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--fields",
+        help="Comma separated list of fields to be displayed by list_dms_tasks "
+        "(task_id, task_arn, status, start_date, error_message, progress, migration_type, "
+        "replication_instance_arn, table_mappings)",
+        type=lambda value: [field.strip() for field in value.split(",")],
+    )
+
+    parser.add_argument(
+        "--start_time",
+        help="fetch_cloudwatch_logs_for_a_task, search_task_logs: Fetch log events from this time "
+        "('YYYY-MM-DD HH:MM', or relative like 30m, 2h, 1d)",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--end_time",
+        help="fetch_cloudwatch_logs_for_a_task, search_task_logs: Fetch log events up to this time",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--filter_pattern",
+        help="fetch_cloudwatch_logs_for_a_task: CloudWatch Logs filter pattern (E.g., '?ERROR ?WARN')",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--follow",
+        help="fetch_cloudwatch_logs_for_a_task: Keep printing new log events as they arrive",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--search",
+        help="search_task_logs: Full text query on the log messages (E.g., 'ORA-01555')",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--severity",
+        help="search_task_logs: Severity of the log messages (I, W, E, D or T)",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--component",
+        help="search_task_logs: Source of the log messages (E.g., SOURCE_CAPTURE)",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--limit",
+        help="search_task_logs: Max no of log messages to be displayed",
+        type=int,
+    )
+
+    parser.add_argument(
+        "--table_name",
+        help="validate_data: 'all' (default) for the tables of the include files, or a comma "
+        "separated list of tables (E.g., HR.EMPLOYEES,HR.JOBS)",
+        type=str,
+        default="all",
+    )
+
+    parser.add_argument(
+        "--source_url",
+        help="validate_data, generate_json_files --save_table_catalog: URL of the Source DB "
+        "(E.g., sqlite:///source.db, or a SQLAlchemy URL). Built from the DMS endpoint if not "
+        "given",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--target_url",
+        help="validate_data: URL of the Target DB. Built from the DMS endpoint if not given",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--tail_lines",
+        help="describe_db_log_files: No of lines to be displayed from the end of each DB log file",
+        type=int,
+        default=DB_LOG_TAIL_LINES,
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Output format of the reports: table (default), jsonl or csv. jsonl & csv are "
+        "printed row by row, as the data arrives",
+        choices=OUTPUT_FORMATS,
+        default="table",
+    )
+
+    parser.add_argument(
+        "--api_stats",
+        help="Print the no of AWS API calls, their latency, retries and throttles by "
+        "operation, when the action completes",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--trace_file",
+        help="Write the AWS API calls to this file, in the Chrome trace event format "
+        "(open it in chrome://tracing or https://ui.perfetto.dev)",
+        type=str,
+    )
+
+    # State shared by the actions of a session (Not set from the command line)
+    parser.set_defaults(task_arn_list=None, json_files_generated=False, aws_ready=False)
+
+    return parser
+
+
+def resolve_profile_and_region(args):
+    """
+    Decides the AWS CLI profile & region to be used. Exits if no usable profile is found.
+    """
+    # See if any CLI profiles are already configured
+    profiles = get_aws_cli_profile()
+
+    # ----------------------------------------------------------------------------------------------#
+    # Which profile to use?                                                                         #
+    # ----------------------------------------------------------------------------------------------#
+    if args.profile:
+        print(f"{icon} Profile specified: {args.profile}")
+
+        if args.profile not in profiles:
+            print_messages(
+                [[f"{icon} Profile {args.profile} not found in ~/.aws/config"]],
+                ["Error"],
+            )
+            sys.exit(1)
+        elif args.profile in profiles:
+            print(f"{icon} Profile {args.profile} found in ~/.aws/config")
+    else:
+        if "default" in profiles:
+            print(f"{icon} Default profile found. Using it.")
+            args.profile = "default"
+        else:
+            print_messages(
+                [
+                    [
+                        f"{icon} No 'default' profile found in ~/.aws/config. Please specify the profile to be used."
+                    ]
+                ],
+                ["Error"],
+            )
+            sys.exit(1)
+
+    # ----------------------------------------------------------------------------------------------#
+    # What's the region are we dealing with?                                                       #
+    # ----------------------------------------------------------------------------------------------#
+    if args.region:
+        print(f"{icon} Region specified: {args.region}")
+    else:
+        args.region = DEFAULT_REGION
+        print(
+            f"{icon} No region specified. Using the default region specified in the config file: {args.region}"
+        )
+
+
+def select_actions(args):
+    """
+    Returns the list of actions asked for with "--action" or "--actions". Exits if any of
+    them is not found.
+    """
+    values = args.actions or ([args.action] if args.action else [])
+    selected_actions = []
+
+    for value in values:
+        selected_action = find_action(value)
+
+        if selected_action is None:
+            print_messages([[f"{icon} Unknown action: {value}"]], ["Error"])
+            sys.exit(1)
+
+        selected_actions.append(selected_action)
+
+    return selected_actions
+
+
+def prepare_aws(args):
+    """
+    Resolves the profile & region, and enables the AWS API call statistics if asked for.
+    Done once per session.
+    """
+    if args.aws_ready:
+        return
+
+    resolve_profile_and_region(args)
+
+    if args.api_stats or args.trace_file:
+        # Imported here, as it imports boto3.
+        from aws_clients import enable_instrumentation
+
+        enable_instrumentation(print_summary=args.api_stats, trace_file=args.trace_file)
+
+    args.aws_ready = True
+
+
+def run_actions(selected_actions, args):
+    """
+    Runs the actions one after the other. When more than one action is run, the time
+    taken by each is printed.
+    """
+    # ----------------------------------------------------------------------------------------------#
+    # Create following directories
+    # ----------------------------------------------------------------------------------------------#
+    if not os.path.exists("../logs"):
+        os.mkdir("../logs")
+
+    if not os.path.exists("../json_files"):
+        os.mkdir("../json_files")
+
+    for selected_action in selected_actions:
+        if selected_action.needs_aws:
+            prepare_aws(args)
+
+        started = time.perf_counter()
+
+        module = importlib.import_module(selected_action.module)
+        selected_action.run(module, args)
+
+        if len(selected_actions) > 1:
+            elapsed = time.perf_counter() - started
+            print(
+                f"{icon} [{selected_action.id}] {selected_action.name}: {elapsed:.1f} seconds"
+            )
+
+
+# State carried from one command of the shell to the next
+SESSION_STATE = ("profile", "region", "task_arn_list", "aws_ready")
+
+
+def run_shell(parser, args):
+    """
+    Reads actions from the terminal and runs them, until "exit" (or end of input).
+
+    Each line is an action (ID or name, or several separated by commas), followed by any
+    of the options of app.py. E.g.,
+
+        dms> 1,2
+        dms> run_dms_tasks --wait
+        dms> 7 --output csv
+    """
+    print(
+        f"{icon} Enter an action (ID or name, or several separated by commas) followed by "
+        "its options. 'help' lists the actions, 'exit' quits."
+    )
+
+    while True:
+        try:
+            line = input("dms> ").strip()
+        except EOFError:
+            print()
+            break
+        except KeyboardInterrupt:
+            print()
+            continue
+
+        if not line:
+            continue
+
+        if line in ("exit", "quit"):
+            break
+
+        if line in ("help", "?"):
+            for registered_action in ACTIONS.values():
+                print(f"{registered_action.id:>4}  {registered_action.name}")
+            continue
+
+        try:
+            tokens = shlex.split(line)
+        except ValueError as error:
+            # E.g., a quote that is not closed
+            print(f"{icon} {error}")
+            continue
+
+        if not tokens[0].startswith("-"):
+            tokens = ["--actions"] + tokens
+
+        try:
+            command_args = parser.parse_args(tokens)
+        except SystemExit:
+            continue
+
+        # Keep the profile & region of the session, unless the command asks for others.
+        for name in SESSION_STATE:
+            if name in ("profile", "region") and getattr(command_args, name):
+                if getattr(command_args, name) != getattr(args, name):
+                    args.aws_ready = False
+                continue
+
+            setattr(command_args, name, getattr(args, name))
+
+        try:
+            run_actions(select_actions(command_args), command_args)
+        except SystemExit:
+            print(f"{icon} Action stopped")
+        except KeyboardInterrupt:
+            print(f"\n{icon} Action interrupted")
+
+        for name in SESSION_STATE:
+            setattr(args, name, getattr(command_args, name))
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.shell:
+        run_shell(parser, args)
+        return
+
+    # ----------------------------------------------------------------------------------------------#
+    # Is action passed?                                                                             #
+    # ----------------------------------------------------------------------------------------------#
+    if args.action is None and not args.actions:
+        print_messages(
+            [
+                [
+                    f"{icon} No action specified. Please specify the action to be performed."
+                ]
+            ],
+            ["Error"],
+        )
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+
+    run_actions(select_actions(args), args)
+
+
+# --------------------------------------------------------------------------------------------------#
+# Main section                                                                                      #
+# --------------------------------------------------------------------------------------------------#
+if __name__ == "__main__":
+    main()
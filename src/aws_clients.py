@@ -0,0 +1,276 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+import boto3
+from tabulate import tabulate
+
+from utils import THROTTLING_ERROR_CODES, percentile
+
+# ------------------------------------------------------------------------------------------------#
+# boto3 sessions & clients, shared by all the actions                                             #
+# ------------------------------------------------------------------------------------------------#
+# A session (and each of its clients) is created once per profile & region, and reused, rather
+# than creating a new session in every function.
+#
+# When instrumentation is enabled (See enable_instrumentation), every AWS API call made through
+# these clients is recorded, using botocore's event hooks:
+#   before-call        - An API call starts (once per call, however many attempts it takes)
+#   response-received  - A response (or an error) arrived for one attempt of a call
+#   after-call         - The call completed, successfully or with an error response
+#   after-call-error   - The call failed without a response (E.g., connection errors)
+_sessions = {}
+_clients = {}
+_lock = threading.Lock()
+
+_recorder = None
+# What the report printed at exit includes (See enable_instrumentation). The report is
+# registered with atexit once, however many times instrumentation is enabled.
+_report_settings = {"print_summary": False, "trace_file": None}
+_report_registered = False
+
+# Key under which the start of a call is kept in botocore's request context
+CONTEXT_KEY = "dms_automation_call"
+
+
+def get_session(profile, region):
+    """
+    Returns the boto3 session of the profile & region, creating it on first use.
+    """
+    with _lock:
+        key = (profile, region)
+
+        if key not in _sessions:
+            session = boto3.Session(profile_name=profile, region_name=region)
+
+            if _recorder is not None:
+                _recorder.register(session.events)
+
+            _sessions[key] = session
+
+        return _sessions[key]
+
+
+def get_client(profile, region, service):
+    """
+    Returns the boto3 client of the service (E.g., "dms", "logs"), creating it on first
+    use. boto3 clients are thread safe, so a client can be shared by worker threads.
+    """
+    session = get_session(profile, region)
+
+    with _lock:
+        key = (profile, region, service)
+
+        if key not in _clients:
+            _clients[key] = session.client(service)
+
+        return _clients[key]
+
+
+def enable_instrumentation(print_summary=True, trace_file=None):
+    """
+    Records all the AWS API calls made from now on. When the program exits, a summary by
+    operation is printed, and the calls are written to "trace_file" in the Chrome trace
+    event format (open it in chrome://tracing or https://ui.perfetto.dev).
+
+    Sessions & clients created earlier are recorded as well: a client gets a copy of the
+    event hooks of its session when it is created, so the hooks are added to both. It can
+    be called again (E.g., from the shell, when the profile changes). The report is still
+    printed once, with the latest settings.
+    """
+    global _recorder, _report_registered
+
+    with _lock:
+        if _recorder is None:
+            _recorder = ApiCallRecorder()
+
+        for session in _sessions.values():
+            _recorder.register(session.events)
+
+        for client in _clients.values():
+            _recorder.register(client.meta.events)
+
+        _report_settings["print_summary"] = (
+            _report_settings["print_summary"] or print_summary
+        )
+        _report_settings["trace_file"] = trace_file or _report_settings["trace_file"]
+
+        if not _report_registered:
+            atexit.register(report)
+            _report_registered = True
+
+    return _recorder
+
+
+def report():
+    if _report_settings["print_summary"]:
+        _recorder.print_summary()
+
+    if _report_settings["trace_file"]:
+        _recorder.write_trace(_report_settings["trace_file"])
+
+
+class ApiCallRecorder:
+    """
+    Counts the AWS API calls by operation, along with their latency, retries, throttles
+    and errors. Calls are recorded from any thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.trace_events = []
+        self.started = time.perf_counter()
+
+    def register(self, events):
+        """
+        Adds the hooks to the event emitter of a session or a client.
+        """
+        events.register("before-call", self.before_call, unique_id="api-calls-before")
+        events.register(
+            "response-received", self.response_received, unique_id="api-calls-response"
+        )
+        events.register("after-call", self.after_call, unique_id="api-calls-after")
+        events.register(
+            "after-call-error", self.after_call_error, unique_id="api-calls-error"
+        )
+
+    def before_call(self, model, context, **kwargs):
+        context[CONTEXT_KEY] = {
+            "service": model.service_model.service_name,
+            "operation": model.name,
+            "start": time.perf_counter(),
+            "attempts": 0,
+            "throttles": 0,
+        }
+
+    def response_received(self, context, parsed_response=None, **kwargs):
+        call = context.get(CONTEXT_KEY)
+
+        if call is None:
+            return
+
+        call["attempts"] += 1
+
+        error_code = (parsed_response or {}).get("Error", {}).get("Code", "")
+
+        if error_code in THROTTLING_ERROR_CODES:
+            call["throttles"] += 1
+
+    def after_call(self, http_response, parsed, context, **kwargs):
+        error_code = ""
+
+        if http_response.status_code >= 300:
+            error_code = parsed.get("Error", {}).get("Code", "") or str(
+                http_response.status_code
+            )
+
+        self.record(context, error_code)
+
+    def after_call_error(self, exception, context, **kwargs):
+        self.record(context, type(exception).__name__)
+
+    def record(self, context, error_code):
+        call = context.pop(CONTEXT_KEY, None)
+
+        if call is None:
+            return
+
+        end = time.perf_counter()
+        latency = end - call["start"]
+        key = (call["service"], call["operation"])
+
+        with self.lock:
+            stats = self.operations.setdefault(
+                key,
+                {"latencies": [], "errors": 0, "retries": 0, "throttles": 0},
+            )
+            stats["latencies"].append(latency)
+            stats["retries"] += max(0, call["attempts"] - 1)
+            stats["throttles"] += call["throttles"]
+
+            if error_code:
+                stats["errors"] += 1
+
+            self.trace_events.append(
+                {
+                    "name": f"{call['service']}.{call['operation']}",
+                    "cat": call["service"],
+                    "ph": "X",
+                    "ts": (call["start"] - self.started) * 1e6,
+                    "dur": latency * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": {
+                        "attempts": call["attempts"],
+                        "throttles": call["throttles"],
+                        "error": error_code,
+                    },
+                }
+            )
+
+    def summary(self):
+        """
+        Returns one row per operation: service, operation, calls, errors, retries,
+        throttles, p50, p90 & p99 & max latency (ms), total seconds.
+        """
+        rows = []
+
+        with self.lock:
+            for (service, operation), stats in sorted(self.operations.items()):
+                latencies = sorted(stats["latencies"])
+                rows.append(
+                    [
+                        service,
+                        operation,
+                        len(latencies),
+                        stats["errors"],
+                        stats["retries"],
+                        stats["throttles"],
+                        percentile(latencies, 50) * 1000,
+                        percentile(latencies, 90) * 1000,
+                        percentile(latencies, 99) * 1000,
+                        latencies[-1] * 1000,
+                        sum(latencies),
+                    ]
+                )
+
+        return rows
+
+    def print_summary(self):
+        rows = self.summary()
+
+        if not rows:
+            return
+
+        print(
+            tabulate(
+                rows,
+                headers=[
+                    "Service",
+                    "Operation",
+                    "Calls",
+                    "Errors",
+                    "Retries",
+                    "Throttled",
+                    "p50 ms",
+                    "p90 ms",
+                    "p99 ms",
+                    "Max ms",
+                    "Total sec",
+                ],
+                tablefmt="fancy_grid",
+                floatfmt=".1f",
+            )
+        )
+
+    def write_trace(self, trace_file):
+        with self.lock:
+            events = list(self.trace_events)
+
+        with open(trace_file, "w") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+        print(f"Trace of {len(events)} AWS API calls written to: {trace_file}")
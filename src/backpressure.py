@@ -0,0 +1,325 @@
+import collections
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import (BACKPRESSURE_INTERVAL, BACKPRESSURE_STEP,
+                    BACKPRESSURE_THRESHOLDS, MAX_API_ATTEMPTS)
+from utils import AdaptiveBackoff, call_with_backoff, print_messages
+
+# ------------------------------------------------------------------------------------------------#
+# Pauses starting new tasks while a replication instance is short of CPU, memory or storage     #
+# ------------------------------------------------------------------------------------------------#
+# The metrics of the replication instances are read from CloudWatch, all of them with a single
+# "get_metric_data" call, every BACKPRESSURE_INTERVAL seconds. Each metric has two values in
+# BACKPRESSURE_THRESHOLDS: crossing the first pauses the instance, and it is resumed only once
+# every metric is back past the second one, so that it does not flip on every reading.
+#
+# CloudWatch lags behind the tasks: a task that has just been started shows in the metrics a
+# few minutes later. So no more than BACKPRESSURE_STEP tasks are started on an instance per
+# reading, and the budget of the instance (MAX_RUNNING_TASKS) still applies.
+NAMESPACE = "AWS/DMS"
+DIMENSION = "ReplicationInstanceIdentifier"
+
+# Max no of queries CloudWatch takes in a "get_metric_data" call
+MAX_QUERIES_PER_CALL = 500
+
+# Resolution of the metrics, and how far back to look for their latest value
+METRIC_PERIOD = 60
+METRIC_LOOKBACK = 600
+
+
+def high_is_bad(thresholds):
+    """
+    Tells whether a metric with these (pause, resume) values gets worse as it grows (E.g.,
+    CPUUtilization), rather than as it falls (E.g., FreeableMemory).
+    """
+    pause, resume = thresholds
+    return pause > resume
+
+
+def format_metric(metric, value):
+    if metric == "CPUUtilization":
+        return f"{value:.0f}%"
+
+    return f"{value / 1024**2:.0f} MiB"
+
+
+class CloudWatchMetrics:
+    """
+    Reads the latest value of the metrics of replication instances from CloudWatch.
+
+        metrics = CloudWatchMetrics(cloudwatch, dms, {"CPUUtilization": "Maximum"})
+        values = metrics.read([instance_arn])
+
+    The metrics are published by the identifier of the instance, which is looked up once
+    per instance.
+    """
+
+    def __init__(self, cloudwatch, dms, statistics):
+        """
+        :param cloudwatch: boto3 CloudWatch client
+        :param dms: boto3 DMS client
+        :param statistics: Dict of metric name -> statistic (E.g., "Maximum")
+        """
+        self.cloudwatch = cloudwatch
+        self.dms = dms
+        self.statistics = statistics
+        self.backoff = AdaptiveBackoff()
+        self.identifiers = {}
+
+    def get_identifiers(self, instance_arns):
+        """
+        :return: Dict of instance ARN -> identifier
+        """
+        missing = [arn for arn in instance_arns if arn not in self.identifiers]
+
+        if missing:
+            kwargs = {
+                "Filters": [{"Name": "replication-instance-arn", "Values": missing}]
+            }
+
+            while True:
+                response, _ = call_with_backoff(
+                    self.dms.describe_replication_instances,
+                    self.backoff,
+                    MAX_API_ATTEMPTS,
+                    **kwargs,
+                )
+
+                for instance in response["ReplicationInstances"]:
+                    self.identifiers[instance["ReplicationInstanceArn"]] = instance[
+                        "ReplicationInstanceIdentifier"
+                    ]
+
+                if not response.get("Marker"):
+                    break
+
+                kwargs["Marker"] = response["Marker"]
+
+        return {
+            arn: self.identifiers[arn]
+            for arn in instance_arns
+            if arn in self.identifiers
+        }
+
+    def read(self, instance_arns):
+        """
+        :return: Dict of instance ARN -> {metric: latest value}. Metrics with no data point
+                 in the last METRIC_LOOKBACK seconds are left out.
+        """
+        queries = {}
+        identifiers = self.get_identifiers(instance_arns)
+
+        for i, (arn, identifier) in enumerate(identifiers.items()):
+            dimensions = [{"Name": DIMENSION, "Value": identifier}]
+
+            for j, (metric, statistic) in enumerate(self.statistics.items()):
+                queries[f"m{i}_{j}"] = (
+                    arn,
+                    metric,
+                    {
+                        "Id": f"m{i}_{j}",
+                        "MetricStat": {
+                            "Metric": {
+                                "Namespace": NAMESPACE,
+                                "MetricName": metric,
+                                "Dimensions": dimensions,
+                            },
+                            "Period": METRIC_PERIOD,
+                            "Stat": statistic,
+                        },
+                        "ReturnData": True,
+                    },
+                )
+
+        values = {arn: {} for arn in instance_arns}
+        end_time = datetime.now(timezone.utc)
+        ids = list(queries)
+
+        for k in range(0, len(ids), MAX_QUERIES_PER_CALL):
+            chunk = ids[k : k + MAX_QUERIES_PER_CALL]
+            kwargs = {
+                "MetricDataQueries": [queries[i][2] for i in chunk],
+                "StartTime": end_time - timedelta(seconds=METRIC_LOOKBACK),
+                "EndTime": end_time,
+                "ScanBy": "TimestampDescending",
+            }
+
+            while True:
+                response, _ = call_with_backoff(
+                    self.cloudwatch.get_metric_data,
+                    self.backoff,
+                    MAX_API_ATTEMPTS,
+                    **kwargs,
+                )
+
+                for result in response["MetricDataResults"]:
+                    arn, metric, _ = queries[result["Id"]]
+
+                    # Newest first. Later pages only add older data points.
+                    if result["Values"] and metric not in values[arn]:
+                        values[arn][metric] = result["Values"][0]
+
+                if not response.get("NextToken"):
+                    break
+
+                kwargs["NextToken"] = response["NextToken"]
+
+        return values
+
+
+class Backpressure:
+    """
+    Tells how many new tasks may be started on a replication instance, given its metrics.
+
+        backpressure = Backpressure.from_cloudwatch(cloudwatch, dms)
+        count = backpressure.take(instance_arn, wanted)
+
+    If the metrics can not be read, tasks are started as if there was no backpressure (no
+    pause, and no limit per reading), so that a missing permission does not stall the run.
+    """
+
+    def __init__(
+        self,
+        source,
+        thresholds=BACKPRESSURE_THRESHOLDS,
+        interval=BACKPRESSURE_INTERVAL,
+        step=BACKPRESSURE_STEP,
+    ):
+        """
+        :param source: Object with a "read" method, like CloudWatchMetrics
+        :param thresholds: Dict of metric name -> (pause, resume)
+        :param interval: Seconds between readings of the metrics of an instance
+        :param step: Max no of tasks started on an instance per reading
+        """
+        self.source = source
+        self.thresholds = thresholds
+        self.interval = interval
+        self.step = step
+        self.lock = threading.Lock()
+        # Instance ARN -> (time it was paused, reasons)
+        self.paused = {}
+        self.paused_seconds = collections.Counter()
+        self.pause_count = collections.Counter()
+        self.last_read = {}
+        # Instance ARN -> no of tasks that may still be started before the next reading. None
+        # if there is no limit, as the metrics could not be read.
+        self.allowance = {}
+        self.read_failed = False
+
+    @classmethod
+    def from_cloudwatch(cls, cloudwatch, dms, **kwargs):
+        thresholds = kwargs.get("thresholds", BACKPRESSURE_THRESHOLDS)
+        statistics = {
+            metric: "Maximum" if high_is_bad(values) else "Minimum"
+            for metric, values in thresholds.items()
+        }
+
+        return cls(CloudWatchMetrics(cloudwatch, dms, statistics), **kwargs)
+
+    def refresh(self, instance_arns):
+        """
+        Reads the metrics of the instances not read in the last "interval" seconds, with a
+        single call to the source.
+        """
+        with self.lock:
+            now = time.monotonic()
+            due = [
+                arn
+                for arn in instance_arns
+                if now - self.last_read.get(arn, -self.interval) >= self.interval
+            ]
+
+            if not due:
+                return
+
+            failed = False
+
+            try:
+                readings = self.source.read(due)
+            except Exception as error:
+                if not self.read_failed:
+                    print_messages(
+                        [
+                            ["Error reading the metrics of the replication instances"],
+                            [str(error)],
+                            ["Tasks are started without backpressure."],
+                        ],
+                        ["Error"],
+                    )
+                    self.read_failed = True
+
+                failed = True
+                readings = {arn: {} for arn in due}
+
+            for arn in due:
+                self.last_read[arn] = now
+                self.allowance[arn] = None if failed else self.step
+                # With no values, a paused instance is resumed.
+                self.evaluate(arn, readings.get(arn, {}), now)
+
+    def evaluate(self, instance_arn, values, now):
+        """
+        Pauses or resumes the instance, given the latest values of its metrics.
+        """
+        crossed = []
+        recovered = True
+
+        for metric, (pause, resume) in self.thresholds.items():
+            if metric not in values:
+                continue
+
+            value = values[metric]
+
+            if high_is_bad((pause, resume)):
+                bad, good = value >= pause, value <= resume
+            else:
+                bad, good = value <= pause, value >= resume
+
+            if bad:
+                crossed.append(f"{metric}: {format_metric(metric, value)}")
+
+            recovered = recovered and good
+
+        if instance_arn in self.paused:
+            if recovered:
+                since, _ = self.paused.pop(instance_arn)
+                self.paused_seconds[instance_arn] += now - since
+                print(f"Resuming task starts on {instance_arn}")
+        elif crossed:
+            self.paused[instance_arn] = (now, crossed)
+            self.pause_count[instance_arn] += 1
+            print(f"Pausing task starts on {instance_arn} ({', '.join(crossed)})")
+
+    def take(self, instance_arn, wanted):
+        """
+        Returns how many of the "wanted" tasks may be started on the instance now (0 while
+        it is paused), and counts them against the allowance of the current reading.
+        """
+        self.refresh([instance_arn])
+
+        with self.lock:
+            if instance_arn in self.paused:
+                return 0
+
+            if self.allowance.get(instance_arn, 0) is None:
+                return wanted
+
+            granted = min(wanted, self.allowance.get(instance_arn, 0))
+            self.allowance[instance_arn] = self.allowance.get(instance_arn, 0) - granted
+
+            return granted
+
+    def paused_time(self, instance_arn):
+        """
+        Returns the seconds the instance has been paused for, including a pause that is
+        still on.
+        """
+        with self.lock:
+            seconds = self.paused_seconds[instance_arn]
+
+            if instance_arn in self.paused:
+                seconds += time.monotonic() - self.paused[instance_arn][0]
+
+            return seconds
@@ -0,0 +1,1014 @@
+import argparse
+import collections
+import contextlib
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from tabulate import tabulate
+
+from local_dms import LocalDMSClient
+
+# --------------------------------------------------------------------------------------------------#
+# Benchmarks                                                                                        #
+#                                                                                                   #
+# These run against local stand-ins (See local_dms.py), so no AWS account is needed.                #
+#   python benchmark.py --bench create_dms_tasks                                                    #
+#   python benchmark.py --bench startup                                                             #
+#   python benchmark.py --bench excel                                                               #
+#   python benchmark.py --bench pipeline                                                            #
+#   python benchmark.py --bench orchestration                                                       #
+#   python benchmark.py --bench scheduler                                                           #
+#   python benchmark.py --bench validate_data                                                       #
+#                                                                                                   #
+# Results can be appended to a file (--results_file), one JSON object per line, to be compared     #
+# across releases.                                                                                  #
+#                                                                                                   #
+# dms is imported by the benchmarks that need it, so that the Excel benchmark, which runs each     #
+# case in a fresh interpreter, does not count boto3 in its memory use.                             #
+# --------------------------------------------------------------------------------------------------#
+
+
+def write_sample_json_files(location, count):
+    """
+    Writes "count" table mapping files to the given directory.
+    """
+    json_files = []
+
+    for i in range(count):
+        file_name = f"hr-table-{i}.json"
+        data = {
+            "rules": [
+                {
+                    "rule-type": "selection",
+                    "rule-id": 6,
+                    "rule-name": 6,
+                    "object-locator": {"schema-name": "HR", "table-name": f"TABLE_{i}"},
+                    "rule-action": "include",
+                }
+            ]
+        }
+
+        with open(os.path.join(location, file_name), "w") as fp:
+            json.dump(data, fp)
+
+        json_files.append(file_name)
+
+    return json_files
+
+
+def bench_create_dms_tasks(args):
+    """
+    Creates tasks against a DMS client that adds latency to each call, with different
+    worker counts. One worker is the old, sequential behaviour.
+    """
+    from dms import create_replication_tasks
+
+    result = []
+    baseline = None
+
+    with tempfile.TemporaryDirectory() as location:
+        json_files = write_sample_json_files(location, args.files)
+
+        for workers in args.workers:
+            dms = LocalDMSClient(
+                latency=args.latency, max_concurrent_calls=args.max_concurrent_calls
+            )
+
+            start_time = time.perf_counter()
+            results = create_replication_tasks(
+                dms, json_files, workers=workers, location=location
+            )
+            elapsed = time.perf_counter() - start_time
+
+            if baseline is None:
+                baseline = elapsed
+
+            result.append(
+                [
+                    workers,
+                    len([r for r in results if r.task_arn]),
+                    len([r for r in results if r.error]),
+                    dms.throttle_count,
+                    f"{elapsed:.2f}",
+                    f"{len(json_files) / elapsed:.1f}",
+                    f"{baseline / elapsed:.1f}x",
+                ]
+            )
+
+    print(
+        tabulate(
+            result,
+            headers=[
+                "Workers",
+                "Created",
+                "Failed",
+                "Throttled",
+                "Seconds",
+                "Tasks/sec",
+                "Speedup",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+def bench_startup(args):
+    """
+    Measures how long it takes to import app.py and the module of each action, in a fresh
+    interpreter, and whether boto3 gets imported along the way. The last row imports all
+    the modules up front, the way app.py used to.
+
+    Exits with an error if an action that does not need AWS takes more than
+    "--max_startup_ms", so that startup regressions are caught.
+    """
+    from app import ACTIONS
+
+    code = (
+        "import sys, time; t = time.perf_counter(); import app; {imports}; "
+        "print(time.perf_counter() - t, 'boto3' in sys.modules)"
+    )
+
+    cases = collections.OrderedDict()
+
+    for action in ACTIONS.values():
+        cases.setdefault(action.module, [action.module, [], action.needs_aws])
+        cases[action.module][1].append(action.name)
+
+    modules = [case[0] for case in cases.values()]
+    cases["eager"] = [", ".join(modules), ["(all, eager)"], True]
+
+    result = []
+    over_budget = []
+
+    for module, names, needs_aws in cases.values():
+        timings = []
+
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-c", code.format(imports=f"import {module}")],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+
+            timings.append(float(output[0]) * 1000)
+            boto3_imported = output[1] == "True"
+
+        median = statistics.median(timings)
+        result.append(
+            [
+                module,
+                "\n".join(names),
+                f"{median:.1f}",
+                f"{min(timings):.1f}",
+                "Yes" if boto3_imported else "No",
+            ]
+        )
+
+        if not needs_aws and median > args.max_startup_ms:
+            over_budget.append(f"{module}: {median:.1f} ms")
+
+    print(
+        tabulate(
+            result,
+            headers=["Module", "Actions", "Median ms", "Min ms", "boto3 imported"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+    if over_budget:
+        print(
+            f"Startup over budget ({args.max_startup_ms} ms): " + ", ".join(over_budget)
+        )
+        sys.exit(1)
+
+
+def sample_structures(cells, columns=10):
+    """
+    Returns two table structures (as compared by validate_table_structures) with "cells"
+    cells in total, one in every 100 rows differing between them.
+    """
+    rows = max(1, cells // (2 * columns))
+    headers = [f"COLUMN_{j}" for j in range(columns)]
+    list1 = [headers] + [
+        [f"value_{i}_{j}" for j in range(columns)] for i in range(rows)
+    ]
+    list2 = [headers] + [
+        [f"value_{i}_{j}" if i % 100 else f"other_{i}_{j}" for j in range(columns)]
+        for i in range(rows)
+    ]
+
+    return list1, list2
+
+
+def write_excel_cell_by_cell(list1, list2, target_file):
+    """
+    The old "write_to_excel_file": a normal workbook, with each cell's value & border set
+    one at a time. Kept as the baseline of the Excel benchmark.
+    """
+    import openpyxl
+    from openpyxl.styles.borders import Border, Side
+
+    wb = openpyxl.Workbook()
+    sheet = wb["Sheet"]
+    sheet.title = "structure_comparison"
+
+    for i in range(len(list1)):
+        for j in range(len(list1[i])):
+            sheet.cell(row=i + 1, column=j + 1).value = list1[i][j]
+            sheet.cell(row=i + 1, column=j + 1).border = Border(
+                left=Side(style="thin"),
+                right=Side(style="thin"),
+                top=Side(style="thin"),
+                bottom=Side(style="thin"),
+            )
+
+        k = len(list1[i]) + 1
+
+        for j in range(len(list2[i])):
+            sheet.cell(row=i + 1, column=k + j + 1).value = list2[i][j]
+            sheet.cell(row=i + 1, column=k + j + 1).border = Border(
+                left=Side(style="thin"),
+                right=Side(style="thin"),
+                top=Side(style="thin"),
+                bottom=Side(style="thin"),
+            )
+
+    wb.save(target_file)
+
+
+def run_excel_case(writer, cells, target_file):
+    """
+    Writes one Excel file, and prints the seconds taken & the peak memory (MB) of the
+    process. Called in a fresh interpreter by "bench_excel".
+    """
+    import resource
+
+    from utils import write_to_excel_file
+
+    list1, list2 = sample_structures(cells)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start_time = time.perf_counter()
+
+    if writer == "cell_by_cell":
+        write_excel_cell_by_cell(list1, list2, target_file)
+    else:
+        write_to_excel_file(list1, list2, target_file=target_file)
+
+    elapsed = time.perf_counter() - start_time
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in KB on Linux. The input lists are left out of the peak.
+    print(elapsed, (peak_rss - base_rss) / 1024)
+
+
+def bench_excel(args):
+    """
+    Writes structure comparisons of different sizes with the old, cell by cell writer and
+    with the streaming one (utils.write_to_excel_file). Each case runs in a fresh
+    interpreter, so that the peak memory of one does not hide the other's.
+    """
+    code = "import benchmark; benchmark.run_excel_case({writer!r}, {cells}, {file!r})"
+    result = []
+
+    with tempfile.TemporaryDirectory() as location:
+        for cells in args.cells:
+            baseline = None
+
+            for writer in ("cell_by_cell", "streaming"):
+                target_file = os.path.join(location, f"{writer}_{cells}.xlsx")
+                output = (
+                    subprocess.run(
+                        [
+                            sys.executable,
+                            "-c",
+                            code.format(writer=writer, cells=cells, file=target_file),
+                        ],
+                        capture_output=True,
+                        text=True,
+                        check=True,
+                    )
+                    .stdout.split("\n")[-2]
+                    .split()
+                )
+
+                elapsed, peak_mb = float(output[0]), float(output[1])
+
+                if baseline is None:
+                    baseline = (elapsed, peak_mb)
+
+                result.append(
+                    [
+                        cells,
+                        writer,
+                        f"{elapsed:.2f}",
+                        f"{baseline[0] / elapsed:.1f}x",
+                        f"{peak_mb:.1f}",
+                        f"{os.path.getsize(target_file) / 1024 / 1024:.1f}",
+                    ]
+                )
+
+    print(
+        tabulate(
+            result,
+            headers=["Cells", "Writer", "Seconds", "Speedup", "Peak MB", "File MB"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux (bytes on macOS).
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_in_subprocess(function, cwd=None, **kwargs):
+    """
+    Calls a function of this module in a fresh interpreter, so that its peak memory is
+    measured on its own. The function prints its result as a JSON object on the last line.
+
+    :return: Dict returned by the function
+    """
+    code = (
+        "import json, sys; sys.path.insert(0, {src!r}); import benchmark; "
+        "benchmark.{function}(**json.loads(sys.argv[1]))"
+    ).format(src=os.path.dirname(os.path.abspath(__file__)), function=function)
+
+    output = subprocess.run(
+        [sys.executable, "-c", code, json.dumps(kwargs)],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def record_results(results_file, bench, results):
+    """
+    Appends the results to "results_file", one JSON object per line, along with the
+    commit & time of the run.
+    """
+    if not results_file:
+        return
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+
+    run_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(results_file, "a") as fp:
+        for result in results:
+            record = {"bench": bench, "commit": commit, "time": run_time}
+            record.update(result)
+            fp.write(json.dumps(record) + "\n")
+
+    print(f"{len(results)} results appended to: {results_file}")
+
+
+def write_sample_csv_files(location, rows, seed=0):
+    """
+    Writes an include & an exclude file with "rows" lines in total, with a mix of entries
+    similar to the real ones:
+
+        - Most of the schemas list their tables, one per line. Of these lines, 5% have
+          "partitions-auto" and 2% have filter conditions.
+        - One schema in 20 has a single "%" line instead.
+        - The exclude file has 1% of the lines.
+    """
+    rng = random.Random(seed)
+    tables_per_schema = 5000
+    operators = ["eq", "gte", "ste"]
+
+    exclude_rows = rows // 100
+    include_rows = rows - exclude_rows
+
+    with open(os.path.join(location, "include_1.csv"), "w") as fp:
+        for i in range(include_rows):
+            schema_no, table_no = divmod(i, tables_per_schema)
+            schema = f"SCHEMA_{schema_no}"
+
+            if schema_no % 20 == 19:
+                if table_no == 0:
+                    fp.write(f"{schema},%\n")
+                continue
+
+            table = f"TABLE_{table_no}"
+            chance = rng.random()
+
+            if chance < 0.02:
+                filters = [
+                    f"COLUMN_{rng.randint(1, 9)},{rng.choice(operators)},{rng.randint(1, 10 ** 6)}"
+                    for _ in range(rng.randint(1, 2))
+                ]
+
+                if rng.random() < 0.3:
+                    filters.append("CREATED_AT,between,2020-01-01~2021-01-01")
+
+                fp.write(f"{schema},{table},{','.join(filters)}\n")
+            elif chance < 0.07:
+                fp.write(f"{schema},{table},partitions-auto\n")
+            else:
+                fp.write(f"{schema},{table}\n")
+
+    with open(os.path.join(location, "exclude_1.csv"), "w") as fp:
+        for i in range(exclude_rows):
+            fp.write(f"SCHEMA_{i % max(1, rows // tables_per_schema)},TMP_TABLE_{i}\n")
+
+
+def run_pipeline_case():
+    """
+    Runs "process_input_files" twice in the current directory: once with no JSON files
+    (cold), and once more with nothing changed (warm). Called in a fresh interpreter by
+    "bench_pipeline".
+    """
+    from config import json_files_location
+    from process_input_files import process_input_files
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        process_input_files()
+        cold = time.perf_counter() - start_time
+
+        files = [f for f in os.listdir(json_files_location) if f.endswith(".json")]
+        json_bytes = sum(
+            os.path.getsize(os.path.join(json_files_location, f)) for f in files
+        )
+
+        start_time = time.perf_counter()
+        process_input_files()
+        warm = time.perf_counter() - start_time
+
+    print(
+        json.dumps(
+            {
+                "cold_seconds": cold,
+                "warm_seconds": warm,
+                "json_files": len(files),
+                "json_bytes": json_bytes,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+    )
+
+
+def bench_pipeline(args):
+    """
+    Generates input CSV files of different sizes, and times "process_input_files" on
+    them: rows per second, JSON files & bytes written, and peak memory.
+    """
+    result = []
+    records = []
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as root:
+            for directory in ("config", "json_files", "src"):
+                os.mkdir(os.path.join(root, directory))
+
+            write_sample_csv_files(os.path.join(root, "config"), rows)
+
+            case = run_in_subprocess("run_pipeline_case", cwd=os.path.join(root, "src"))
+
+        case["rows"] = rows
+        case["rows_per_second"] = rows / case["cold_seconds"]
+        records.append(case)
+
+        result.append(
+            [
+                rows,
+                f"{case['cold_seconds']:.2f}",
+                f"{case['warm_seconds']:.2f}",
+                f"{case['rows_per_second']:.0f}",
+                case["json_files"],
+                f"{case['json_bytes'] / 1024 / 1024:.1f}",
+                f"{case['peak_rss_mb']:.1f}",
+            ]
+        )
+
+    print(
+        tabulate(
+            result,
+            headers=[
+                "Rows",
+                "Cold Seconds",
+                "Warm Seconds",
+                "Rows/sec",
+                "JSON Files",
+                "JSON MB",
+                "Peak MB",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+    record_results(args.results_file, "pipeline", records)
+
+
+def run_orchestration_case(tasks, latency, workers, max_concurrent_calls):
+    """
+    Creates, runs & deletes "tasks" tasks against the local DMS stand-in, waiting for the
+    tasks after each stage the way the actions do, and then runs them again through the
+    Orchestrator. Called in a fresh interpreter by "bench_orchestration".
+    """
+    from dms import (
+        create_replication_tasks,
+        delete_replication_tasks,
+        start_replication_tasks,
+        wait_for_status_change,
+    )
+    from orchestrator import Orchestrator
+
+    dms = LocalDMSClient(
+        latency=latency,
+        max_concurrent_calls=max_concurrent_calls,
+        transition_delay=latency * 2,
+        run_duration=latency * 4,
+    )
+    poll = {"min_delay": latency, "max_delay": latency * 4}
+    stages = {}
+
+    @contextlib.contextmanager
+    def stage(name):
+        calls, throttled = dms.call_count, dms.throttle_count
+        start_time = time.perf_counter()
+        yield
+        stages[name] = {
+            "seconds": time.perf_counter() - start_time,
+            "api_calls": dms.call_count - calls,
+            "throttled": dms.throttle_count - throttled,
+        }
+
+    with tempfile.TemporaryDirectory() as location, open(
+        os.devnull, "w"
+    ) as devnull, contextlib.redirect_stdout(devnull):
+        json_files = write_sample_json_files(location, tasks)
+
+        with stage("create"):
+            results = create_replication_tasks(
+                dms, json_files, workers=workers, location=location
+            )
+            arns = [r.task_arn for r in results if r.task_arn]
+            wait_for_status_change(dms, "replication_task_ready", arns, **poll)
+
+        with stage("run"):
+            started, _ = start_replication_tasks(dms, arns, workers=workers)
+            wait_for_status_change(
+                dms, "replication_task_stopped", started, timeout_per_task=None, **poll
+            )
+
+        with stage("delete"):
+            deleted, _ = delete_replication_tasks(dms, arns, workers=workers)
+            wait_for_status_change(dms, "replication_task_deleted", deleted, **poll)
+
+        # The same create & run stages (plus table statistics), as a single pipelined run
+        with stage("pipeline"):
+            Orchestrator(
+                dms,
+                limits={"create": workers, "start": workers, "stats": workers},
+                location=location,
+                poll_settings=poll,
+            ).run(json_files)
+
+    print(
+        json.dumps({"stages": stages, "tasks": len(arns), "peak_rss_mb": peak_rss_mb()})
+    )
+
+
+def bench_orchestration(args):
+    """
+    Drives the create, run & delete stages against the local DMS stand-in, with different
+    worker counts, and reports the tasks per second of each stage. "pipeline" is create &
+    run (plus table statistics) as a single pipelined run, to compare with the two stages.
+    """
+    result = []
+    records = []
+
+    for workers in args.workers:
+        case = run_in_subprocess(
+            "run_orchestration_case",
+            tasks=args.files,
+            latency=args.latency,
+            workers=workers,
+            max_concurrent_calls=args.max_concurrent_calls,
+        )
+
+        for stage, timings in case["stages"].items():
+            tasks_per_second = case["tasks"] / timings["seconds"]
+
+            records.append(
+                {
+                    "stage": stage,
+                    "workers": workers,
+                    "tasks": case["tasks"],
+                    "latency": args.latency,
+                    "tasks_per_second": tasks_per_second,
+                    "peak_rss_mb": case["peak_rss_mb"],
+                    **timings,
+                }
+            )
+
+            result.append(
+                [
+                    workers,
+                    stage,
+                    case["tasks"],
+                    f"{timings['seconds']:.2f}",
+                    f"{tasks_per_second:.1f}",
+                    timings["api_calls"],
+                    timings["throttled"],
+                    f"{case['peak_rss_mb']:.1f}",
+                ]
+            )
+
+    print(
+        tabulate(
+            result,
+            headers=[
+                "Workers",
+                "Stage",
+                "Tasks",
+                "Seconds",
+                "Tasks/sec",
+                "API Calls",
+                "Throttled",
+                "Peak MB",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+    record_results(args.results_file, "orchestration", records)
+
+
+class UnreadableMetrics:
+    """
+    Source of metrics whose reads fail, like CloudWatch without the permission to read them.
+    """
+
+    def read(self, instance_arns):
+        raise RuntimeError("AccessDenied: not authorized to perform: GetMetricData")
+
+
+def bench_scheduler(args):
+    """
+    Runs tasks of different sizes against the local DMS stand-in, whose replication instance
+    slows down when it runs more than "instance_capacity" tasks, with different budgets.
+    Each budget is run with the tasks ordered by size, and in the order they were created.
+    Budget 0 starts all the tasks at once. The "backpressure" cases pace the starts by the
+    metrics of the stand-in instance (See LocalCloudWatchClient). In the "unreadable" case
+    the metrics can not be read, so all the tasks should still be started at once.
+    """
+    from backpressure import Backpressure
+    from config import replication_instance_arn
+    from dms import create_replication_tasks, wait_for_status_change
+    from local_dms import LocalCloudWatchClient
+    from scheduler import ScheduledTask, WaveScheduler
+
+    rng = random.Random(0)
+    # Sizes vary over two orders of magnitude, like the tables of a real schema.
+    sizes = {
+        ("HR", f"TABLE_{i}"): round(rng.lognormvariate(0, 1), 2)
+        for i in range(args.files)
+    }
+
+    def run_duration(task):
+        table = json.loads(task["TableMappings"])["rules"][0]["object-locator"]
+        return args.latency * 4 * sizes[("HR", table["table-name"])]
+
+    result = []
+    records = []
+    cases = [(0, "size", ""), (0, "size", "yes"), (0, "size", "unreadable")]
+    cases += [
+        (budget, order, "") for budget in args.budgets for order in ("size", "fifo")
+    ]
+    cases += [(budget, "size", "yes") for budget in args.budgets]
+
+    for budget, order, with_backpressure in cases:
+        dms = LocalDMSClient(
+            latency=args.latency / 10,
+            transition_delay=args.latency,
+            run_duration=run_duration,
+            instance_capacity=args.instance_capacity,
+        )
+
+        with tempfile.TemporaryDirectory() as location, open(
+            os.devnull, "w"
+        ) as devnull, contextlib.redirect_stdout(devnull):
+            json_files = write_sample_json_files(location, args.files)
+            created = create_replication_tasks(dms, json_files, location=location)
+            wait_for_status_change(
+                dms,
+                "replication_task_ready",
+                [r.task_arn for r in created],
+                min_delay=args.latency,
+                max_delay=args.latency * 4,
+            )
+            tasks = [
+                ScheduledTask(
+                    task_arn=r.task_arn,
+                    task_id=r.task_id,
+                    instance_arn=replication_instance_arn,
+                    priority=0,
+                    load=sizes[("HR", f"TABLE_{i}")] if order == "size" else 0,
+                )
+                for i, r in enumerate(created)
+            ]
+
+            backpressure = None
+
+            if with_backpressure == "yes":
+                backpressure = Backpressure.from_cloudwatch(
+                    LocalCloudWatchClient(dms), dms, interval=args.latency * 2, step=2
+                )
+            elif with_backpressure == "unreadable":
+                backpressure = Backpressure(
+                    UnreadableMetrics(), interval=args.latency * 2, step=2
+                )
+
+            calls = dms.call_count
+            scheduler = WaveScheduler(
+                dms,
+                lambda task_arn: dms.start_replication_task(
+                    ReplicationTaskArn=task_arn
+                ),
+                budget=budget,
+                min_delay=args.latency,
+                max_delay=args.latency * 4,
+                backpressure=backpressure,
+            )
+            runs = scheduler.run(tasks)
+            report = scheduler.instance_report()[0]
+
+        makespan = max(run.ended for run in runs) - min(run.started for run in runs)
+
+        records.append(
+            {
+                "budget": budget,
+                "order": order,
+                "backpressure": with_backpressure,
+                "tasks": args.files,
+                "instance_capacity": args.instance_capacity,
+                "latency": args.latency,
+                "makespan": makespan,
+                "peak_running": report[6],
+                "api_calls": dms.call_count - calls,
+            }
+        )
+
+        result.append(
+            [
+                budget or "all",
+                order,
+                with_backpressure,
+                args.files,
+                report[6],
+                report[7],
+                f"{makespan:.2f}",
+                dms.call_count - calls,
+            ]
+        )
+
+    print(
+        tabulate(
+            result,
+            headers=[
+                "Budget",
+                "Order",
+                "Backpressure",
+                "Tasks",
+                "Peak Running",
+                "Avg Running",
+                "Makespan sec",
+                "API Calls",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+    record_results(args.results_file, "scheduler", records)
+
+
+def write_sample_databases(location, rows, changed, seed=0):
+    """
+    Writes a Source & a Target SQLite DB with an ORDERS table of "rows" rows. "changed"
+    rows, spread over the key range, have a different AMOUNT in the Target DB.
+
+    :return: (Source DB URL, Target DB URL, keys of the changed rows)
+    """
+    import sqlite3
+
+    rng = random.Random(seed)
+    data = [
+        (
+            order_id,
+            f"CUSTOMER_{rng.randrange(10000)}",
+            round(rng.uniform(1, 10000), 2),
+            f"2021-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            rng.choice(["NEW", "SHIPPED", "CANCELLED", None]),
+        )
+        for order_id in range(1, rows + 1)
+    ]
+    urls = []
+    changed_keys = [(i * 2 + 1) * rows // (changed * 2) for i in range(changed)]
+
+    for name in ("source", "target"):
+        path = os.path.join(location, f"{name}.db")
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE ORDERS (ORDER_ID INTEGER PRIMARY KEY, CUSTOMER TEXT, "
+            "AMOUNT NUMERIC, ORDER_DATE TEXT, STATUS TEXT)"
+        )
+        connection.executemany("INSERT INTO ORDERS VALUES (?, ?, ?, ?, ?)", data)
+
+        if name == "target":
+            connection.executemany(
+                "UPDATE ORDERS SET AMOUNT = AMOUNT + 1 WHERE ORDER_ID = ?",
+                [(key,) for key in changed_keys],
+            )
+
+        connection.commit()
+        connection.close()
+        urls.append(f"sqlite:///{path}")
+
+    return urls + [changed_keys]
+
+
+def bench_validate_data(args):
+    """
+    Validates a table of different sizes between two SQLite DBs, with different no of
+    worker processes, and reports rows per second. A few rows differ in the Target DB, and
+    each of them should fall in a chunk reported as different.
+    """
+    from data_validator import validate_tables
+
+    result = []
+    records = []
+
+    for rows in args.rows:
+        changed = min(3, rows)
+
+        with tempfile.TemporaryDirectory() as location:
+            source_url, target_url, changed_keys = write_sample_databases(
+                location, rows, changed
+            )
+
+            for workers in args.workers:
+                started = time.perf_counter()
+                (table_result,) = validate_tables(
+                    source_url,
+                    target_url,
+                    [("main", "ORDERS")],
+                    workers=workers,
+                    chunk_rows=args.chunk_rows,
+                )
+                elapsed = time.perf_counter() - started
+                found = sum(
+                    1
+                    for key in changed_keys
+                    if any(
+                        (m.lower is None or key >= m.lower)
+                        and (m.upper is None or key < m.upper)
+                        for m in table_result.mismatches
+                    )
+                )
+
+                records.append(
+                    {
+                        "rows": rows,
+                        "workers": workers,
+                        "chunks": table_result.chunks,
+                        "seconds": elapsed,
+                        "rows_per_second": rows / elapsed,
+                        "mismatched_chunks": len(table_result.mismatches),
+                        "changed_rows_found": found,
+                    }
+                )
+                result.append(
+                    [
+                        rows,
+                        workers,
+                        table_result.chunks,
+                        f"{elapsed:.2f}",
+                        f"{rows / elapsed:.0f}",
+                        len(table_result.mismatches),
+                        f"{found} of {changed}",
+                    ]
+                )
+
+    print(
+        tabulate(
+            result,
+            headers=[
+                "Rows",
+                "Workers",
+                "Chunks",
+                "Seconds",
+                "Rows/sec",
+                "Mismatched Chunks",
+                "Changed Rows Found",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+    record_results(args.results_file, "validate_data", records)
+
+
+benchmarks = {
+    "create_dms_tasks": bench_create_dms_tasks,
+    "startup": bench_startup,
+    "excel": bench_excel,
+    "pipeline": bench_pipeline,
+    "orchestration": bench_orchestration,
+    "scheduler": bench_scheduler,
+    "validate_data": bench_validate_data,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bench", help="Benchmark to run", choices=list(benchmarks), required=True
+    )
+    parser.add_argument("--files", help="No of JSON files", type=int, default=200)
+    parser.add_argument(
+        "--latency", help="Seconds added to each API call", type=float, default=0.05
+    )
+    parser.add_argument(
+        "--workers",
+        help="Comma separated worker counts",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[1, 8, 16],
+    )
+    parser.add_argument(
+        "--runs", help="No of runs of each startup case", type=int, default=5
+    )
+    parser.add_argument(
+        "--max_startup_ms",
+        help="Startup budget of the actions that do not need AWS",
+        type=float,
+        default=150,
+    )
+    parser.add_argument(
+        "--max_concurrent_calls",
+        help="Calls in flight before the stand-in throttles",
+        type=int,
+        default=10,
+    )
+
+    parser.add_argument(
+        "--cells",
+        help="Comma separated sizes (no of cells) of the Excel files",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[100000, 1000000],
+    )
+
+    parser.add_argument(
+        "--rows",
+        help="Comma separated sizes (no of lines) of the input CSV files",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[1000, 100000, 1000000],
+    )
+    parser.add_argument(
+        "--budgets",
+        help="Comma separated budgets (max running tasks) of the scheduler benchmark",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[4, 8, 16],
+    )
+    parser.add_argument(
+        "--instance_capacity",
+        help="No of tasks the stand-in replication instance runs at full speed",
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        "--chunk_rows",
+        help="Rows per chunk of the validate_data benchmark",
+        type=int,
+        default=100000,
+    )
+    parser.add_argument(
+        "--results_file",
+        help="File the results are appended to, one JSON object per line",
+        type=str,
+    )
+
+    args = parser.parse_args()
+
+    benchmarks[args.bench](args)
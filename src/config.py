@@ -11,12 +11,137 @@ DEFAULT_REGION = "us-east-2"
 SOURCE_DB_ID = "database-1"
 TARGET_DB_ID = "demo"
 
+# Passwords of the Source & Target DBs (validate_data). Host, port, user & DB come from the
+# DMS endpoints. Leave the passwords empty to read them from AWS Secrets Manager: a Key/Value
+# secret named SECRET_MANAGER_SECRET_NAME, with the keys SOURCE_DB_SECRET_KEY &
+# TARGET_DB_SECRET_KEY.
+SOURCE_DB_PWD = ""
+TARGET_DB_PWD = ""
+SECRET_MANAGER_SECRET_NAME = ""
+SOURCE_DB_SECRET_KEY = ""
+TARGET_DB_SECRET_KEY = ""
+
+# Path to the Oracle Instant Client, if it is not on the library path (See README).
+oracle_instance_client_path = ""
+
+# Data validation (validate_data). Tables are split into chunks of about
+# VALIDATION_CHUNK_ROWS rows by their primary key, and each chunk is read & hashed on the
+# Source & Target DBs by VALIDATION_WORKERS processes.
+VALIDATION_WORKERS = 4
+VALIDATION_CHUNK_ROWS = 100000
+
 # This variable controls how many RDS DB log files to be fetched
 DB_LOG_FILE_COUNT = 1
 
+# Log files of the Source & Target DBs are downloaded in parallel, to "db_logs_location".
+# Only the last DB_LOG_TAIL_LINES lines of each file are printed.
+DB_LOG_DOWNLOAD_WORKERS = 4
+DB_LOG_TAIL_LINES = 50
+
 # Used when listing DMS tasks
 MAX_TASKS_PER_PAGE = 100
 
+# No of DMS tasks created in parallel. All the workers share a single DMS client.
+TASK_CREATION_WORKERS = 8
+
+# No of DMS tasks started in parallel.
+TASK_START_WORKERS = 8
+
+# No of DMS tasks deleted in parallel.
+TASK_DELETION_WORKERS = 8
+
+# Max no of DMS tasks loading at the same time on a replication instance (run_dms_tasks &
+# run_migration). Each task loads up to "MaxFullLoadSubTasks" tables at once (See
+# task_settings.py), so too many tasks at once make the instance thrash. Further tasks are
+# started as the running ones stop: the highest priority first (See "task_priorities_file"),
+# then the largest. 0 means no limit: all the tasks are started at once, and run_dms_tasks
+# returns without waiting for them (unless --wait is given). A different budget can be given
+# to an instance in INSTANCE_MAX_RUNNING_TASKS (Replication instance ARN -> budget).
+MAX_RUNNING_TASKS = 0
+INSTANCE_MAX_RUNNING_TASKS = {}
+
+# Backpressure from the CloudWatch metrics of the replication instances (run_dms_tasks &
+# run_migration, with --backpressure). Starting new tasks on an instance is paused when any of
+# its metrics crosses the "pause" value, and resumed once all of them are back past the
+# "resume" values. CPU is in percent, the others in bytes.
+#   BACKPRESSURE_THRESHOLDS - Metric -> (pause, resume)
+#   BACKPRESSURE_INTERVAL   - Seconds between readings of the metrics
+#   BACKPRESSURE_STEP       - Max no of tasks started on an instance per reading, so that the
+#                             metrics can catch up with the tasks just started
+BACKPRESSURE_THRESHOLDS = {
+    "CPUUtilization": (90, 75),
+    "FreeableMemory": (512 * 1024**2, 1024**3),
+    "SwapUsage": (512 * 1024**2, 256 * 1024**2),
+    "FreeStorageSpace": (5 * 1024**3, 10 * 1024**3),
+}
+BACKPRESSURE_INTERVAL = 60
+BACKPRESSURE_STEP = 4
+
+# Settings profile of a task, by its predicted load: the size of the tables it loads, in the
+# unit of "table_sizes_file" (rows, if it was saved with --save_table_sizes), or the "size:"
+# hints of the include files (E.g., HR,ORDERS,split:ORDER_ID:16,size:2000000000). A task gets
+# the first class whose upper bound is above its load. The settings of each class are layered
+# over "task_settings" (See task_settings.py), and the overrides of "task_settings_overrides_file"
+# over both. Tasks with no known load get "task_settings" as is ("base").
+SETTINGS_SIZE_CLASSES = [
+    ("small", 1000000),
+    ("medium", 100000000),
+    ("large", None),
+]
+
+# Table statistics of these many tasks are fetched in parallel.
+TABLE_STATISTICS_WORKERS = 8
+
+# Max allowed by DMS for "describe_table_statistics" is 500.
+MAX_TABLE_STATISTICS_PER_PAGE = 500
+
+# Polling of task status (E.g., waiting for the tasks to be ready).
+#   POLL_CHUNK_SIZE       - No of task ARNs passed to each "describe_replication_tasks" call
+#   POLL_MIN_DELAY        - Seconds between polls while task status keeps changing
+#   POLL_MAX_DELAY        - Seconds between polls, at most, while nothing changes
+#   POLL_TIMEOUT_PER_TASK - A task whose status does not change for these many seconds is
+#                           reported as stuck
+POLL_CHUNK_SIZE = 100
+POLL_MIN_DELAY = 5
+POLL_MAX_DELAY = 60
+POLL_TIMEOUT_PER_TASK = 1800
+
+# How many times a throttled AWS API call is attempted before giving up.
+MAX_API_ATTEMPTS = 8
+
+# No of DMS tasks the tables of a schema (with no filter conditions) are spread over. Tables
+# are packed by size, so that the tasks get about the same load. Sizes are read from
+# "table_sizes_file" (Lines like: HR,EMPLOYEES,250000). To create this file from the row
+# counts of a previous load, use: --action describe_table_statistics --save_table_sizes
+TASKS_PER_SCHEMA = 1
+
+# Limits of the table mapping of a DMS task. Tables of a schema whose mapping would go over
+# either limit are split over more tasks. Keep these below the limits of DMS.
+MAX_RULES_PER_TASK = 1000
+MAX_TABLE_MAPPING_BYTES = 500000
+
+# If True, a schema whose include file lists most of its tables is selected with a "%" rule
+# and exclude rules for the tables not listed, rather than a rule per table. The list of all
+# the tables of a schema comes from "table_catalog_file" (Lines like: HR,EMPLOYEES), which
+# must list every table of the schemas in it: tables that are not in it would be loaded too.
+# To create it from the Source DB, use: --action generate_json_files --save_table_catalog
+# Schemas that are not in it are not compacted.
+COMPACT_TABLE_MAPPINGS = False
+
+# Used when following the CloudWatch logs of a task (fetch_cloudwatch_logs_for_a_task --follow)
+#   LOG_FOLLOW_INTERVAL         - Seconds between polls for new log events
+#   LOG_FOLLOW_LOOKBACK_MINUTES - When following a task for the first time (and no start time
+#                                 is given), log events of these many minutes are shown first
+LOG_FOLLOW_INTERVAL = 10
+LOG_FOLLOW_LOOKBACK_MINUTES = 15
+
+# Log events of these many tasks are fetched in parallel by sync_task_logs.
+LOG_SYNC_WORKERS = 8
+
+# Reports with more rows than this are not printed as a grid (--output table), but line by
+# line as the rows arrive. Use "--output jsonl" or "--output csv" to pipe reports to other tools.
+TABLE_OUTPUT_MAX_ROWS = 1000
+
 # Homogeneous migration (Oracle -> Oracle, etc)
 # If True, the schemas, tables, and columns will not be converted
 # to lower case.
@@ -27,4 +152,15 @@ homegeneous_migration = True
 #-------------------------------------------------------------------------------------------------#
 csv_files_location = "../config"
 json_files_location = "../json_files"
+json_manifest_file = "../json_files/.manifest"
+logs_location = "../logs"
+log_store_file = "../logs/task_logs.db"
+db_logs_location = "../logs/db_logs"
 task_arn_file = "../config/task_arn_file.txt"
+table_sizes_file = "../config/table_sizes.csv"
+table_catalog_file = "../config/table_catalog.csv"
+split_bounds_file = "../config/split_bounds.csv"
+split_histogram_file = "../config/split_histogram.csv"
+task_priorities_file = "../config/task_priorities.csv"
+task_settings_overrides_file = "../config/task_settings_overrides.json"
+schedule_history_file = "../logs/schedule_history.csv"
@@ -0,0 +1,181 @@
+import collections
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_LOG_DOWNLOAD_WORKERS, MAX_API_ATTEMPTS, db_logs_location
+from utils import AdaptiveBackoff, call_with_backoff
+
+# ------------------------------------------------------------------------------------------------#
+# Downloads RDS DB log files to "db_logs_location"                                                #
+# ------------------------------------------------------------------------------------------------#
+# "download_db_log_file_portion" returns a log file a portion at a time. Each portion comes with
+# a "Marker" to ask for the next one, and "AdditionalDataPending" tells whether there is more.
+#
+# Each portion is appended to the local copy of the file, and the marker and size of the local
+# copy are saved next to it (<log file>.state). A later download carries on from the saved
+# marker: an interrupted download resumes where it stopped, and a log file that is still being
+# written to only costs the lines added since.
+DBLogFile = collections.namedtuple(
+    "DBLogFile", "db_id, log_file_name, local_file, bytes_downloaded, complete, error"
+)
+
+
+def list_db_log_files(rds, db_id, count, backoff=None):
+    """
+    Returns the "count" most recently written log files of a DB instance, oldest first.
+    Follows "Marker" until all the log files have been listed.
+    """
+    backoff = backoff or AdaptiveBackoff()
+    kwargs = {"DBInstanceIdentifier": db_id}
+    log_files = []
+
+    while True:
+        response, _ = call_with_backoff(
+            rds.describe_db_log_files, backoff, MAX_API_ATTEMPTS, **kwargs
+        )
+        log_files.extend(response["DescribeDBLogFiles"])
+
+        if not response.get("Marker"):
+            break
+
+        kwargs["Marker"] = response["Marker"]
+
+    log_files.sort(key=lambda log_file: log_file.get("LastWritten", 0))
+
+    return log_files[-count:] if count > 0 else []
+
+
+def get_local_file_name(db_id, log_file_name, location=db_logs_location):
+    # RDS log file names can have directories in them (E.g., "trace/alert_ORCL.log")
+    return os.path.join(location, db_id, log_file_name.replace("/", "_"))
+
+
+def read_state(state_file):
+    if not os.path.exists(state_file):
+        return None
+
+    with open(state_file, "r") as fp:
+        return json.load(fp)
+
+
+def write_state(state_file, marker, size):
+    with open(state_file + ".tmp", "w") as fp:
+        json.dump({"marker": marker, "size": size}, fp)
+
+    os.replace(state_file + ".tmp", state_file)
+
+
+def download_db_log_file(
+    rds, db_id, log_file_name, backoff=None, location=db_logs_location
+):
+    """
+    Downloads a log file to the end, portion by portion, resuming from the saved state.
+
+    :return: DBLogFile object
+    """
+    backoff = backoff or AdaptiveBackoff()
+    local_file = get_local_file_name(db_id, log_file_name, location)
+    state_file = local_file + ".state"
+
+    os.makedirs(os.path.dirname(local_file), exist_ok=True)
+
+    state = read_state(state_file)
+
+    if state is None or not os.path.exists(local_file):
+        marker, size = "0", 0
+    else:
+        marker, size = state["marker"], state["size"]
+
+    bytes_downloaded = 0
+
+    try:
+        with open(local_file, "ab") as out_file:
+            # Drop whatever was written after the last saved state (E.g., a portion whose
+            # state was not saved before the download was interrupted).
+            out_file.truncate(size)
+
+            while True:
+                response, _ = call_with_backoff(
+                    rds.download_db_log_file_portion,
+                    backoff,
+                    MAX_API_ATTEMPTS,
+                    DBInstanceIdentifier=db_id,
+                    LogFileName=log_file_name,
+                    Marker=marker,
+                )
+
+                data = (response.get("LogFileData") or "").encode("utf-8")
+
+                if data:
+                    out_file.write(data)
+                    out_file.flush()
+                    size += len(data)
+                    bytes_downloaded += len(data)
+
+                marker = response.get("Marker") or marker
+                write_state(state_file, marker, size)
+
+                if not response.get("AdditionalDataPending"):
+                    break
+
+    except Exception as error:
+        return DBLogFile(
+            db_id, log_file_name, local_file, bytes_downloaded, False, error
+        )
+
+    return DBLogFile(db_id, log_file_name, local_file, bytes_downloaded, True, None)
+
+
+def download_db_log_files(rds, db_ids, count, workers=DB_LOG_DOWNLOAD_WORKERS):
+    """
+    Downloads the "count" latest log files of each DB instance. Log files of all the
+    instances are downloaded in parallel.
+
+    :return: List of DBLogFile objects. Instances whose log files could not be listed
+             get a single object with the error.
+    """
+    backoff = AdaptiveBackoff()
+    jobs = []
+    results = []
+
+    def list_log_files(db_id):
+        try:
+            return db_id, list_db_log_files(rds, db_id, count, backoff), None
+        except Exception as error:
+            return db_id, [], error
+
+    def download(job):
+        return download_db_log_file(rds, *job, backoff=backoff)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for db_id, log_files, error in executor.map(list_log_files, db_ids):
+            if error is not None:
+                results.append(DBLogFile(db_id, "", "", 0, False, error))
+
+            jobs.extend((db_id, log_file["LogFileName"]) for log_file in log_files)
+
+        results.extend(executor.map(download, jobs))
+
+    return results
+
+
+def tail_file(file_name, lines, block_size=8192):
+    """
+    Returns the last "lines" lines of a file, reading it from the end.
+    """
+    if lines <= 0 or not os.path.exists(file_name):
+        return []
+
+    with open(file_name, "rb") as in_file:
+        in_file.seek(0, os.SEEK_END)
+        position = in_file.tell()
+        data = b""
+
+        while position > 0 and data.count(b"\n") <= lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            in_file.seek(position)
+            data = in_file.read(read_size) + data
+
+    return data.decode("utf-8", errors="replace").splitlines()[-lines:]
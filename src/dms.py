@@ -1,129 +1,411 @@
+import collections
+import csv
+import itertools
 import json
 import os
-import re
 import sys
-import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import quote_plus
 
-import boto3
 from tabulate import tabulate
 
-from config import (DB_LOG_FILE_COUNT, MAX_TASKS_PER_PAGE, SOURCE_DB_ID,
-                    TARGET_DB_ID, json_files_location,
-                    replication_instance_arn, sns_topic_arn,
+from aws_clients import get_client
+from backpressure import Backpressure
+from config import (DB_LOG_FILE_COUNT, DB_LOG_TAIL_LINES, LOG_SYNC_WORKERS,
+                    MAX_API_ATTEMPTS, MAX_TABLE_STATISTICS_PER_PAGE,
+                    MAX_TASKS_PER_PAGE, SECRET_MANAGER_SECRET_NAME,
+                    SOURCE_DB_ID, SOURCE_DB_PWD, SOURCE_DB_SECRET_KEY,
+                    TABLE_STATISTICS_WORKERS, TARGET_DB_ID, TARGET_DB_PWD,
+                    TARGET_DB_SECRET_KEY, TASK_CREATION_WORKERS,
+                    TASK_DELETION_WORKERS, TASK_START_WORKERS,
+                    json_files_location, json_manifest_file, log_store_file,
+                    logs_location, replication_instance_arn, sns_topic_arn,
                     source_endpoint_arn, target_endpoint_arn, task_arn_file)
+from planner import read_table_sizes, write_table_sizes
 from process_input_files import process_input_files
-from task_settings import task_settings
-from utils import print_messages
-
-
-def create_dms_tasks(profile, region):
+from scheduler import (WaveScheduler, describe_scheduled_tasks, fits_budget,
+                       read_task_priorities)
+from settings_profiles import SettingsProfiles, read_task_loads
+from table_statistics import (COLUMNS, HEADERS, ROLLUP_HEADERS,
+                              TableStatistics)
+from db_logs import download_db_log_files, tail_file
+from log_store import LogStore
+from task_logs import (LogCheckpoint, follow_log_events, get_task_log_location,
+                       get_task_log_locations, iter_log_events,
+                       parse_log_event, parse_time)
+from task_poller import WAITER_STATES, poll_task_status
+from utils import (AdaptiveBackoff, call_with_backoff, get_error_code,
+                   print_info, print_messages, print_rows, task_id_prefix)
+
+# Descriptions of the Source & Target endpoints, by (profile, region). See get_endpoints.
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+# Outcome of creating a DMS task for a single JSON file. "profile" is the settings profile
+# the task was created with (See settings_profiles.py).
+TaskCreationResult = collections.namedtuple(
+    "TaskCreationResult",
+    "json_file, task_id, task_arn, error, attempts, elapsed, profile",
+    defaults=("",),
+)
+
+
+def create_dms_tasks(profile, region, generate=True):
     """
     Reads all the json files and generates DMS tasks
+
+    :param generate: If False, the JSON files are not generated again (E.g., when
+                     "generate_json_files" has just been run in the same session)
+
+    :return: List of the ARNs of the tasks created
     """
 
-    session = boto3.Session(profile_name=profile, region_name=region)
-    dms = session.client("dms")
+    dms = get_client(profile, region, "dms")
 
     # Generate JSON file first
-    process_input_files()
+    if generate:
+        process_input_files()
 
-    arn_list = []
-    count = 0
+    json_files = sorted(
+        file for file in os.listdir(json_files_location) if file.endswith(".json")
+    )
 
-    # Create tasks using JSON files
-    for json_file in os.listdir(json_files_location):
-        count += 1
+    results = create_replication_tasks(dms, json_files)
 
-        file_handler = open(os.path.join(json_files_location, json_file), "r")
-        table_mapping = json.dumps((json.load(file_handler)))
-        file_handler.close()
+    arn_list = [result.task_arn for result in results if result.task_arn]
+    failures = [result for result in results if result.error]
 
-        task_id = json_file
+    write_task_creation_results(results)
 
-        current_time = (
-            datetime.now()
-            .strftime("%Y-%m-%d %H:%M")
-            .replace(" ", "-")
-            .replace(":", "-")
+    # Wait for the tasks to be in "READY" state
+    if arn_list:
+        wait_for_status_change(dms, "replication_task_ready", arn_list)
+
+    # Persist the ARNs in a file. Tasks that got created are persisted even if others
+    # have failed, so that they can be run or deleted later.
+    with open(task_arn_file, "w") as file_handle:
+        [file_handle.write("%s\n" % arn) for arn in arn_list]
+
+    print(f"{len(arn_list)} tasks have been created and ready")
+
+    if failures:
+        messages = [
+            [f"Error creating DMS task for file: {result.json_file} - {result.error}"]
+            for result in failures
+        ]
+        messages.append(
+            [
+                "NOTE: Are you sure you have the correct AWS profile? Check the '--profile' paramter."
+            ]
         )
+        messages.append(
+            [
+                "If no profile is passed, [default] profile will be used. It may not have permission to create a DMS task!!"
+            ]
+        )
+        print_messages(messages, [f"{len(failures)} Errors"])
+
+        sys.exit(1)
+
+    return arn_list
+
 
-        # Replace special chars, otherwise AWS will complain.
-        task_id = (
-            task_id.replace(".json", "").replace(
-                "_", "-").replace(".", "-").strip()
-            + "-"
-            + current_time
+def create_replication_tasks(
+    dms, json_files, workers=TASK_CREATION_WORKERS, location=json_files_location
+):
+    """
+    Creates a DMS task for each of the JSON files using a pool of worker threads.
+
+    boto3 clients are thread safe, so all the workers share the same DMS client. When
+    AWS throttles the calls, all the workers back off together (See AdaptiveBackoff).
+    The settings of each task are chosen by its predicted load (See settings_profiles.py).
+
+    :param dms: boto3 DMS client
+    :param json_files: List of JSON file names
+    :param workers: No of tasks to be created in parallel
+    :param location: Directory where the JSON files are stored
+
+    :return: List of TaskCreationResult, in the same order as the JSON files
+    """
+    current_time = task_id_suffix()
+    backoff = AdaptiveBackoff()
+    counter = itertools.count(1)
+    profiles = SettingsProfiles(
+        loads=read_task_loads(
+            os.path.join(location, os.path.basename(json_manifest_file))
         )
+    )
 
-        try:
-            response = dms.create_replication_task(
-                ReplicationTaskIdentifier=task_id,
-                SourceEndpointArn=source_endpoint_arn,
-                TargetEndpointArn=target_endpoint_arn,
-                ReplicationInstanceArn=replication_instance_arn,
-                MigrationType="full-load",
-                TableMappings=table_mapping,
-                ReplicationTaskSettings=task_settings,
-            )
+    def create_task(json_file):
+        result = create_replication_task(
+            dms, json_file, current_time, backoff, location, profiles
+        )
 
-            task_arn = response["ReplicationTask"]["ReplicationTaskArn"]
+        if result.error:
+            print(f"Error creating DMS task for file: {json_file}")
+        else:
+            print(
+                f"{next(counter)} - DMS task created for file: {json_file} "
+                f"(profile: {result.profile})"
+            )
 
-            print(f"{count} - DMS task created for file: {json_file}")
-            arn_list.append(task_arn)
+        return result
 
-        except Exception as err:
-            msg1 = f"Error creating DMS task for file: {json_file}"
-            msg2 = str(err)
-            msg3 = "NOTE: Are you sure you have the correct AWS profile? Check the '--profile' paramter."
-            msg4 = "If no profile is passed, [default] profile will be used. It may not have permission to create a DMS task!!"
-            print_messages([[msg1], [msg2], [msg3], [msg4]], ["Error"])
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(create_task, json_files))
 
-            sys.exit(1)
+    if backoff.throttle_count > 0:
+        print(f"AWS throttled {backoff.throttle_count} task creation calls.")
 
-    # Wait for the tasks to be in "READY" state
-    wait_for_status_change(dms, "replication_task_ready", arn_list)
+    return results
 
-    # Persist the ARNs in a file.
-    with open(task_arn_file, "w") as file_handle:
-        [file_handle.write("%s\n" % arn) for arn in arn_list]
 
-    print(f"{len(arn_list)} tasks have been created and ready")
+def task_id_suffix():
+    """
+    Returns the suffix added to the IDs of the tasks created now (E.g., 2021-01-31-10-15).
+    """
+    return (
+        datetime.now().strftime("%Y-%m-%d %H:%M").replace(" ", "-").replace(":", "-")
+    )
 
 
-def wait_for_status_change(dms, waiter_state, arn_list):
+def create_replication_task(
+    dms, json_file, current_time, backoff, location=json_files_location, profiles=None
+):
     """
-    Creates waiters for DMS.
+    Creates a DMS task for a JSON file.
+
+    :param current_time: Suffix of the task ID (See task_id_suffix)
+    :param backoff: AdaptiveBackoff shared by the calls made in parallel
+    :param profiles: SettingsProfiles shared by the tasks created in parallel
+
+    :return: TaskCreationResult
     """
-    waiter = dms.get_waiter(waiter_state)
+    start_time = time.perf_counter()
+    task_id = task_id_prefix(json_file) + "-" + current_time
+    profile = ""
 
-    waiter.wait(
-        Filters=[
-            {"Name": "replication-task-arn", "Values": arn_list},
-        ],
+    try:
+        # A file that can not be read fails its own task only, not the whole batch.
+        with open(os.path.join(location, json_file), "r") as file_handler:
+            data = json.load(file_handler)
+
+        table_mapping = json.dumps(data)
+        chosen = (profiles or SettingsProfiles()).choose(json_file, data)
+        profile = chosen.profile
+
+        response, attempts = call_with_backoff(
+            dms.create_replication_task,
+            backoff,
+            MAX_API_ATTEMPTS,
+            ReplicationTaskIdentifier=task_id,
+            SourceEndpointArn=source_endpoint_arn,
+            TargetEndpointArn=target_endpoint_arn,
+            ReplicationInstanceArn=replication_instance_arn,
+            MigrationType="full-load",
+            TableMappings=table_mapping,
+            ReplicationTaskSettings=chosen.settings,
+        )
+    except Exception as err:
+        return TaskCreationResult(
+            json_file=json_file,
+            task_id=task_id,
+            task_arn="",
+            error=str(err),
+            attempts=getattr(err, "attempts", 0),
+            elapsed=time.perf_counter() - start_time,
+            profile=profile,
+        )
+
+    return TaskCreationResult(
+        json_file=json_file,
+        task_id=task_id,
+        task_arn=response["ReplicationTask"]["ReplicationTaskArn"],
+        error="",
+        attempts=attempts,
+        elapsed=time.perf_counter() - start_time,
+        profile=chosen.profile,
     )
 
 
-def list_dms_tasks(profile, region, display_result=False):
+def write_task_creation_results(results):
+    """
+    Writes the outcome of each JSON file to a CSV file in "logs" directory.
+    """
+    current_time = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    result_file = os.path.join(logs_location, f"create_dms_tasks_{current_time}.csv")
+
+    with open(result_file, "w", newline="") as file_handle:
+        writer = csv.writer(file_handle)
+        writer.writerow(TaskCreationResult._fields)
+        writer.writerows(results)
+
+    print(f"Task creation results written to: {result_file}")
+
+
+def wait_for_status_change(dms, waiter_state, arn_list, **kwargs):
+    """
+    Waits for the DMS tasks to reach the state of the given boto3 waiter name (E.g.,
+    "replication_task_ready").
+
+    boto3 waiters are not used. They poll with a fixed delay, print nothing while waiting,
+    and some of them are buggy (https://github.com/boto/boto3/issues/1926). Tasks are
+    polled in batches instead (See task_poller.py). Tasks that fail or get stuck are
+    reported.
+
+    :param kwargs: Passed on to "poll_task_status"
+
+    :return: PollResult
+    """
+    result = poll_task_status(dms, arn_list, WAITER_STATES[waiter_state], **kwargs)
+
+    messages = [
+        [f"Task {arn} is in '{result.statuses[arn]}' state"] for arn in result.failed
+    ]
+    messages += [
+        [f"Task {arn} is stuck in '{result.statuses[arn]}' state"]
+        for arn in result.timed_out
+    ]
+
+    if messages:
+        print_messages(messages, [f"Tasks that did not reach {waiter_state}"])
+
+    return result
+
+
+# Fields that can be displayed when listing DMS tasks. Each field knows how to extract its
+# value from an entry returned by "describe_replication_tasks".
+TASK_FIELDS = {
+    "task_id": ("Task ID", lambda task: task["ReplicationTaskIdentifier"]),
+    "task_arn": ("Task ARN", lambda task: task["ReplicationTaskArn"]),
+    "status": ("Status", lambda task: task["Status"]),
+    "start_date": ("Start Date", lambda task: get_task_start_date(task)),
+    "error_message": ("Error Message", lambda task: task.get("LastFailureMessage", "")),
+    "progress": (
+        "Full Load %",
+        lambda task: task.get("ReplicationTaskStats", {}).get(
+            "FullLoadProgressPercent", ""
+        ),
+    ),
+    "migration_type": ("Migration Type", lambda task: task["MigrationType"]),
+    "replication_instance_arn": (
+        "Replication Instance ARN",
+        lambda task: task["ReplicationInstanceArn"],
+    ),
+    "table_mappings": ("Table Mappings", lambda task: task.get("TableMappings", "")),
+}
+
+DEFAULT_TASK_FIELDS = ["task_id", "task_arn", "status", "start_date", "error_message"]
+
+
+def get_task_start_date(task):
+    """
+    Returns the start date of a DMS task, or an empty string if it never started.
+    """
+    task_stats = task.get("ReplicationTaskStats", {})
+
+    if "StartDate" in task_stats:
+        return task_stats["StartDate"].strftime("%Y-%m-%d %H:%M")
+
+    return ""
+
+
+def iter_dms_tasks(dms, fields=None, filters=None):
     """
-    Prints the list of DMS tasks
+    Walks through all the pages of "describe_replication_tasks" and yields one row per
+    DMS task, as soon as each page arrives.
+
+    Only the requested fields are kept. Task settings & table mappings are large, so they
+    are not even requested from AWS unless the "table_mappings" field is asked for.
+
+    :param dms: boto3 DMS client
+    :param fields: List of keys from TASK_FIELDS. Defaults to DEFAULT_TASK_FIELDS
+    :param filters: "Filters" to be passed to the API. Defaults to the tasks using the
+                    source & target endpoints in config.py
+
+    :return: Generator of lists (One value per field)
+    """
+    fields = fields or DEFAULT_TASK_FIELDS
+    extractors = [TASK_FIELDS[field][1] for field in fields]
+
+    if filters is None:
+        filters = [
+            {
+                "Name": "endpoint-arn",
+                "Values": [
+                    source_endpoint_arn,
+                    target_endpoint_arn,
+                ],
+            }
+        ]
+
+    kwargs = {
+        "MaxRecords": MAX_TASKS_PER_PAGE,
+        "Filters": filters,
+        "WithoutSettings": "table_mappings" not in fields,
+    }
+
+    backoff = AdaptiveBackoff()
+
+    while True:
+        try:
+            response, _ = call_with_backoff(
+                dms.describe_replication_tasks, backoff, MAX_API_ATTEMPTS, **kwargs
+            )
+        except Exception as error:
+            # DMS raises this error, rather than returning an empty list, when no task
+            # matches the filters.
+            if get_error_code(error) == "ResourceNotFoundFault":
+                return
+            raise
+
+        for task in response["ReplicationTasks"]:
+            yield [extractor(task) for extractor in extractors]
+
+        if not response.get("Marker"):
+            break
+
+        kwargs["Marker"] = response["Marker"]
+
+
+def list_dms_tasks(
+    profile, region, display_result=False, fields=None, output="table"
+):
     """
-    session = boto3.Session(profile_name=profile, region_name=region)
-    dms = session.client("dms")
+    Lists the DMS tasks.
+
+    When "display_result" is True, tasks are printed in the "output" format (See
+    utils.print_rows). Large results are printed page by page as they arrive. Otherwise,
+    the list of tasks is returned.
+    """
+    dms = get_client(profile, region, "dms")
+
+    fields = fields or DEFAULT_TASK_FIELDS
+
+    for field in fields:
+        if field not in TASK_FIELDS:
+            msg1 = f"Unknown field: {field}"
+            msg2 = f"Valid fields are: {', '.join(TASK_FIELDS)}"
+            print_messages([[msg1], [msg2]], ["Error"])
+            sys.exit(1)
 
     try:
-        response = dms.describe_replication_tasks(
-            MaxRecords=MAX_TASKS_PER_PAGE,
-            Filters=[
-                {
-                    "Name": "endpoint-arn",
-                    "Values": [
-                        source_endpoint_arn,
-                        target_endpoint_arn,
-                    ],
-                }
-            ],
-        )
+        tasks = iter_dms_tasks(dms, fields=fields)
+
+        if display_result:
+            count = print_rows(
+                tasks,
+                [TASK_FIELDS[field][0] for field in fields],
+                output=output,
+                keys=fields,
+            )
+            print_info(f"{count} tasks found", output)
+            return
+
+        return list(tasks)
 
     except Exception as err:
         msg1 = "Error listing DMS tasks"
@@ -133,128 +415,182 @@ def list_dms_tasks(profile, region, display_result=False):
         print_messages([[msg1], [msg2], [msg3], [msg4]], ["Error"])
         sys.exit(1)
 
-    tasks = []
 
-    for task in response["ReplicationTasks"]:
-        err_msg = ""
-        start_date = ""
+def run_dms_tasks(
+    profile,
+    region,
+    wait=False,
+    task_arn_list=None,
+    max_running_tasks=None,
+    backpressure=False,
+):
+    """
+    Starts the DMS tasks.
 
-        if "LastFailureMessage" in task.keys():
-            err_msg = task["LastFailureMessage"]
+    Tasks must have been created before calling this function. It reads the
+    "task_arn_file" (unless "task_arn_list" is given) and starts the tasks.
+
+    A replication instance runs at most its budget of tasks at a time (MAX_RUNNING_TASKS in
+    config.py). If all the tasks fit in the budget, and "wait" is False, the tasks are
+    started at once and the function returns. Otherwise, the tasks are started in waves as
+    the running ones stop (See scheduler.py), until all of them have stopped (or failed),
+    and the notification carries the outcome of the run.
+
+    :param max_running_tasks: Overrides the budget of every replication instance. 0 means
+                              no limit.
+    :param backpressure: If True, starting tasks on an instance is paused while its metrics
+                         are past their thresholds (See backpressure.py). The tool then
+                         waits for the tasks to run, as they are started in waves.
+    """
+    dms = get_client(profile, region, "dms")
 
-        if "StartDate" in task["ReplicationTaskStats"].keys():
-            start_date = task["ReplicationTaskStats"]["StartDate"].strftime(
-                "%Y-%m-%d %H:%M"
-            )
+    # Read the task ARNs from "task_arn.txt" file and start the DMS tasks.
+    task_arn_list = read_task_arn_file(task_arn_list)
 
-        tasks.append(
-            [
-                task["ReplicationTaskIdentifier"],
-                task["ReplicationTaskArn"],
-                task["Status"],
-                start_date,
-                err_msg,
-            ]
-        )
-    if display_result:
-        print(
-            tabulate(
-                tasks,
-                headers=[
-                    "Task ID",
-                    "Task ARN",
-                    "Status",
-                    "Start Date",
-                    "Error Message",
-                ],
-                tablefmt="fancy_grid",
-            )
-        )
+    fits = fits_budget(len(task_arn_list), max_running_tasks)
+
+    if not wait and not backpressure and fits:
+        started, errors = start_replication_tasks(dms, task_arn_list)
+
+        if len(errors) > 0:
+            msg = f"{len(errors)} errors encountered while starting DMS tasks."
+        else:
+            msg = f"{len(started)} tasks have been started"
+
+        send_mail(profile, region, msg)
+        return
+
+    if not wait:
+        print("Tasks are started in waves. Waiting for all of them to run.")
+
+    tasks, not_found = describe_scheduled_tasks(
+        dms, task_arn_list, read_table_sizes(), read_task_priorities()
+    )
+
+    backoff = AdaptiveBackoff()
+    scheduler = WaveScheduler(
+        dms,
+        lambda task_arn: start_replication_task(dms, task_arn, backoff),
+        budget=max_running_tasks,
+        backpressure=(
+            Backpressure.from_cloudwatch(get_client(profile, region, "cloudwatch"), dms)
+            if backpressure
+            else None
+        ),
+    )
+    scheduler.run(tasks)
 
-    return tasks
+    scheduler.print_report()
+    scheduler.write_runs()
+    scheduler.record_history()
+
+    msg = scheduler.summary(not_found)
+    print(msg)
+
+    send_mail(profile, region, msg)
 
 
-def run_dms_tasks(profile, region):
+def start_replication_tasks(dms, task_arn_list, workers=TASK_START_WORKERS):
     """
-    Starts the DMS tasks.
+    Starts the given DMS tasks using a pool of worker threads.
 
-    Tasks must have been created before calling this function. It reads the
-    "task_arn_file" and starts the tasks.
+    :param dms: boto3 DMS client
+    :param task_arn_list: List of task ARNs
+    :param workers: No of tasks started in parallel
+
+    :return: (List of ARNs started, List of (ARN, error message) that could not be started)
     """
-    session = boto3.Session(profile_name=profile, region_name=region)
-    dms = session.client("dms")
+    backoff = AdaptiveBackoff()
 
-    count = 0
-    task_arn_list = []
+    def start_task(task_arn):
+        try:
+            start_replication_task(dms, task_arn, backoff)
+            print("Task: {} has been started".format(task_arn))
+            return task_arn, ""
+        except Exception as error:
+            print("Error starting task with ARN: {}".format(task_arn))
+            print(error)
+            return task_arn, str(error)
 
-    # Read the task ARNs from "task_arn.txt" file and start the DMS tasks.
-    with open(task_arn_file, "r") as arn_file:
-        for task_arn in arn_file:
-            task_arn = task_arn.strip("\n")
-            task_arn_list.append(task_arn)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(start_task, task_arn_list))
 
-            try:
-                response = dms.start_replication_task(
-                    ReplicationTaskArn=task_arn,
-                    StartReplicationTaskType="reload-target",
-                )
-                print("Task: {} has been started".format(task_arn))
-            except Exception as error:
-                count += 1
-                print("Error starting task with ARN: {}".format(task_arn))
-                print(error)
-
-    # Once all the tasks have been started, we wanted to wait for all of them
-    # to get completed. that's when their status change to 'replication_task_stopped'.
-    # However, there seems to be a bug with this waiter in boto3.
-    # https://github.com/boto/boto3/issues/1926
-    # wait_for_status_change('replication_task_stopped', arn_list)
-
-    # So, we are simply starting the tasks and return. we are NOT waiting for them
-    # to get completed.
-    if count > 0:
-        msg = f"{count} errors encountered while starting DMS tasks."
-    else:
-        msg = f"{len(task_arn_list)} tasks have been started"
+    started = [task_arn for task_arn, error in results if not error]
+    errors = [(task_arn, error) for task_arn, error in results if error]
 
-    send_mail(profile, region, msg)
+    return started, errors
 
 
-def delete_dms_tasks(profile, region):
+def start_replication_task(dms, task_arn, backoff):
     """
-    Delete DMS tasks. The tasks to be deleted come from "task_arn.txt" file.
+    Starts a DMS task, reloading the target tables.
     """
-    session = boto3.Session(profile_name=profile, region_name=region)
-    dms = session.client("dms")
+    call_with_backoff(
+        dms.start_replication_task,
+        backoff,
+        MAX_API_ATTEMPTS,
+        ReplicationTaskArn=task_arn,
+        StartReplicationTaskType="reload-target",
+    )
 
-    count = 0
-    arns_to_be_deleted = []
 
-    with open(task_arn_file, "r") as arn_file:
-        for arn in arn_file:
-            arn = arn.strip("\n")
-            arns_to_be_deleted.append(arn)
+def delete_dms_tasks(profile, region, task_arn_list=None):
+    """
+    Delete DMS tasks. The tasks to be deleted come from "task_arn.txt" file, unless
+    "task_arn_list" is given.
+    """
+    dms = get_client(profile, region, "dms")
 
-            try:
-                response = dms.delete_replication_task(ReplicationTaskArn=arn)
-                print("Task: {} deletion in progress...".format(arn))
-            except Exception as error:
-                count += 1
-                msg1 = "Error deleting task with ARN: {}".format(arn)
-                msg2 = str(error)
-                print_messages([[msg1], [msg2]], ["Error"])
+    arns_to_be_deleted = read_task_arn_file(task_arn_list)
+    deleted, errors = delete_replication_tasks(dms, arns_to_be_deleted)
 
-    if count > 0:
-        print(f"{count} errors encountered while deleting DMS tasks.")
+    if len(errors) > 0:
+        print(f"{len(errors)} errors encountered while deleting DMS tasks.")
     else:
-        wait_for_status_change(
-            dms, "replication_task_deleted", arns_to_be_deleted)
-        print(f"{len(arns_to_be_deleted)} tasks have been deleted!")
+        wait_for_status_change(dms, "replication_task_deleted", deleted)
+        print(f"{len(deleted)} tasks have been deleted!")
+
+
+def delete_replication_tasks(dms, task_arn_list, workers=TASK_DELETION_WORKERS):
+    """
+    Deletes the given DMS tasks using a pool of worker threads.
+
+    :param dms: boto3 DMS client
+    :param task_arn_list: List of task ARNs
+    :param workers: No of tasks deleted in parallel
+
+    :return: (List of ARNs being deleted, List of (ARN, error message) that could not be
+             deleted)
+    """
+    backoff = AdaptiveBackoff()
+
+    def delete_task(task_arn):
+        try:
+            call_with_backoff(
+                dms.delete_replication_task,
+                backoff,
+                MAX_API_ATTEMPTS,
+                ReplicationTaskArn=task_arn,
+            )
+            print("Task: {} deletion in progress...".format(task_arn))
+            return task_arn, ""
+        except Exception as error:
+            msg1 = "Error deleting task with ARN: {}".format(task_arn)
+            msg2 = str(error)
+            print_messages([[msg1], [msg2]], ["Error"])
+            return task_arn, str(error)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(delete_task, task_arn_list))
+
+    deleted = [task_arn for task_arn, error in results if not error]
+    errors = [(task_arn, error) for task_arn, error in results if error]
+
+    return deleted, errors
 
 
 def send_mail(profile, region, message):
-    session = boto3.Session(profile_name=profile, region_name=region)
-    sns = session.client("sns")
+    sns = get_client(profile, region, "sns")
 
     try:
         if len(sns_topic_arn) > 0:
@@ -271,8 +607,7 @@ def test_db_connection(profile, region):
     Tests the connection between the replication instance and the endpoint.
     """
     try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        dms = session.client("dms")
+        dms = get_client(profile, region, "dms")
 
         result = []
 
@@ -326,81 +661,154 @@ def test_db_connection(profile, region):
         sys.exit(1)
 
 
-def describe_table_statistics(profile, region):
+def describe_table_statistics(
+    profile,
+    region,
+    with_db_logs=False,
+    save_table_sizes=False,
+    output="table",
+    task_arn_list=None,
+):
     """
-    Describe Table Statistics
+    Describe Table Statistics of all the tasks in "task_arn_file" (or in "task_arn_list").
+
+    Statistics of the tasks are fetched in parallel and merged into a single result. Totals
+    by schema & by task are printed after the table level statistics.
+
+    With the "jsonl" & "csv" outputs, statistics of each task are printed as soon as they
+    arrive (not sorted across tasks), and the totals are left out.
+
+    If "save_table_sizes" is True, full load rows of each table are written to
+    "table_sizes_file", to be used when spreading tables over tasks (See planner.py).
     """
     try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        dms = session.client("dms")
+        dms = get_client(profile, region, "dms")
 
-        result = []
+        task_arn_list = read_task_arn_file(task_arn_list)
 
-        with open(task_arn_file, "r") as arn_file:
-            for task_arn in arn_file:
-                task_arn = task_arn.strip("\n")
+        if output == "table":
+            result = fetch_table_statistics(dms, task_arn_list)
+            print_rows(result.rows(), HEADERS)
+        else:
+            result = TableStatistics()
 
-            response = dms.describe_table_statistics(
-                ReplicationTaskArn=task_arn,
-                MaxRecords=123,
-                # Marker='string',
-                # Filters=[
-                #     {
-                #         'Name': 'string',
-                #         'Values': [
-                #             'string',
-                #         ]
-                #     },
-                # ]
-            )
+            def rows():
+                for statistics in iter_table_statistics(dms, task_arn_list):
+                    result.extend(statistics)
+                    yield from statistics.rows()
 
-            for table_statistics in response["TableStatistics"]:
-                result.append(
-                    [
-                        task_arn.split(":")[-1],
-                        table_statistics["SchemaName"],
-                        table_statistics["TableName"],
-                        table_statistics["TableState"],
-                        table_statistics["Inserts"],
-                        table_statistics["Updates"],
-                        table_statistics["Deletes"],
-                        table_statistics["FullLoadRows"],
-                        table_statistics["FullLoadErrorRows"],
-                        table_statistics["FullLoadStartTime"].strftime(
-                            "%Y-%m-%d %H:%M"
-                        ),
-                        table_statistics["FullLoadEndTime"].strftime(
-                            "%Y-%m-%d %H:%M"),
-                    ]
-                )
+            print_rows(rows(), HEADERS, output=output, keys=[c for c, _ in COLUMNS])
 
-        result.sort(key=lambda x: x[1] + x[2])
-
-        header = [
-            "Task ARN",
-            "Schema",
-            "Table",
-            "State",
-            "Inserts",
-            "Updates",
-            "Deletes",
-            "Full Load Rows",
-            "Full Load Error Rows",
-            "Full Load Start Time",
-            "Full Load End Time",
-        ]
-        print(tabulate(result, headers=header, tablefmt="fancy_grid"))
+        if save_table_sizes:
+            write_table_sizes(result.table_sizes())
+
+        if output != "table":
+            return
+
+        for by in ("schema", "task_id"):
+            print(
+                tabulate(
+                    result.rollup(by),
+                    headers=ROLLUP_HEADERS[by],
+                    tablefmt="fancy_grid",
+                )
+            )
 
     except Exception as error:
         print("** Something went wrong while describing table statistics. **")
         print(error)
 
+    if not with_db_logs:
+        return
+
     # Fetch Source & Target DB Logs
-    print("\n")
-    print("*" * 120)
-    print("Source & Target DB latest DB logs")
-    print("*" * 120)
-    describe_db_log_files(profile, region)
+    print_info("\n", output)
+    print_info("*" * 120, output)
+    print_info("Source & Target DB latest DB logs", output)
+    print_info("*" * 120, output)
+    describe_db_log_files(profile, region, output=output)
+
+
+def fetch_table_statistics(dms, task_arn_list, workers=TABLE_STATISTICS_WORKERS):
+    """
+    Fetches the table statistics of the given tasks, following "Marker" until all the
+    pages of each task have been read. Tasks are queried in parallel.
+
+    :param dms: boto3 DMS client
+    :param task_arn_list: List of task ARNs
+    :param workers: No of tasks queried in parallel
+
+    :return: TableStatistics object holding the statistics of all the tasks
+    """
+    result = TableStatistics()
+
+    for statistics in iter_table_statistics(dms, task_arn_list, workers):
+        result.extend(statistics)
+
+    return result
+
+
+def iter_table_statistics(dms, task_arn_list, workers=TABLE_STATISTICS_WORKERS):
+    """
+    Same as "fetch_table_statistics", but yields a TableStatistics object per task, in
+    the order the tasks complete.
+    """
+    backoff = AdaptiveBackoff()
+
+    def fetch(task_arn):
+        try:
+            return get_task_table_statistics(dms, task_arn, backoff)
+        except Exception as error:
+            msg1 = f"Error describing table statistics of task: {task_arn}"
+            msg2 = str(error)
+            print_messages([[msg1], [msg2]], ["Error"])
+
+        return TableStatistics()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(fetch, task_arn) for task_arn in task_arn_list]
+
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def get_task_table_statistics(dms, task_arn, backoff):
+    """
+    Fetches the table statistics of a task, following "Marker" until all the pages have
+    been read.
+
+    :return: TableStatistics object
+    """
+    statistics = TableStatistics()
+    kwargs = {
+        "ReplicationTaskArn": task_arn,
+        "MaxRecords": MAX_TABLE_STATISTICS_PER_PAGE,
+    }
+
+    while True:
+        response, _ = call_with_backoff(
+            dms.describe_table_statistics, backoff, MAX_API_ATTEMPTS, **kwargs
+        )
+
+        for table_statistics in response["TableStatistics"]:
+            statistics.append(task_arn, table_statistics)
+
+        if not response.get("Marker"):
+            return statistics
+
+        kwargs["Marker"] = response["Marker"]
+
+
+def read_task_arn_file(task_arn_list=None):
+    """
+    Returns the task ARNs stored in "task_arn_file". If "task_arn_list" is given (E.g.,
+    the ARNs of the tasks created earlier in the same session), it is returned instead.
+    """
+    if task_arn_list is not None:
+        return list(task_arn_list)
+
+    with open(task_arn_file, "r") as arn_file:
+        return [line.strip() for line in arn_file if line.strip()]
 
 
 def create_iam_role_for_dms_cloudwatch_logs(profile, region):
@@ -415,8 +823,7 @@ def create_iam_role_for_dms_cloudwatch_logs(profile, region):
     https://aws.amazon.com/premiumsupport/knowledge-center/dms-cloudwatch-logs-not-appearing
     """
     try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        iam = session.client("iam")
+        iam = get_client(profile, region, "iam")
 
         response = iam.create_role(
             RoleName="dms-cloudwatch-logs-role",
@@ -447,114 +854,260 @@ def create_iam_role_for_dms_cloudwatch_logs(profile, region):
         print(error)
 
 
-def fetch_cloudwatch_logs_for_a_task(profile, region, task_arn):
+def fetch_cloudwatch_logs_for_a_task(
+    profile,
+    region,
+    task_arn,
+    start_time=None,
+    end_time=None,
+    filter_pattern=None,
+    follow=False,
+    output="table",
+):
     """
     Fetch CloudWatch Logs for a Task
 
     Input:
         Task ARN
+        start_time, end_time - Time window ("YYYY-MM-DD HH:MM", or relative like 30m, 2h, 1d)
+        filter_pattern       - CloudWatch Logs filter pattern (E.g., "?ERROR ?WARN")
+        follow               - Keep printing new log events as they arrive (Ctrl+C to stop)
+        output               - table, jsonl or csv (See utils.print_rows)
     """
     try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        dms = session.client("dms")
-        cloudwatch = session.client("logs")
+        start_time = parse_time(start_time)
+        end_time = parse_time(end_time)
+    except ValueError as error:
+        print_messages([[str(error)]], ["Error"])
+        sys.exit(1)
 
-        response = dms.describe_replication_tasks(
-            Filters=[
-                {
-                    "Name": "replication-task-arn",
-                    "Values": [
-                        task_arn,
-                    ],
-                }
-            ]
-        )
+    try:
+        dms = get_client(profile, region, "dms")
+        cloudwatch = get_client(profile, region, "logs")
 
-        replication_task = response["ReplicationTasks"][0]
+        cloudwatch_log_group, cloudwatch_log_stream = get_task_log_location(
+            dms, task_arn
+        )
 
-        cloudwatch_log_group = json.loads(replication_task["ReplicationTaskSettings"])[
-            "Logging"
-        ]["CloudWatchLogGroup"]
-        cloudwatch_log_stream = json.loads(replication_task["ReplicationTaskSettings"])[
-            "Logging"
-        ]["CloudWatchLogStream"]
+        print_info(f"Log Group : {cloudwatch_log_group}", output)
+        print_info(f"Log Stream: {cloudwatch_log_stream}", output)
 
-        response = cloudwatch.filter_log_events(
-            logGroupName=cloudwatch_log_group,
-            logStreamNames=[
+        if follow:
+            follow_cloudwatch_logs(
+                cloudwatch,
+                cloudwatch_log_group,
                 cloudwatch_log_stream,
-            ],
-            # logStreamNamePrefix='string',
-            # startTime=123,
-            # endTime=123,
-            # filterPattern='string',
-            # nextToken='string',
-            # limit=123,
-            # interleaved=True|False
+                task_arn,
+                start_time,
+                filter_pattern,
+                output,
+            )
+            return
+
+        events = iter_log_events(
+            cloudwatch,
+            cloudwatch_log_group,
+            cloudwatch_log_stream,
+            start_time=start_time,
+            end_time=end_time,
+            filter_pattern=filter_pattern,
         )
 
-        print(f"Log Group : {cloudwatch_log_group}")
-        print(f"Log Stream: {cloudwatch_log_stream}")
+        print_rows(
+            log_event_rows(events),
+            LOG_EVENT_HEADERS,
+            output=output,
+            keys=LOG_EVENT_KEYS,
+        )
 
-        result = []
+    except Exception as error:
+        print("** Something went wrong while fetching CloudWatch Logs for a Task. **")
+        print(error)
 
-        for line, event in enumerate(response["events"]):
-            result.append(
-                [
-                    line,
-                    event["message"][0:16],
-                    event["message"].split("]")[1][0],
-                    re.search(r"\[.*\]", event["message"][0:50]).group(0),
-                    "\n".join(
-                        textwrap.wrap(
-                            event["message"][49:], width=150, replace_whitespace=False
-                        )
-                    ),
-                ]
+
+LOG_EVENT_HEADERS = ["line", "Timestamp", "Message Type", "Source", "Message"]
+LOG_EVENT_KEYS = ["line", "timestamp", "severity", "component", "message"]
+
+
+def log_event_rows(events):
+    for line, event in enumerate(events):
+        log_line = parse_log_event(event)
+
+        yield [
+            line,
+            log_line.timestamp,
+            log_line.severity,
+            log_line.component,
+            log_line.message,
+        ]
+
+
+def follow_cloudwatch_logs(
+    cloudwatch,
+    log_group,
+    log_stream,
+    task_arn,
+    start_time,
+    filter_pattern,
+    output="table",
+):
+    """
+    Prints new log events of a task as they arrive, one line per event, until Ctrl+C.
+    Reading carries on from where the previous "--follow" of the same task (and filter
+    pattern) stopped, unless a start time is given.
+    """
+    checkpoint = LogCheckpoint(task_arn, filter_pattern)
+
+    if checkpoint.timestamp is not None and start_time is None:
+        print_info(
+            f"Continuing from: {format_epoch_millis(checkpoint.timestamp)}", output
+        )
+
+    print_info("Waiting for new log events. Press Ctrl+C to stop.", output)
+
+    events = follow_log_events(
+        cloudwatch,
+        log_group,
+        log_stream,
+        checkpoint,
+        start_time=start_time,
+        filter_pattern=filter_pattern,
+    )
+
+    try:
+        if output == "table":
+            for event in events:
+                log_line = parse_log_event(event)
+                print(
+                    f"{log_line.timestamp} {log_line.severity} [{log_line.component}] {log_line.message}",
+                    flush=True,
+                )
+        else:
+            print_rows(
+                log_event_rows(events),
+                LOG_EVENT_HEADERS,
+                output=output,
+                keys=LOG_EVENT_KEYS,
+                flush=True,
             )
+    except KeyboardInterrupt:
+        if checkpoint.timestamp is not None:
+            checkpoint.save()
+
+        print_info(f"\nStopped. Checkpoint saved to: {checkpoint.file_name}", output)
+
+
+def format_epoch_millis(value):
+    return datetime.fromtimestamp(value / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def sync_task_logs(profile, region, task_arn=None, task_arn_list=None):
+    """
+    Copies the CloudWatch log events of the tasks in "task_arn_file" (or in
+    "task_arn_list", or of a single task) to the local log store, to be searched with
+    "search_task_logs".
+
+    Only the events after the last one already stored are fetched. Tasks are fetched in
+    parallel, and stored as each one completes.
+    """
+    try:
+        dms = get_client(profile, region, "dms")
+        cloudwatch = get_client(profile, region, "logs")
+
+        task_arn_list = [task_arn] if task_arn else read_task_arn_file(task_arn_list)
+        locations = get_task_log_locations(dms, task_arn_list)
+
+        for arn in task_arn_list:
+            if arn not in locations:
+                print(f"No CloudWatch logs found for task: {arn}")
+
+        store = LogStore()
+        start_times = {
+            arn: store.get_last_event_time(arn.split(":")[-1]) for arn in locations
+        }
+        backoff = AdaptiveBackoff()
+
+        def fetch(arn):
+            log_group, log_stream = locations[arn]
+
+            try:
+                events = iter_log_events(
+                    cloudwatch,
+                    log_group,
+                    log_stream,
+                    start_time=start_times[arn],
+                    backoff=backoff,
+                )
+                return arn, [parse_log_event(event) for event in events], None
+            except Exception as error:
+                return arn, [], error
+
+        started = time.perf_counter()
+        total = 0
 
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, LOG_SYNC_WORKERS)) as executor:
+                for arn, log_lines, error in executor.map(fetch, locations):
+                    if error is not None:
+                        msg1 = f"Error fetching CloudWatch logs of task: {arn}"
+                        print_messages([[msg1], [str(error)]], ["Error"])
+                        continue
+
+                    task_id = arn.split(":")[-1]
+                    added = store.add_events(task_id, *locations[arn], log_lines)
+                    total += added
+                    print(f"{task_id}: {added} new log events")
+        finally:
+            store.close()
+
+        elapsed = time.perf_counter() - started
         print(
-            tabulate(
-                result,
-                headers=[
-                    "line",
-                    "Timestamp",
-                    "Message Type",
-                    "Source",
-                    "Message",
-                ],
-                tablefmt="fancy_grid",
-            )
+            f"{total} new log events of {len(locations)} tasks stored in {log_store_file} "
+            f"({elapsed:.1f} seconds)"
         )
 
-        # print(json.dumps(response, indent = 4, sort_keys=True, default=str))
-
     except Exception as error:
-        print("** Something went wrong while fetching CloudWatch Logs for a Task. **")
+        print("** Something went wrong while syncing CloudWatch Logs of the tasks. **")
         print(error)
 
 
-def describe_endpoints(profile, region, print_result=False):
-    """ """
-    try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        dms = session.client("dms")
+def get_endpoints(profile, region):
+    """
+    Returns the descriptions of the Source & Target endpoints. They are fetched once per
+    profile & region, and reused by later calls (E.g., in a session, See app.py).
+    """
+    key = (profile, region)
+
+    with _endpoints_lock:
+        if key not in _endpoints:
+            dms = get_client(profile, region, "dms")
+
+            response = dms.describe_endpoints(
+                Filters=[
+                    {
+                        "Name": "endpoint-arn",
+                        "Values": [
+                            source_endpoint_arn,
+                            target_endpoint_arn,
+                        ],
+                    },
+                ],
+            )
 
-        result = []
+            _endpoints[key] = response["Endpoints"]
 
-        response = dms.describe_endpoints(
-            Filters=[
-                {
-                    "Name": "endpoint-arn",
-                    "Values": [
-                        source_endpoint_arn,
-                        target_endpoint_arn,
-                    ],
-                },
-            ],
-        )
+        return _endpoints[key]
+
+
+def describe_endpoints(profile, region, print_result=False, output="table"):
+    """
+    Describes the Source & Target endpoints. If "print_result" is True, they are printed
+    in the "output" format (See utils.print_rows).
+    """
+    try:
+        result = []
 
-        for db_endpoint in response["Endpoints"]:
+        for db_endpoint in get_endpoints(profile, region):
             extra_connection_attributes = ""
 
             if "ExtraConnectionAttributes" in db_endpoint.keys():
@@ -574,21 +1127,29 @@ def describe_endpoints(profile, region, print_result=False):
             )
 
         if print_result:
-            print(
-                tabulate(
-                    result,
-                    headers=[
-                        "Endpoint_ID",
-                        "Type",
-                        "Database",
-                        "Server",
-                        "DB",
-                        "Port",
-                        "User",
-                        "Extra Attributes",
-                    ],
-                    tablefmt="fancy_grid",
-                )
+            print_rows(
+                result,
+                [
+                    "Endpoint_ID",
+                    "Type",
+                    "Database",
+                    "Server",
+                    "DB",
+                    "Port",
+                    "User",
+                    "Extra Attributes",
+                ],
+                output=output,
+                keys=[
+                    "endpoint_id",
+                    "type",
+                    "engine",
+                    "server",
+                    "database",
+                    "port",
+                    "user",
+                    "extra_attributes",
+                ],
             )
 
         return result
@@ -602,60 +1163,148 @@ def describe_endpoints(profile, region, print_result=False):
         sys.exit(1)
 
 
-def describe_db_log_files(profile, region):
+# SQLAlchemy dialect of each DMS engine (See validate_data)
+DB_URL_DIALECTS = {
+    "oracle": "oracle+cx_oracle",
+    "postgres": "postgresql+psycopg2",
+    "aurora-postgresql": "postgresql+psycopg2",
+    "mysql": "mysql+pymysql",
+    "mariadb": "mysql+pymysql",
+    "aurora": "mysql+pymysql",
+}
+
+
+def get_db_passwords(profile, region):
+    """
+    Returns the passwords of the Source & Target DBs, from config.py, or else from AWS
+    Secrets Manager.
+    """
+    if SOURCE_DB_PWD and TARGET_DB_PWD:
+        return SOURCE_DB_PWD, TARGET_DB_PWD
+
+    if not SECRET_MANAGER_SECRET_NAME:
+        print_messages(
+            [
+                ["No DB passwords found."],
+                ["Set SOURCE_DB_PWD & TARGET_DB_PWD, or SECRET_MANAGER_SECRET_NAME in config.py"],
+            ],
+            ["Error"],
+        )
+        sys.exit(1)
+
+    secrets = get_client(profile, region, "secretsmanager")
+    response = secrets.get_secret_value(SecretId=SECRET_MANAGER_SECRET_NAME)
+    secret = json.loads(response["SecretString"])
+
+    return (
+        SOURCE_DB_PWD or secret[SOURCE_DB_SECRET_KEY],
+        TARGET_DB_PWD or secret[TARGET_DB_SECRET_KEY],
+    )
+
+
+def get_db_urls(profile, region, source_url=None, target_url=None):
+    """
+    Returns the URLs of the Source & Target DBs (See data_validator.py), built from the
+    DMS endpoints. A URL that is given is returned as is.
+    """
+    urls = {"SOURCE": source_url, "TARGET": target_url}
+    passwords = dict(zip(("SOURCE", "TARGET"), get_db_passwords(profile, region)))
+
+    for endpoint in get_endpoints(profile, region):
+        endpoint_type = endpoint["EndpointType"].upper()
+
+        if urls.get(endpoint_type):
+            continue
+
+        dialect = DB_URL_DIALECTS.get(endpoint["EngineName"])
+
+        if dialect is None:
+            print_messages(
+                [[f"Data validation does not support {endpoint['EngineName']} DBs"]],
+                ["Error"],
+            )
+            sys.exit(1)
+
+        credentials = "{}:{}@{}:{}".format(
+            quote_plus(endpoint["Username"]),
+            quote_plus(passwords[endpoint_type]),
+            endpoint["ServerName"],
+            endpoint["Port"],
+        )
+
+        if dialect.startswith("oracle"):
+            urls[endpoint_type] = (
+                f"{dialect}://{credentials}/?service_name={endpoint['DatabaseName']}"
+            )
+        else:
+            urls[endpoint_type] = (
+                f"{dialect}://{credentials}/{endpoint.get('DatabaseName', '')}"
+            )
+
+    return urls["SOURCE"], urls["TARGET"]
+
+
+def describe_db_log_files(
+    profile, region, tail_lines=DB_LOG_TAIL_LINES, output="table"
+):
     """
     Get DB Logs
 
+    The latest DB_LOG_FILE_COUNT log files of the Source & Target DBs are downloaded in
+    full to "db_logs_location" (See db_logs.py), and the last "tail_lines" lines of each
+    file are printed in the "output" format (See utils.print_rows).
+
     Input:
         Profile
         Region
     """
     try:
-        session = boto3.Session(profile_name=profile, region_name=region)
-        rds = session.client("rds")
-
-        def fetch_log_file(db_id):
-            result = []
+        rds = get_client(profile, region, "rds")
 
-            try:
-                response = rds.describe_db_log_files(
-                    DBInstanceIdentifier=db_id,
-                )
+        results = download_db_log_files(
+            rds, [SOURCE_DB_ID, TARGET_DB_ID], DB_LOG_FILE_COUNT
+        )
 
-                for log_file in response["DescribeDBLogFiles"][
-                    : -1 - 1 * DB_LOG_FILE_COUNT: -1
-                ]:
-                    resp = rds.download_db_log_file_portion(
-                        DBInstanceIdentifier=db_id,
-                        LogFileName=log_file["LogFileName"],
-                    )
+        tails = []
 
-                    for line in resp["LogFileData"].split("\n"):
-                        result.append(
-                            [
-                                db_id,
-                                log_file["LogFileName"],
-                                "\n".join(
-                                    textwrap.wrap(
-                                        line, width=150, replace_whitespace=False
-                                    ),
-                                ),
-                            ],
-                        )
-            except Exception as error:
+        for db_log_file in results:
+            if db_log_file.error is not None and not db_log_file.log_file_name:
                 print(
-                    f"** Something went wrong while fetching DB Logs for DB Instance: {db_id} **"
+                    f"** Something went wrong while fetching DB Logs for DB Instance: {db_log_file.db_id} **"
                 )
                 print("IS THE DB INSTANCE NAME CORRECT??")
-                print(error)
+                print(db_log_file.error)
+                continue
 
-            return result
+            if db_log_file.error is not None:
+                msg1 = f"Download of {db_log_file.log_file_name} ({db_log_file.db_id}) stopped. Run again to resume."
+                print_messages([[msg1], [str(db_log_file.error)]], ["Error"])
 
-        logs = fetch_log_file(SOURCE_DB_ID)
-        print(tabulate(logs, headers=["DB_ID", "Logs"], tablefmt="fancy_grid"))
+            print_info(
+                f"{db_log_file.local_file}: {db_log_file.bytes_downloaded} new bytes downloaded",
+                output,
+            )
 
-        logs = fetch_log_file(TARGET_DB_ID)
-        print(tabulate(logs, headers=["DB_ID", "Logs"], tablefmt="fancy_grid"))
+            lines = tail_file(db_log_file.local_file, tail_lines)
+
+            if output == "table":
+                if lines:
+                    print_rows(
+                        [[db_log_file.db_id, line] for line in lines], ["DB_ID", "Logs"]
+                    )
+            else:
+                tails.extend(
+                    [db_log_file.db_id, db_log_file.log_file_name, line]
+                    for line in lines
+                )
+
+        if output != "table":
+            print_rows(
+                tails,
+                ["DB_ID", "Log File", "Logs"],
+                output=output,
+                keys=["db_id", "log_file", "line"],
+            )
 
     except Exception as error:
         print("** Something went wrong while getting DB Logs. **")
@@ -666,16 +1315,17 @@ def delete_all_dms_tasks(profile, region):
     """
     Delete all DMS tasks
     """
-    dms_tasks = list_dms_tasks(profile, region)
+    # Only the ARNs are needed. They are collected before deleting anything, so that the
+    # deletions do not shift the pages being walked through.
+    dms_tasks = list_dms_tasks(profile, region, fields=["task_arn"])
 
-    session = boto3.Session(profile_name=profile, region_name=region)
-    dms = session.client("dms")
+    dms = get_client(profile, region, "dms")
 
     count = 0
     arns_to_be_deleted = []
 
     for task in dms_tasks:
-        arn = task[1].strip("\n")
+        arn = task[0].strip("\n")
         arns_to_be_deleted.append(arn)
 
         try:
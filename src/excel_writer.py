@@ -0,0 +1,111 @@
+import os
+
+# ------------------------------------------------------------------------------------------------#
+# Writes reports to Excel files, a row at a time                                                  #
+# ------------------------------------------------------------------------------------------------#
+# The workbook is opened in openpyxl's write-only mode: each row is written to the file as soon as
+# it is appended, so memory use does not grow with the size of the report. Cells are formatted
+# with named styles, which are registered in the workbook once and shared by all the cells,
+# rather than creating a Border object for every cell.
+#
+# openpyxl is imported when a report is created, as it is slow to import and only this module
+# needs it.
+
+# Name of the style, and its settings
+STYLES = {
+    "cell": {"border": "thin"},
+    "header": {"border": "thin", "bold": True, "fill": "DDEBF7"},
+    "mismatch": {"border": "thin", "fill": "FFC7CE"},
+}
+
+
+class ExcelReport:
+    """
+    An Excel file with one or more sheets, written row by row.
+
+        report = ExcelReport(file_name)
+        report.add_sheet("summary", headers, rows)
+        report.add_sheet("details", headers, rows, row_style=lambda row: "cell")
+        report.save()
+
+    Sheets are written in the order they are added. Rows of a sheet can be a generator, and
+    are not kept in memory.
+    """
+
+    def __init__(self, file_name):
+        import openpyxl
+
+        self.file_name = file_name
+        self.workbook = openpyxl.Workbook(write_only=True)
+
+        for name, settings in STYLES.items():
+            self.workbook.add_named_style(build_named_style(name, settings))
+
+    def add_sheet(self, title, headers, rows, row_style=None, tab_color=None):
+        """
+        Writes a sheet.
+
+        :param title: Name of the sheet
+        :param headers: List of strings, written as the first row
+        :param rows: Iterable of lists
+        :param row_style: Function that takes a row, and returns the name of the style of its
+                          cells (One of STYLES), or None for no style. Defaults to "cell".
+        :param tab_color: Color of the sheet's tab (E.g., "1072BA")
+
+        :return: No of rows written, not counting the headers
+        """
+        from openpyxl.cell import WriteOnlyCell
+
+        sheet = self.workbook.create_sheet(title)
+
+        if tab_color:
+            sheet.sheet_properties.tabColor = tab_color
+
+        def styled(values, style):
+            if style is None:
+                return values
+
+            cells = []
+
+            for value in values:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.style = style
+                cells.append(cell)
+
+            return cells
+
+        sheet.append(styled(headers, "header"))
+
+        count = 0
+
+        for count, row in enumerate(rows, start=1):
+            style = row_style(row) if row_style else "cell"
+            sheet.append(styled(row, style))
+
+        return count
+
+    def save(self):
+        directory = os.path.dirname(self.file_name)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.workbook.save(self.file_name)
+
+
+def build_named_style(name, settings):
+    from openpyxl.styles import Border, Font, NamedStyle, PatternFill, Side
+
+    style = NamedStyle(name=name)
+
+    if "border" in settings:
+        side = Side(style=settings["border"])
+        style.border = Border(left=side, right=side, top=side, bottom=side)
+
+    if settings.get("bold"):
+        style.font = Font(bold=True)
+
+    if "fill" in settings:
+        style.fill = PatternFill("solid", start_color=settings["fill"])
+
+    return style
@@ -0,0 +1,423 @@
+import itertools
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+
+class LocalDMSClient:
+    """
+    A local stand-in for the boto3 DMS client.
+
+    It is used by the benchmarks to drive the orchestration code without an AWS account.
+    Each API call sleeps for "latency" seconds to simulate the round trip to AWS, and
+    the client raises ThrottlingException once more than "max_concurrent_calls" calls
+    are in flight, similar to what DMS does when it is called too aggressively.
+
+    Tasks move through their states (creating -> ready, starting -> running,
+    deleting -> deleted) after "transition_delay" seconds, the same way DMS does it in
+    the background. A running task stops after "run_duration" seconds, which can also be
+    a function that takes the task and returns the seconds. "failure_rate" is the share
+    of runs that end up "failed" instead of "stopped".
+
+    "instance_capacity" is the no of tasks a replication instance runs at full speed. A task
+    started while the instance is busier than that runs longer, by the square of the
+    overload, as the tasks compete for CPU & memory. The run duration is fixed when the
+    task starts.
+    """
+
+    def __init__(
+        self,
+        latency=0.05,
+        max_concurrent_calls=None,
+        transition_delay=0.0,
+        run_duration=0.0,
+        failure_rate=0.0,
+        instance_capacity=None,
+        seed=0,
+    ):
+        self.latency = latency
+        self.max_concurrent_calls = max_concurrent_calls
+        self.transition_delay = transition_delay
+        self.run_duration = run_duration
+        self.failure_rate = failure_rate
+        self.instance_capacity = instance_capacity
+        self.random = random.Random(seed)
+        self.tasks = {}
+        # Pending state changes of each task: List of (time, new status)
+        self.schedule = {}
+        self.call_count = 0
+        self.throttle_count = 0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def _call(self, operation_name):
+        with self.lock:
+            self.call_count += 1
+
+            if (
+                self.max_concurrent_calls is not None
+                and self.in_flight >= self.max_concurrent_calls
+            ):
+                self.throttle_count += 1
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": "ThrottlingException",
+                            "Message": "Rate exceeded",
+                        }
+                    },
+                    operation_name,
+                )
+
+            self.in_flight += 1
+
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def create_replication_task(self, **kwargs):
+        self._call("CreateReplicationTask")
+
+        task_arn = f"arn:aws:dms:local:000000000000:task:TASK{next(self.ids):08d}"
+
+        task = {
+            "ReplicationTaskIdentifier": kwargs["ReplicationTaskIdentifier"],
+            "ReplicationTaskArn": task_arn,
+            "SourceEndpointArn": kwargs["SourceEndpointArn"],
+            "TargetEndpointArn": kwargs["TargetEndpointArn"],
+            "ReplicationInstanceArn": kwargs["ReplicationInstanceArn"],
+            "MigrationType": kwargs["MigrationType"],
+            "TableMappings": kwargs["TableMappings"],
+            "ReplicationTaskSettings": kwargs["ReplicationTaskSettings"],
+            "Status": "creating",
+            "ReplicationTaskStats": {},
+        }
+
+        with self.lock:
+            self.tasks[task_arn] = task
+            self.schedule[task_arn] = [
+                (time.monotonic() + self.transition_delay, "ready")
+            ]
+            self._refresh(task_arn)
+
+        return {"ReplicationTask": dict(task)}
+
+    def start_replication_task(self, **kwargs):
+        self._call("StartReplicationTask")
+        task_arn = kwargs["ReplicationTaskArn"]
+
+        with self.lock:
+            self._refresh(task_arn)
+            task = self.tasks.get(task_arn)
+
+            if task is None or task["Status"] not in ("ready", "stopped", "failed"):
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": "InvalidResourceStateFault",
+                            "Message": f"Task {task_arn} can not be started",
+                        }
+                    },
+                    "StartReplicationTask",
+                )
+
+            run_duration = self.run_duration
+            if callable(run_duration):
+                run_duration = run_duration(task)
+
+            if self.instance_capacity:
+                running = 1 + self._running_on(task["ReplicationInstanceArn"])
+                run_duration *= max(1.0, running / self.instance_capacity) ** 2
+
+            outcome = (
+                "failed" if self.random.random() < self.failure_rate else "stopped"
+            )
+            running_at = time.monotonic() + self.transition_delay
+
+            task["Status"] = "starting"
+            task["ReplicationTaskStats"] = {"FullLoadProgressPercent": 0}
+            self.schedule[task_arn] = [
+                (running_at, "running"),
+                (running_at + run_duration, outcome),
+            ]
+            self._refresh(task_arn)
+
+            return {"ReplicationTask": dict(task)}
+
+    def delete_replication_task(self, **kwargs):
+        self._call("DeleteReplicationTask")
+        task_arn = kwargs["ReplicationTaskArn"]
+
+        with self.lock:
+            self._refresh(task_arn)
+
+            if task_arn not in self.tasks:
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": "ResourceNotFoundFault",
+                            "Message": f"Task {task_arn} not found",
+                        }
+                    },
+                    "DeleteReplicationTask",
+                )
+
+            self.tasks[task_arn]["Status"] = "deleting"
+            self.schedule[task_arn] = [(time.monotonic() + self.transition_delay, None)]
+            self._refresh(task_arn)
+
+        return {
+            "ReplicationTask": {"ReplicationTaskArn": task_arn, "Status": "deleting"}
+        }
+
+    def _running_on(self, instance_arn):
+        """
+        Returns the no of tasks starting or running on the replication instance.
+        """
+        for task_arn in list(self.tasks):
+            self._refresh(task_arn)
+
+        return sum(
+            1
+            for task in self.tasks.values()
+            if task["ReplicationInstanceArn"] == instance_arn
+            and task["Status"] in ("starting", "running")
+        )
+
+    def running_on(self, instance_arn):
+        with self.lock:
+            return self._running_on(instance_arn)
+
+    def describe_replication_instances(self, **kwargs):
+        self._call("DescribeReplicationInstances")
+
+        arns = []
+
+        for instance_filter in kwargs.get("Filters", []):
+            if instance_filter["Name"] == "replication-instance-arn":
+                arns.extend(instance_filter["Values"])
+
+        # The identifier is the last part of the ARN, the way the local tasks name it.
+        return {
+            "ReplicationInstances": [
+                {
+                    "ReplicationInstanceArn": arn,
+                    "ReplicationInstanceIdentifier": arn.rsplit(":", 1)[-1].lower(),
+                }
+                for arn in arns
+            ]
+        }
+
+    def _refresh(self, task_arn):
+        """
+        Applies the state changes that are due. A new status of None means deleted.
+        """
+        now = time.monotonic()
+
+        while self.schedule.get(task_arn) and self.schedule[task_arn][0][0] <= now:
+            _, status = self.schedule[task_arn].pop(0)
+
+            if status is None:
+                self.tasks.pop(task_arn, None)
+                self.schedule.pop(task_arn)
+                return
+
+            task = self.tasks[task_arn]
+            task["Status"] = status
+
+            if status == "running":
+                task["ReplicationTaskStats"]["StartDate"] = datetime.now()
+            elif status in ("stopped", "failed"):
+                task["StopReason"] = "Stop Reason FULL_LOAD_ONLY_FINISHED"
+                task["ReplicationTaskStats"]["StopDate"] = datetime.now()
+                task["ReplicationTaskStats"]["FullLoadProgressPercent"] = (
+                    100 if status == "stopped" else 50
+                )
+
+    def describe_replication_tasks(self, **kwargs):
+        self._call("DescribeReplicationTasks")
+
+        with self.lock:
+            for task_arn in list(self.tasks):
+                self._refresh(task_arn)
+
+            tasks = [
+                task for task in self.tasks.values() if self._matches(task, kwargs)
+            ]
+
+        if not tasks:
+            raise ClientError(
+                {
+                    "Error": {
+                        "Code": "ResourceNotFoundFault",
+                        "Message": "No Tasks found matching provided filters",
+                    }
+                },
+                "DescribeReplicationTasks",
+            )
+
+        # Same paging as DMS: the marker is the position of the next record.
+        start = int(kwargs.get("Marker", 0))
+        end = start + kwargs.get("MaxRecords", 100)
+        response = {"ReplicationTasks": []}
+
+        for task in tasks[start:end]:
+            task = dict(task)
+
+            if kwargs.get("WithoutSettings"):
+                task.pop("TableMappings")
+                task.pop("ReplicationTaskSettings")
+
+            response["ReplicationTasks"].append(task)
+
+        if end < len(tasks):
+            response["Marker"] = str(end)
+
+        return response
+
+    def describe_table_statistics(self, **kwargs):
+        self._call("DescribeTableStatistics")
+
+        with self.lock:
+            task = self.tasks[kwargs["ReplicationTaskArn"]]
+
+        statistics = []
+        start_time = task["ReplicationTaskStats"].get("StartDate", datetime.now())
+        end_time = task["ReplicationTaskStats"].get("StopDate", start_time)
+
+        for rule in json.loads(task["TableMappings"])["rules"]:
+            if rule["rule-type"] != "selection" or rule["rule-action"] != "include":
+                continue
+
+            schema = rule["object-locator"]["schema-name"]
+            table = rule["object-locator"]["table-name"]
+            full_load_rows = zlib.crc32(f"{schema}.{table}".encode()) % 1000000
+
+            statistics.append(
+                {
+                    "SchemaName": schema,
+                    "TableName": table,
+                    "Inserts": 0,
+                    "Updates": 0,
+                    "Deletes": 0,
+                    "FullLoadRows": full_load_rows,
+                    "FullLoadErrorRows": 0,
+                    "FullLoadStartTime": start_time,
+                    "FullLoadEndTime": end_time,
+                    "TableState": "Table completed",
+                }
+            )
+
+        start = int(kwargs.get("Marker", 0))
+        end = start + kwargs.get("MaxRecords", 100)
+        response = {"TableStatistics": statistics[start:end]}
+
+        if end < len(statistics):
+            response["Marker"] = str(end)
+
+        return response
+
+    @staticmethod
+    def _matches(task, kwargs):
+        for task_filter in kwargs.get("Filters", []):
+            values = task_filter["Values"]
+
+            if task_filter["Name"] == "replication-task-arn":
+                if task["ReplicationTaskArn"] not in values:
+                    return False
+            elif task_filter["Name"] == "endpoint-arn":
+                if (
+                    task["SourceEndpointArn"] not in values
+                    and task["TargetEndpointArn"] not in values
+                ):
+                    return False
+            elif task_filter["Name"] == "replication-instance-arn":
+                if task["ReplicationInstanceArn"] not in values:
+                    return False
+
+        return True
+
+
+class LocalCloudWatchClient:
+    """
+    A local stand-in for the boto3 CloudWatch client, serving the metrics of the
+    replication instances of a LocalDMSClient.
+
+    Each metric is its "baseline" value, plus its "per_task" value for each task starting
+    or running on the instance, so that the metrics follow the load the way they do on a
+    real instance (without the delay). Values are kept within 0 and "ceiling" (100 for
+    CPUUtilization).
+    """
+
+    BASELINE = {
+        "CPUUtilization": 5.0,
+        "FreeableMemory": 8 * 1024**3,
+        "SwapUsage": 0.0,
+        "FreeStorageSpace": 50 * 1024**3,
+    }
+
+    PER_TASK = {
+        "CPUUtilization": 8.0,
+        "FreeableMemory": -600 * 1024**2,
+        "SwapUsage": 0.0,
+        "FreeStorageSpace": -100 * 1024**2,
+    }
+
+    CEILING = {"CPUUtilization": 100.0}
+
+    def __init__(self, dms, baseline=None, per_task=None, latency=0.0):
+        self.dms = dms
+        self.baseline = dict(self.BASELINE, **(baseline or {}))
+        self.per_task = dict(self.PER_TASK, **(per_task or {}))
+        self.latency = latency
+        self.call_count = 0
+
+    def get_metric_data(self, **kwargs):
+        self.call_count += 1
+        time.sleep(self.latency)
+
+        # The local tasks run on the instances named by their ARN, and the identifier
+        # is the last part of it (See LocalDMSClient.describe_replication_instances).
+        with self.dms.lock:
+            instances = {
+                task["ReplicationInstanceArn"]
+                .rsplit(":", 1)[-1]
+                .lower(): task["ReplicationInstanceArn"]
+                for task in self.dms.tasks.values()
+            }
+
+        results = []
+
+        for query in kwargs["MetricDataQueries"]:
+            metric = query["MetricStat"]["Metric"]
+            identifier = metric["Dimensions"][0]["Value"]
+            name = metric["MetricName"]
+
+            running = 0
+            if identifier in instances:
+                running = self.dms.running_on(instances[identifier])
+
+            value = (
+                self.baseline.get(name, 0.0) + self.per_task.get(name, 0.0) * running
+            )
+            value = min(max(value, 0.0), self.CEILING.get(name, float("inf")))
+
+            results.append(
+                {
+                    "Id": query["Id"],
+                    "Label": name,
+                    "Timestamps": [datetime.now()],
+                    "Values": [value],
+                    "StatusCode": "Complete",
+                }
+            )
+
+        return {"MetricDataResults": results}
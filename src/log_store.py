@@ -0,0 +1,303 @@
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from config import log_store_file
+from utils import print_info, print_messages, print_rows
+
+# ------------------------------------------------------------------------------------------------#
+# Local store of the CloudWatch log events of DMS tasks                                          #
+# ------------------------------------------------------------------------------------------------#
+# Log events are kept in a SQLite database, with a full text index on the message. Searches run
+# locally, without calling AWS. Each sync asks CloudWatch only for the events after the last one
+# already stored for the task.
+#
+# If the SQLite library has no FTS5 support, text searches fall back to LIKE.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS log_events (
+    id          INTEGER PRIMARY KEY,
+    task_id     TEXT    NOT NULL,
+    log_stream  TEXT    NOT NULL,
+    event_id    TEXT    NOT NULL,
+    event_time  INTEGER NOT NULL,
+    timestamp   TEXT,
+    severity    TEXT,
+    component   TEXT,
+    message     TEXT,
+    UNIQUE (task_id, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS log_events_by_time ON log_events (event_time);
+CREATE INDEX IF NOT EXISTS log_events_by_task ON log_events (task_id, event_time);
+CREATE INDEX IF NOT EXISTS log_events_by_severity ON log_events (severity, component, event_time);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    task_id         TEXT PRIMARY KEY,
+    log_group       TEXT,
+    log_stream      TEXT,
+    last_event_time INTEGER,
+    synced_at       INTEGER
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS log_events_fts USING fts5 (
+    message, content='log_events', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS log_events_fts_insert AFTER INSERT ON log_events BEGIN
+    INSERT INTO log_events_fts (rowid, message) VALUES (new.id, new.message);
+END;
+
+CREATE TRIGGER IF NOT EXISTS log_events_fts_delete AFTER DELETE ON log_events BEGIN
+    INSERT INTO log_events_fts (log_events_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+"""
+
+SEARCH_HEADERS = ["Task ID", "Timestamp", "Severity", "Component", "Message"]
+
+
+class LogStore:
+    """
+    SQLite database holding the log events of DMS tasks.
+
+    A store must be used from the thread that opened it. Fetch the events in other threads,
+    and add them from this one.
+    """
+
+    def __init__(self, db_file=log_store_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_last_event_time(self, task_id):
+        """
+        Returns the time (epoch milliseconds) of the last event stored for the task, or
+        None if nothing is stored yet.
+        """
+        row = self.conn.execute(
+            "SELECT last_event_time FROM sync_state WHERE task_id = ?", (task_id,)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def add_events(self, task_id, log_group, log_stream, log_lines):
+        """
+        Stores the log events of a task, and remembers the time of the last one. Events
+        already stored are skipped.
+
+        :param log_lines: Iterable of LogLine objects (See task_logs.parse_log_event)
+
+        :return: No of new events stored
+        """
+        last_event_time = self.get_last_event_time(task_id)
+
+        def rows():
+            nonlocal last_event_time
+
+            for line in log_lines:
+                if last_event_time is None or line.event_time > last_event_time:
+                    last_event_time = line.event_time
+
+                yield (
+                    task_id,
+                    log_stream,
+                    line.event_id,
+                    line.event_time,
+                    line.timestamp,
+                    line.severity,
+                    line.component,
+                    line.message,
+                )
+
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO log_events (task_id, log_stream, event_id, event_time, "
+                "timestamp, severity, component, message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows(),
+            )
+
+            added = cursor.rowcount
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (task_id, log_group, log_stream, "
+                "last_event_time, synced_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    task_id,
+                    log_group,
+                    log_stream,
+                    last_event_time,
+                    int(time.time() * 1000),
+                ),
+            )
+
+        return added
+
+    def search(
+        self,
+        text=None,
+        task_ids=None,
+        severity=None,
+        component=None,
+        start_time=None,
+        end_time=None,
+        limit=None,
+    ):
+        """
+        Yields the stored log events that match all the given conditions, oldest first.
+
+        :param text: Full text query on the message (E.g., "ORA-01555", "table AND error")
+        :param task_ids: List of task IDs
+        :param severity: One of I, W, E, D, T (Info, Warning, Error, Debug, Trace)
+        :param component: Source tag of the message (E.g., SOURCE_CAPTURE)
+        :param start_time: Epoch milliseconds
+        :param end_time: Epoch milliseconds
+        :param limit: Max no of events
+
+        :return: Generator of (task_id, timestamp, severity, component, message)
+        """
+        sql = "SELECT e.task_id, e.timestamp, e.severity, e.component, e.message FROM log_events e"
+        conditions = []
+        params = []
+
+        if text:
+            if self.has_fts:
+                sql += " JOIN log_events_fts f ON f.rowid = e.id"
+                conditions.append("log_events_fts MATCH ?")
+                params.append(text)
+            else:
+                conditions.append("e.message LIKE ?")
+                params.append(f"%{text}%")
+
+        if task_ids:
+            conditions.append(f"e.task_id IN ({', '.join('?' * len(task_ids))})")
+            params.extend(task_ids)
+
+        if severity:
+            conditions.append("e.severity = ?")
+            params.append(severity.upper())
+
+        if component:
+            conditions.append("e.component = ?")
+            params.append(component.upper())
+
+        if start_time is not None:
+            conditions.append("e.event_time >= ?")
+            params.append(start_time)
+
+        if end_time is not None:
+            conditions.append("e.event_time < ?")
+            params.append(end_time)
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        sql += " ORDER BY e.event_time, e.id"
+
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        yield from self.conn.execute(sql, params)
+
+    def summary(self):
+        """
+        Returns (no of tasks, no of events, time of the last event synced).
+        """
+        tasks, last_event_time = self.conn.execute(
+            "SELECT COUNT(*), MAX(last_event_time) FROM sync_state"
+        ).fetchone()
+        events = self.conn.execute("SELECT COUNT(*) FROM log_events").fetchone()[0]
+
+        return tasks, events, last_event_time
+
+
+def search_task_logs(
+    text=None,
+    task_arn=None,
+    severity=None,
+    component=None,
+    start_time=None,
+    end_time=None,
+    limit=None,
+    output="table",
+):
+    """
+    Searches the log events stored by "sync_task_logs", and prints them in the "output"
+    format (See utils.print_rows). No AWS calls are made.
+    """
+    # Imported here, so that searching does not need boto3.
+    from task_logs import parse_time
+
+    if not os.path.exists(log_store_file):
+        print_messages(
+            [
+                [f"Log store not found: {log_store_file}"],
+                ["Fetch the logs first: python app.py --action sync_task_logs"],
+            ],
+            ["Error"],
+        )
+        sys.exit(1)
+
+    try:
+        start_time = parse_time(start_time)
+        end_time = parse_time(end_time)
+    except ValueError as error:
+        print_messages([[str(error)]], ["Error"])
+        sys.exit(1)
+
+    store = LogStore()
+
+    try:
+        tasks, events, last_event_time = store.summary()
+
+        if last_event_time:
+            last_synced = datetime.fromtimestamp(last_event_time / 1000).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            print_info(
+                f"{events} log events of {tasks} tasks, up to: {last_synced}", output
+            )
+
+        task_ids = [task_arn.split(":")[-1]] if task_arn else None
+
+        started = time.perf_counter()
+
+        count = print_rows(
+            store.search(
+                text=text,
+                task_ids=task_ids,
+                severity=severity,
+                component=component,
+                start_time=start_time,
+                end_time=end_time,
+                limit=limit,
+            ),
+            SEARCH_HEADERS,
+            output=output,
+            keys=["task_id", "timestamp", "severity", "component", "message"],
+        )
+
+        elapsed = (time.perf_counter() - started) * 1000
+        print_info(f"{count} log events found in {elapsed:.0f} ms", output)
+    except sqlite3.OperationalError as error:
+        # E.g., a full text query with a syntax error
+        print_messages([[f"Search failed: {error}"]], ["Error"])
+        sys.exit(1)
+    finally:
+        store.close()
@@ -0,0 +1,579 @@
+import asyncio
+import collections
+import contextlib
+import functools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (POLL_CHUNK_SIZE, POLL_MAX_DELAY, POLL_MIN_DELAY,
+                    POLL_TIMEOUT_PER_TASK, TABLE_STATISTICS_WORKERS,
+                    TASK_CREATION_WORKERS, TASK_START_WORKERS,
+                    json_files_location, json_manifest_file,
+                    replication_instance_arn, task_arn_file)
+from scheduler import get_budget
+from settings_profiles import SettingsProfiles, read_task_loads
+from task_poller import (DELETED, FAILURE_STATES, FAILURE_STOP_REASONS,
+                         describe_task_states, print_progress)
+from utils import AdaptiveBackoff, percentile, print_messages, print_rows
+
+# ------------------------------------------------------------------------------------------------#
+# Runs the whole life cycle of the DMS tasks as a single pipelined run                           #
+# ------------------------------------------------------------------------------------------------#
+# Each JSON file is a job, that goes through these stages:
+#
+#   create  - create_replication_task
+#   ready   - Wait for the task to be "ready"
+#   start   - start_replication_task
+#   stopped - Wait for the full load to complete (task "stopped")
+#   stats   - describe_table_statistics
+#
+# Jobs move on independently: the first tasks are loading while the later ones are still being
+# created. Each stage has its own concurrency limit (See STAGE_LIMITS). Waiting does not hold a
+# thread per task: a single watcher polls the status of all the tasks being waited for, in
+# batches of POLL_CHUNK_SIZE ARNs. boto3 calls run in a thread pool, as boto3 is not async.
+#
+# When all the jobs are done, the throughput & latency of each stage is printed.
+STAGES = ["create", "ready", "start", "stopped", "stats"]
+
+# Max no of jobs in each stage at a time. None means no limit. "running" covers the jobs from
+# the start of the "start" stage to the end of the "stopped" stage, i.e., the tasks loading
+# at the same time. All the tasks are created on the same replication instance, so it is the
+# budget of that instance (See scheduler.py), read when an Orchestrator is created.
+STAGE_LIMITS = {
+    "create": TASK_CREATION_WORKERS,
+    "start": TASK_START_WORKERS,
+    "stats": TABLE_STATISTICS_WORKERS,
+}
+
+STAGE_REPORT_HEADERS = [
+    "Stage",
+    "Jobs",
+    "Failed",
+    "Limit",
+    "Jobs/min",
+    "p50 sec",
+    "p90 sec",
+    "Max sec",
+    "Avg Queue sec",
+]
+
+
+class TaskWaitError(Exception):
+    """
+    Raised when a task ends up in a failure state, stops on an error, or its status stops
+    changing.
+    """
+
+
+class Job:
+    """
+    A JSON file, and the DMS task created for it.
+
+    "timings" has (queued, started, ended) for each stage the job went through, in
+    seconds (time.monotonic).
+    """
+
+    def __init__(self, json_file):
+        self.json_file = json_file
+        self.task_id = ""
+        self.task_arn = ""
+        self.profile = ""
+        self.stage = "queued"
+        self.error = ""
+        self.failed_stage = None
+        self.statistics = None
+        self.timings = {}
+
+
+class StatusWatcher:
+    """
+    Polls the status of the tasks being waited for, and wakes up the jobs waiting on them.
+
+    Status of all the tasks is fetched with as few "describe_replication_tasks" calls as
+    possible. The delay between polls grows while nothing changes, and goes back to
+    "min_delay" as soon as a task changes its status.
+    """
+
+    def __init__(
+        self,
+        dms,
+        run_blocking,
+        chunk_size=POLL_CHUNK_SIZE,
+        min_delay=POLL_MIN_DELAY,
+        max_delay=POLL_MAX_DELAY,
+        on_poll=None,
+    ):
+        self.dms = dms
+        self.run_blocking = run_blocking
+        self.chunk_size = chunk_size
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.on_poll = on_poll
+        self.backoff = AdaptiveBackoff()
+        # ARN -> [target states, future, last status, time of the last change, timeout]
+        self.waiters = {}
+        self.new_waiter = asyncio.Event()
+        self.poll_count = 0
+
+    async def wait(self, task_arn, target_states, timeout=None):
+        """
+        Waits for the task to reach one of the target states.
+
+        :param timeout: Seconds the status of the task may stay unchanged. None means
+                        wait forever.
+
+        :return: Status of the task
+        :raise TaskWaitError: If the task fails, stops on an error (See
+                              task_poller.FAILURE_STOP_REASONS), or gets stuck
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[task_arn] = [
+            target_states,
+            future,
+            None,
+            time.monotonic(),
+            timeout,
+        ]
+        self.new_waiter.set()
+
+        return await future
+
+    async def run(self):
+        delay = self.min_delay
+
+        while True:
+            if not self.waiters:
+                self.new_waiter.clear()
+                await self.new_waiter.wait()
+
+            arns = list(self.waiters)
+            states = {}
+
+            try:
+                for i in range(0, len(arns), self.chunk_size):
+                    states.update(
+                        await self.run_blocking(
+                            describe_task_states,
+                            self.dms,
+                            arns[i : i + self.chunk_size],
+                            self.backoff,
+                        )
+                    )
+            except Exception as error:
+                # Keep polling. The tasks are still there, whatever went wrong.
+                print_messages([["Error polling task status"], [str(error)]], ["Error"])
+
+            self.poll_count += 1
+            changed = self.update(states)
+
+            if self.on_poll is not None:
+                self.on_poll()
+
+            delay = self.min_delay if changed else min(delay * 2, self.max_delay)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    def update(self, states):
+        """
+        Resolves the waiters whose task reached a target or a failure state, or got stuck.
+        A task that stopped on an error is failed, even if "stopped" is a target state.
+
+        :param states: Dict of task ARN -> {"Status": status, "StopReason": stop reason}
+                       (See task_poller.describe_task_states)
+
+        :return: True if the status of any task changed
+        """
+        now = time.monotonic()
+        changed = False
+
+        for task_arn, state in states.items():
+            status = state["Status"]
+            waiter = self.waiters.get(task_arn)
+
+            if waiter is None:
+                continue
+
+            target_states, future, last_status, last_change, timeout = waiter
+
+            if future.done():
+                # The job waiting on it was cancelled.
+                del self.waiters[task_arn]
+                continue
+
+            if status != last_status:
+                waiter[2], waiter[3] = status, now
+                changed = True
+
+            if status == "stopped" and state["StopReason"] in FAILURE_STOP_REASONS:
+                future.set_exception(
+                    TaskWaitError(f"Task stopped with '{state['StopReason']}'")
+                )
+            elif status in target_states:
+                future.set_result(status)
+            elif status in FAILURE_STATES or status == DELETED:
+                future.set_exception(TaskWaitError(f"Task is in '{status}' state"))
+            elif timeout is not None and now - waiter[3] > timeout:
+                future.set_exception(
+                    TaskWaitError(f"Task is stuck in '{status}' state")
+                )
+            else:
+                continue
+
+            del self.waiters[task_arn]
+
+        return changed
+
+
+class Orchestrator:
+    """
+    Runs the jobs of the given JSON files through all the stages.
+
+        orchestrator = Orchestrator(dms)
+        jobs = orchestrator.run(json_files)
+        orchestrator.print_report()
+
+    The DMS client is passed in, so that the stages can be driven against a stand-in
+    (See benchmark.py). With a Backpressure object, the "start" stage also waits for the
+    metrics of the replication instance to allow another task (See backpressure.py).
+    """
+
+    def __init__(
+        self,
+        dms,
+        limits=None,
+        location=json_files_location,
+        poll_settings=None,
+        ready_timeout=POLL_TIMEOUT_PER_TASK,
+        backpressure=None,
+    ):
+        self.dms = dms
+        self.backpressure = backpressure
+        self.limits = dict(STAGE_LIMITS, **(limits or {}))
+
+        if "running" not in self.limits:
+            self.limits["running"] = get_budget(replication_instance_arn)
+        self.location = location
+        self.poll_settings = poll_settings or {}
+        self.ready_timeout = ready_timeout
+        self.jobs = []
+        self.started = None
+        self.elapsed = 0.0
+
+    def run(self, json_files):
+        """
+        :return: List of Job objects, in the same order as the JSON files
+        """
+        self.jobs = [Job(json_file) for json_file in json_files]
+
+        workers = sum(limit or 0 for limit in self.limits.values()) + 1
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            asyncio.run(self.run_jobs(executor))
+
+        return self.jobs
+
+    async def run_jobs(self, executor):
+        # Imported here, as dms imports boto3.
+        from dms import (create_replication_task, get_task_table_statistics,
+                         start_replication_task, task_id_suffix)
+
+        loop = asyncio.get_running_loop()
+
+        def run_blocking(func, *args):
+            return loop.run_in_executor(executor, functools.partial(func, *args))
+
+        limits = {
+            name: asyncio.Semaphore(limit) if limit else None
+            for name, limit in self.limits.items()
+        }
+
+        self.started = time.monotonic()
+        watcher = StatusWatcher(
+            self.dms, run_blocking, on_poll=self.print_progress, **self.poll_settings
+        )
+        watcher_task = asyncio.ensure_future(watcher.run())
+
+        current_time = task_id_suffix()
+        backoff = AdaptiveBackoff()
+        profiles = SettingsProfiles(
+            loads=read_task_loads(
+                os.path.join(self.location, os.path.basename(json_manifest_file))
+            )
+        )
+
+        async def wait_for_capacity():
+            delay = self.poll_settings.get("min_delay", POLL_MIN_DELAY)
+
+            while not await run_blocking(
+                self.backpressure.take, replication_instance_arn, 1
+            ):
+                await asyncio.sleep(delay)
+
+        @contextlib.asynccontextmanager
+        async def stage(job, name, limit=None):
+            queued = time.monotonic()
+
+            async with limit or contextlib.AsyncExitStack():
+                job.stage = name
+                started = time.monotonic()
+
+                try:
+                    yield
+                except Exception as error:
+                    job.failed_stage = name
+                    job.error = job.error or str(error)
+                    raise
+                finally:
+                    job.timings[name] = (queued, started, time.monotonic())
+
+        async def run_job(job):
+            async with stage(job, "create", limits["create"]):
+                result = await run_blocking(
+                    create_replication_task,
+                    self.dms,
+                    job.json_file,
+                    current_time,
+                    backoff,
+                    self.location,
+                    profiles,
+                )
+                job.task_id = result.task_id
+                job.task_arn = result.task_arn
+                job.profile = result.profile
+
+                if result.error:
+                    raise RuntimeError(result.error)
+
+                print(
+                    f"DMS task created for file: {job.json_file} "
+                    f"(profile: {job.profile})"
+                )
+
+            async with stage(job, "ready"):
+                await watcher.wait(job.task_arn, {"ready"}, self.ready_timeout)
+
+            async with limits["running"] or contextlib.AsyncExitStack():
+                async with stage(job, "start", limits["start"]):
+                    if self.backpressure is not None:
+                        await wait_for_capacity()
+
+                    await run_blocking(
+                        start_replication_task, self.dms, job.task_arn, backoff
+                    )
+
+                # Full loads can run for hours, so there is no timeout.
+                async with stage(job, "stopped"):
+                    await watcher.wait(job.task_arn, {"stopped"})
+
+            async with stage(job, "stats", limits["stats"]):
+                job.statistics = await run_blocking(
+                    get_task_table_statistics, self.dms, job.task_arn, backoff
+                )
+
+            job.stage = "done"
+
+        async def run_job_safely(job):
+            try:
+                await run_job(job)
+            except Exception:
+                job.stage = "failed"
+
+        try:
+            await asyncio.gather(*(run_job_safely(job) for job in self.jobs))
+        finally:
+            watcher_task.cancel()
+
+            with contextlib.suppress(asyncio.CancelledError):
+                await watcher_task
+
+            self.elapsed = time.monotonic() - self.started
+
+    def print_progress(self):
+        print_progress(
+            time.monotonic() - self.started,
+            collections.Counter(job.stage for job in self.jobs),
+        )
+
+    def stage_report(self):
+        """
+        Returns a row per stage: stage, jobs that completed it, jobs that failed in it,
+        concurrency limit, throughput (jobs per minute while the stage was busy), p50, p90
+        & max seconds in the stage, and average seconds waited for the limit.
+        """
+        rows = []
+
+        for name in STAGES:
+            timings = [job.timings[name] for job in self.jobs if name in job.timings]
+
+            if not timings:
+                continue
+
+            failed = sum(1 for job in self.jobs if job.failed_stage == name)
+            latencies = sorted(ended - started for _, started, ended in timings)
+            waits = [started - queued for queued, started, _ in timings]
+            busy = max(ended for _, _, ended in timings) - min(
+                started for _, started, _ in timings
+            )
+            completed = len(timings) - failed
+
+            rows.append(
+                [
+                    name,
+                    completed,
+                    failed,
+                    self.limits.get(name) or "",
+                    f"{completed / busy * 60:.1f}" if busy > 0 else "",
+                    f"{percentile(latencies, 50):.1f}",
+                    f"{percentile(latencies, 90):.1f}",
+                    f"{latencies[-1]:.1f}",
+                    f"{sum(waits) / len(waits):.1f}",
+                ]
+            )
+
+        return rows
+
+    def print_report(self, output="table"):
+        print_rows(
+            self.stage_report(),
+            STAGE_REPORT_HEADERS,
+            output=output,
+            keys=[header.lower().replace(" ", "_") for header in STAGE_REPORT_HEADERS],
+        )
+
+    def summary(self):
+        """
+        Returns a summary text of the run.
+        """
+        hours, remainder = divmod(int(self.elapsed), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        failed = collections.Counter(
+            job.failed_stage for job in self.jobs if job.failed_stage
+        )
+
+        lines = [
+            f"DMS migration completed in {hours:02d}:{minutes:02d}:{seconds:02d}",
+            f"Jobs     : {len(self.jobs)}",
+            f"Completed: {sum(1 for job in self.jobs if job.stage == 'done')}",
+        ]
+        lines += [
+            f"Failed in {name:<7}: {failed[name]}" for name in STAGES if failed[name]
+        ]
+
+        if self.backpressure is not None:
+            paused = self.backpressure.paused_time(replication_instance_arn)
+            lines.append(f"Task starts paused for {paused:.0f} sec by the backpressure")
+
+        return "\n".join(lines)
+
+
+def run_migration(
+    profile,
+    region,
+    generate=True,
+    output="table",
+    max_running_tasks=None,
+    backpressure=False,
+):
+    """
+    Generates the JSON files, and runs a DMS task for each of them from creation to
+    table statistics, in a single pipelined run (See Orchestrator).
+
+    :param generate: If False, the JSON files are not generated again (E.g., when
+                     "generate_json_files" has just been run in the same session)
+    :param max_running_tasks: Overrides the budget of the replication instance. 0 means
+                              no limit.
+    :param backpressure: If True, starting tasks is paused while the metrics of the
+                         replication instance are past their thresholds
+
+    :return: List of the ARNs of the tasks created
+    """
+    # Imported here, as dms imports boto3.
+    from aws_clients import get_client
+    from backpressure import Backpressure
+    from dms import (TaskCreationResult, send_mail,
+                     write_task_creation_results)
+    from process_input_files import process_input_files
+    from table_statistics import ROLLUP_HEADERS, TableStatistics
+
+    dms = get_client(profile, region, "dms")
+
+    if generate:
+        process_input_files()
+
+    json_files = sorted(
+        file for file in os.listdir(json_files_location) if file.endswith(".json")
+    )
+
+    limits = {}
+
+    if max_running_tasks is not None:
+        limits["running"] = get_budget(replication_instance_arn, max_running_tasks)
+
+    orchestrator = Orchestrator(
+        dms,
+        limits,
+        backpressure=(
+            Backpressure.from_cloudwatch(get_client(profile, region, "cloudwatch"), dms)
+            if backpressure
+            else None
+        ),
+    )
+    jobs = orchestrator.run(json_files)
+
+    arn_list = [job.task_arn for job in jobs if job.task_arn]
+
+    # Persist the ARNs, so that the tasks can be listed, run or deleted later.
+    with open(task_arn_file, "w") as file_handle:
+        file_handle.writelines(f"{arn}\n" for arn in arn_list)
+
+    write_task_creation_results(
+        [
+            TaskCreationResult(
+                json_file=job.json_file,
+                task_id=job.task_id,
+                task_arn=job.task_arn,
+                error=job.error if job.failed_stage == "create" else "",
+                attempts="",
+                elapsed=(
+                    job.timings["create"][2] - job.timings["create"][1]
+                    if "create" in job.timings
+                    else ""
+                ),
+                profile=job.profile,
+            )
+            for job in jobs
+        ]
+    )
+
+    statistics = TableStatistics()
+
+    for job in jobs:
+        if job.statistics is not None:
+            statistics.extend(job.statistics)
+
+    if output == "table" and len(statistics):
+        print_rows(statistics.rollup("schema"), ROLLUP_HEADERS["schema"])
+
+    orchestrator.print_report(output)
+
+    failures = [job for job in jobs if job.failed_stage]
+
+    if failures:
+        print_messages(
+            [
+                [f"{job.json_file} ({job.failed_stage}): {job.error}"]
+                for job in failures
+            ],
+            [f"{len(failures)} Jobs failed"],
+        )
+
+    msg = orchestrator.summary()
+    print(msg)
+    send_mail(profile, region, msg)
+
+    if failures:
+        sys.exit(1)
+
+    return arn_list
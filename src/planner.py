@@ -0,0 +1,389 @@
+import csv
+import heapq
+import json
+import os
+import re
+
+from config import (MAX_RULES_PER_TASK, MAX_TABLE_MAPPING_BYTES,
+                    table_catalog_file, table_sizes_file)
+from resolver import is_pattern, pattern_to_regex
+from utils import print_messages, print_rows
+
+# ------------------------------------------------------------------------------------------------#
+# Splits the tables of a schema into a given no of DMS tasks with balanced load                  #
+# ------------------------------------------------------------------------------------------------#
+# Tables are also split further, if the table mapping of a task would go over the rule or byte
+# limit (MAX_RULES_PER_TASK & MAX_TABLE_MAPPING_BYTES in config.py). DMS fails to create a task
+# whose table mapping is too large.
+
+
+def read_table_sizes(size_file=table_sizes_file):
+    """
+    Reads the size of each table from a CSV file with lines like: HR,EMPLOYEES,250000
+
+    Any unit can be used for the size (rows, bytes, ...), as long as it is the same for all
+    the tables. The file is optional.
+
+    :return: Dict with (schema, table) as the key, and size as the value
+    """
+    sizes = {}
+
+    if not os.path.exists(size_file):
+        return sizes
+
+    with open(size_file, "r", newline="") as in_file:
+        for cols in csv.reader(in_file):
+            cols = [col.strip() for col in cols]
+
+            if len(cols) < 3 or not cols[0]:
+                continue
+
+            try:
+                sizes[(cols[0], cols[1])] = float(cols[2])
+            except ValueError:
+                # Header line, or a size that is not a number.
+                continue
+
+    return sizes
+
+
+def write_table_sizes(sizes, size_file=table_sizes_file):
+    """
+    Writes the size of each table to a CSV file, in the format "read_table_sizes" reads.
+
+    :param sizes: Dict with (schema, table) as the key, and size as the value
+    """
+    with open(size_file, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+
+        for (schema, table), size in sorted(sizes.items()):
+            writer.writerow([schema, table, int(size)])
+
+    print(f"Sizes of {len(sizes)} tables written to: {size_file}")
+
+
+def read_table_catalog(catalog_file=table_catalog_file):
+    """
+    Reads the list of all the tables of each schema, from a CSV file with lines like:
+    HR,EMPLOYEES. A schema in the file must have all its tables listed (See
+    find_wildcard_excludes). The file is optional.
+
+    :return: Dict with schema as the key, and the set of its table names as the value
+    """
+    catalog = {}
+
+    if not os.path.exists(catalog_file):
+        return catalog
+
+    with open(catalog_file, "r", newline="") as in_file:
+        for cols in csv.reader(in_file):
+            cols = [col.strip() for col in cols]
+
+            if len(cols) < 2 or not cols[0] or not cols[1]:
+                continue
+
+            catalog.setdefault(cols[0], set()).add(cols[1])
+
+    return catalog
+
+
+def write_table_catalog(catalog, catalog_file=table_catalog_file):
+    """
+    Writes the tables of each schema to a CSV file, in the format "read_table_catalog" reads.
+
+    :param catalog: Dict with schema as the key, and the set of its table names as the value
+    """
+    with open(catalog_file, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+
+        for schema in sorted(catalog):
+            for table in sorted(catalog[schema]):
+                writer.writerow([schema, table])
+
+    count = sum(len(tables) for tables in catalog.values())
+    print(f"{count} tables of {len(catalog)} schemas written to: {catalog_file}")
+
+
+def pack_tables(tables, sizes, task_count):
+    """
+    Splits the tables into "task_count" groups whose total sizes are as even as possible.
+
+    Tables are taken from the largest to the smallest, and each one goes to the group with
+    the least load so far. Tables with no known size are assumed to be of the average
+    size of the known ones.
+
+    :param tables: List of Table objects (All of the same schema)
+    :param sizes: Dict with (schema, table) as the key, and size as the value
+    :param task_count: No of groups
+
+    :return: List of (list of Table objects, predicted load). Empty groups are dropped.
+    """
+    size_of = size_function(tables, sizes)
+
+    # A "%" entry covers the whole schema, so it can not be spread over tasks.
+    if task_count <= 1 or has_wildcards(tables):
+        return [(list(tables), sum(size_of(table) for table in tables))]
+
+    groups = [[] for _ in range(task_count)]
+    heap = [(0, i) for i in range(task_count)]
+
+    for table in sorted(tables, key=size_of, reverse=True):
+        load, i = heapq.heappop(heap)
+        groups[i].append(table)
+        heapq.heappush(heap, (load + size_of(table), i))
+
+    loads = {i: load for load, i in heap}
+
+    return [(groups[i], loads[i]) for i in range(task_count) if groups[i]]
+
+
+def mapping_load(data, sizes):
+    """
+    Predicts the load of a DMS task from its table mapping: the total size of the tables
+    its selection rules pick up. "%" rules are matched against the tables in "sizes".
+    Tables with no known size are assumed to be of the average size of the known ones.
+    A table with filter conditions counts in full.
+
+    :param data: Table mapping (Dict with "rules")
+    :param sizes: Dict with (schema, table) as the key, and size as the value
+    """
+    default_size = sum(sizes.values()) / len(sizes) if sizes else 1
+    included, excluded = {}, set()
+
+    for rule in data.get("rules", []):
+        if rule.get("rule-type") != "selection":
+            continue
+
+        schema = rule["object-locator"]["schema-name"]
+        table = rule["object-locator"]["table-name"]
+
+        if is_pattern(schema) or is_pattern(table):
+            schema_regex = re.compile(pattern_to_regex(schema))
+            table_regex = re.compile(pattern_to_regex(table))
+            keys = [
+                key
+                for key in sizes
+                if schema_regex.fullmatch(key[0]) and table_regex.fullmatch(key[1])
+            ]
+        else:
+            keys = [(schema, table)]
+
+        if rule.get("rule-action") == "exclude":
+            excluded.update(keys)
+        else:
+            included.update((key, sizes.get(key, default_size)) for key in keys)
+
+    return sum(size for key, size in included.items() if key not in excluded)
+
+
+def has_wildcards(tables):
+    """
+    Tells whether any of the tables is a "%" pattern or an exclude entry.
+    """
+    return any("%" in table.table or table.action != "include" for table in tables)
+
+
+def size_function(tables, sizes):
+    """
+    Returns a function that gives the size of a table. Tables with no known size are
+    assumed to be of the average size of the known ones. Exclude entries have no size.
+    """
+    known = [sizes[(t.schema, t.table)] for t in tables if (t.schema, t.table) in sizes]
+    default_size = sum(known) / len(known) if known else 1
+
+    def size_of(table):
+        if table.action == "exclude":
+            return 0
+
+        return sizes.get((table.schema, table.table), default_size)
+
+    return size_of
+
+
+def mapping_size(data):
+    """
+    Returns the no of bytes of the table mapping, as written to the JSON file.
+    """
+    return len(json.dumps(data))
+
+
+def fits_mapping_limits(
+    data, max_bytes=MAX_TABLE_MAPPING_BYTES, max_rules=MAX_RULES_PER_TASK
+):
+    """
+    Tells whether the table mapping is within the rule & byte limits.
+    """
+    return len(data["rules"]) <= max_rules and mapping_size(data) <= max_bytes
+
+
+def find_wildcard_excludes(tables, catalog):
+    """
+    Decides whether the tables of a schema can be selected with a "%" rule and a few
+    exclude rules, instead of a rule per table.
+
+    :param tables: List of Table objects (All of the same schema)
+    :param catalog: Set of all the table names of the schema (See read_table_catalog). It
+                    must be complete: "table_sizes_file" is not, as it only has the tables
+                    DMS has loaded so far.
+
+    :return: List of table names to be excluded, or None if the rules can not (or need not)
+             be compacted. Tables with "partitions-auto" keep a rule of their own.
+    """
+    if not catalog or has_wildcards(tables):
+        return None
+
+    names = {table.table for table in tables}
+    listed = {table.table for table in tables if not table.auto_partitioned}
+
+    # A table missing from the catalog means the catalog is out of date. Using "%" would
+    # pick up tables that were never asked for.
+    if not names <= catalog:
+        return None
+
+    excludes = sorted(catalog - names)
+
+    if 1 + len(excludes) >= len(listed):
+        return None
+
+    return excludes
+
+
+def split_by_mapping_limits(
+    tables,
+    build,
+    balance=None,
+    max_bytes=MAX_TABLE_MAPPING_BYTES,
+    max_rules=MAX_RULES_PER_TASK,
+):
+    """
+    Splits the tables into as few parts as possible, so that the table mapping of each
+    part stays within the limits.
+
+    The no of parts needed is worked out from the limits, and the tables are spread over
+    them with "balance". If any part still goes over a limit (E.g., a part got many tables
+    with long names), the tables are cut into parts in their order instead, using the size
+    of each rule.
+
+    :param tables: List of Table objects
+    :param build: Function that builds the table mapping of a list of tables, with a
+                  selection rule per table, in the same order
+    :param balance: Function that spreads a list of tables over a given no of lists (E.g.,
+                    by load, See pack_tables)
+    :param max_bytes: Max no of bytes of a table mapping
+    :param max_rules: Max no of rules in a table mapping
+
+    :return: List of (list of Table objects, table mapping)
+    """
+    # What a mapping has besides the table rules (Transformation rules, brackets, ...)
+    empty = build([])
+    overhead = mapping_size(empty)
+    extra_rules = len(empty["rules"])
+
+    # Exclude rules only apply to the "%" rules in the same mapping, so these are kept
+    # together, even when they go over a limit.
+    if has_wildcards(tables) or len(tables) + extra_rules <= max_rules:
+        data = build(tables)
+
+        if fits_mapping_limits(data, max_bytes, max_rules):
+            return [(tables, data)]
+
+        if has_wildcards(tables):
+            print_messages(
+                [
+                    [
+                        f"Table mapping with {len(data['rules'])} rules & "
+                        f"{mapping_size(data)} bytes goes over MAX_RULES_PER_TASK "
+                        f"({max_rules}) or MAX_TABLE_MAPPING_BYTES ({max_bytes})."
+                    ],
+                    [
+                        "It can not be split, as it has '%' entries. DMS may fail to "
+                        "create its task."
+                    ],
+                ],
+                ["Warning"],
+            )
+            return [(tables, data)]
+
+    if balance is not None:
+        count = -(-len(tables) // max(1, max_rules - extra_rules))
+
+        # Try the no of parts the rule limit needs, then the no the byte limit needs,
+        # worked out from the size of the parts.
+        for _ in range(2):
+            parts = [(part, build(part)) for part in balance(tables, count)]
+            part_sizes = [mapping_size(data) for _, data in parts]
+
+            if all(
+                len(data["rules"]) <= max_rules and size <= max_bytes
+                for (_, data), size in zip(parts, part_sizes)
+            ):
+                return parts
+
+            total = sum(part_sizes) - overhead * (len(parts) - 1)
+            count = max(
+                count + 1, -(-(total - overhead) // max(1, max_bytes - overhead))
+            )
+
+    data = build(tables)
+
+    # Bytes of each table's rule. Each rule is followed by ", " in the file.
+    rule_sizes = [mapping_size(rule) + 2 for rule in data["rules"][: len(tables)]]
+
+    parts = []
+    part, part_bytes = [], overhead
+
+    for table, rule_bytes in zip(tables, rule_sizes):
+        if part and (
+            part_bytes + rule_bytes > max_bytes
+            or len(part) + 1 + extra_rules > max_rules
+        ):
+            parts.append(part)
+            part, part_bytes = [], overhead
+
+        part.append(table)
+        part_bytes += rule_bytes
+
+    parts.append(part)
+
+    return [(part, build(part)) for part in parts]
+
+
+def print_plan(plan):
+    """
+    Prints the rules, bytes & predicted load of each task.
+
+    :param plan: List of (schema, file name, no of tables, predicted load, no of rules, no
+                 of bytes)
+    """
+    total_by_schema = {}
+
+    for schema, _, _, load, _, _ in plan:
+        total_by_schema[schema] = total_by_schema.get(schema, 0) + load
+
+    def rows():
+        for schema, file_name, tables, load, rules, size in plan:
+            total = total_by_schema[schema]
+            share = load / total * 100 if total else 0
+
+            yield [
+                schema,
+                file_name,
+                tables,
+                rules,
+                size,
+                int(load),
+                f"{share:.1f}%",
+            ]
+
+    print_rows(
+        rows(),
+        [
+            "Schema",
+            "JSON File",
+            "Tables",
+            "Rules",
+            "Bytes",
+            "Predicted Load",
+            "Share",
+        ],
+    )
@@ -1,18 +1,38 @@
 import collections
+import csv
+import hashlib
 import json
 import os
-
-from config import (csv_files_location, homegeneous_migration,
-                    json_files_location)
+import sys
+
+from config import (COMPACT_TABLE_MAPPINGS, TASKS_PER_SCHEMA,
+                    csv_files_location, homegeneous_migration,
+                    json_files_location, json_manifest_file,
+                    table_catalog_file)
+from planner import (find_wildcard_excludes, fits_mapping_limits,
+                     pack_tables, print_plan, read_table_catalog,
+                     read_table_sizes, size_function, split_by_mapping_limits,
+                     write_table_catalog)
+from range_splitter import SPLIT_PREFIX, RangeSplitter
+from resolver import Resolver, is_pattern, print_issues
 from utils import (convert_columns_to_lowercase, convert_schemas_to_lowercase,
-                   convert_tables_to_lowercase)
+                   convert_tables_to_lowercase, print_messages)
 
 # ------------------------------------------------------------------------------------------------#
 # Create named tuples to hold Table, and filter attributes                                        #
 # ------------------------------------------------------------------------------------------------#
 # Each table should be associated with a schema. Table will have filters applied to it.
+# "action" tells whether the entry came from an "include" or an "exclude" file. "size" is the
+# size hint of the entry, if it has one (See SIZE_PREFIX).
 Table = collections.namedtuple(
-    "Table", "schema, table, filters, auto_partitioned")
+    "Table",
+    "schema, table, filters, auto_partitioned, action, size",
+    defaults=("include", None),
+)
+
+# Last column of an include entry that gives the size of the table, or of the slice of it
+# selected by the filter conditions (E.g., HR,REGIONS,size:25). Same unit as "table_sizes_file".
+SIZE_PREFIX = "size:"
 
 # Each filter is composed of three attributes
 #  1. Column name
@@ -20,220 +40,555 @@ Table = collections.namedtuple(
 #  3. Filter value (Note - In case of between, two values are needed. They should be separated with "~")
 Filter = collections.namedtuple("Filter", "column, operator, value")
 
-# holds tables that have filter conditions
-filter_tables = []
 
-# This is a map with key as schema name.this map holds all the tables under a
-# schema.
-non_filter_tables = {}
+class JsonFileManifest:
+    """
+    Keeps track of the JSON files generated, and a hash of their content.
+
+    The manifest of the previous run is read from "json_manifest_file". A JSON file is
+    written only if it is new, or its content has changed since the previous run, or the
+    file on disk no longer has the content recorded in the manifest (E.g., it was edited
+    by hand). Files that are no longer generated are removed. The manifest also records
+    which files were added, changed and removed by the latest run, so that other tools
+    can tell which tasks need to be re-created, and the predicted load of each file, from
+    which the settings of its task are chosen (See settings_profiles.py).
+    """
+
+    def __init__(
+        self, location=json_files_location, manifest_file=json_manifest_file
+    ):
+        self.location = location
+        self.manifest_file = manifest_file
+
+        self.previous = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file, "r") as fp:
+                self.previous = json.load(fp)["files"]
 
+        self.existing = {file for file in os.listdir(location) if file.endswith(".json")}
 
-def delete_json_files():
-    """
-    Deletes json files in "json_files" directory.
+        self.files = {}
+        self.loads = {}
+        self.added, self.changed, self.unchanged, self.removed = [], [], [], []
+
+    def write(self, file_name, data, load=None):
+        """
+        Writes the data to the JSON file, unless the file already has the same content.
+
+        :param load: Predicted load of the task of the file, if known
+
+        :return: No of bytes of the content
+
+        :raises ValueError: If a file of the same name has already been generated in this
+                            run, as one of the two tasks would be lost.
+        """
+        if file_name in self.files:
+            raise ValueError(f"JSON file generated twice: {file_name}")
+
+        if load is not None:
+            self.loads[file_name] = load
+
+        content = json.dumps(data)
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        if file_name not in self.existing:
+            self.added.append(file_name)
+        elif self.previous.get(file_name) != content_hash or (
+            self.hash_on_disk(file_name) != content_hash
+        ):
+            self.changed.append(file_name)
+        else:
+            self.unchanged.append(file_name)
+            self.files[file_name] = content_hash
+            return len(content)
+
+        self.files[file_name] = content_hash
+
+        with open(os.path.join(self.location, file_name), "w") as fp:
+            fp.write(content)
+
+        return len(content)
+
+    def hash_on_disk(self, file_name):
+        with open(os.path.join(self.location, file_name), "rb") as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+
+    def finish(self):
+        """
+        Removes the JSON files that were not generated in this run, and saves the
+        manifest.
+
+        :return: Dict with the lists of "added", "changed" & "removed" files
+        """
+        for file_name in sorted(self.existing - set(self.files)):
+            os.remove(os.path.join(self.location, file_name))
+            self.removed.append(file_name)
+
+        summary = {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+        }
+
+        with open(self.manifest_file, "w") as fp:
+            json.dump(
+                {"files": self.files, "loads": self.loads, "last_run": summary},
+                fp,
+                indent=1,
+            )
+
+        return summary
+
+
+def process_input_files(verbose=False, source_url=None):
     """
-    for file in os.listdir(json_files_location):
-        os.remove(os.path.join(json_files_location, file))
-        print(f"File {file} deleted")
+    Reads the input CSV files and generates the JSON files.
+
+    All the entries of the include & exclude files are read first, and resolved into the
+    tables each task should load (See resolver.py): excluded tables are left out, and a
+    table is not loaded by more than one task. Tables with filter conditions get a JSON
+    file each. Tables with no filter conditions are grouped by schema.
 
+    Only the JSON files that are new, or whose content has changed, are written. Files that
+    are no longer needed are removed (See JsonFileManifest).
 
-def process_input_files():
+    :param verbose: If True, each row of the CSV files is printed along with the decision
+    :param source_url: URL of the Source DB (See data_validator.py). If given, the tables of
+                       the schemas in the include files are read from it, and saved to
+                       "table_catalog_file" (See COMPACT_TABLE_MAPPINGS in config.py)
+
+    :return: Dict with the lists of "added", "changed" & "removed" JSON files
+    """
     print("-" * 100)
 
-    # Identify the CSV files and process them
-    for file in os.listdir(csv_files_location):
+    manifest = JsonFileManifest()
+    resolver = Resolver()
+    splitter = RangeSplitter()
+    sizes = read_table_sizes()
+    # Size hints of whole tables (See SIZE_PREFIX). These are only used to pack the tables &
+    # predict the load of the tasks, never as the list of the tables of a schema.
+    hints = {}
+
+    # Identify the CSV files and process them.
+    for file in sorted(os.listdir(csv_files_location)):
         file_full_path = os.path.join(csv_files_location, file)
 
         if file.startswith("include"):
-            process_csv_file(file_full_path, "include")
+            action = "include"
         elif file.startswith("exclude"):
-            process_csv_file(file_full_path, "exclude")
+            action = "exclude"
+        else:
+            continue
+
+        for table in process_csv_file(
+            file_full_path, action, verbose=verbose, splitter=splitter
+        ):
+            resolver.add(table)
+
+            if (
+                table.size is not None
+                and not table.filters
+                and not (is_pattern(table.schema) or is_pattern(table.table))
+            ):
+                hints[(table.schema, table.table)] = table.size
 
     print("All CSV files have been read.")
     print("-" * 100)
 
-    delete_json_files()
+    resolution = resolver.resolve()
+    print_issues(resolution.issues, verbose)
 
-    # Generate JSON Files
-    create_tasks_for_filter_tables(filter_tables)
+    # Size hints take precedence over "table_sizes_file".
+    sizes = {**sizes, **hints}
+
+    schemas = [
+        schema for schema in resolution.no_filter_tables if not is_pattern(schema)
+    ]
+
+    catalog = {}
+
+    if source_url:
+        catalog = save_table_catalog(source_url, schemas)
+    elif COMPACT_TABLE_MAPPINGS:
+        catalog = read_table_catalog()
 
-    create_tasks_for_no_filter_tables(non_filter_tables)
+    uncataloged = [[schema] for schema in schemas if schema not in catalog]
+
+    if COMPACT_TABLE_MAPPINGS and uncataloged:
+        print_messages(
+            uncataloged,
+            [f"Not compacted, as these schemas are not in: {table_catalog_file}"],
+        )
+
+    # Generate JSON Files
+    try:
+        create_tasks_for_filter_tables(
+            resolution.filter_tables, manifest, sizes=sizes, verbose=verbose
+        )
+        create_tasks_for_no_filter_tables(
+            resolution.no_filter_tables,
+            manifest,
+            sizes=sizes,
+            catalog=catalog,
+            verbose=verbose,
+        )
+    except ValueError as error:
+        print_messages(
+            [
+                [str(error)],
+                [
+                    "Entries with filter conditions of a table should differ in the "
+                    "value of their first filter, which is part of the file name."
+                ],
+            ],
+            ["Error"],
+        )
+        sys.exit(1)
+
+    summary = manifest.finish()
 
     print("JSON files have been generated.")
+    print(
+        f"Added: {len(summary['added'])}, Changed: {len(summary['changed'])}, "
+        f"Removed: {len(summary['removed'])}, Unchanged: {len(manifest.unchanged)}"
+    )
+
+    if verbose:
+        for change in ("added", "changed", "removed"):
+            for file_name in summary[change]:
+                print(f"{change:>8} - {file_name}")
+
     print("-" * 100)
 
+    return summary
+
 
-def process_csv_file(csv_file, action):
+def process_csv_file(csv_file, action, verbose=False, splitter=None):
     """
-    Reads Input "csv" file(s) and segregates tables into (a) tables that have no filter conditions
-    (b) tables that have filter conditions.
+    Reads an Input "csv" file, and yields a Table object for each line. Lines are read one
+    at a time, so files of any size can be processed.
+
+    Following cases are handled.
+        1. Table with no filter conditions (E.g., HR,EMPLOYEES)
+        2. All tables in a schema (E.g., HR,%)
+        3. Table with "partitions-auto" specified (E.g., HR,EMPLOYEES,partitions-auto)
+        4. Table with filter conditions. Each filter is a set of 3 columns
+           (E.g., HR,EMPLOYEES,HIREDATE,GTE,1995-05-01)
+        5. Table to be split into key ranges (E.g., HR,ORDERS,split:ORDER_ID:16). A Table
+           object with a filter condition is yielded for each range (See range_splitter.py)
+
+    Any of these may end with a size hint (E.g., HR,ORDERS,split:ORDER_ID:16,size:2000000).
+    The size of a split table is shared evenly by its ranges.
+
+    Entries of an exclude file are always whole tables (or "%" patterns).
 
     It is assumed that tables with filter conditions are huge. As a result, they should have a dedicated DMS
     task created for them. On the other hand, all tables with no filter conditions under a schema should be handled by
     a single DMS task.
+
+    :param csv_file: CSV file path
+    :param action: "include" or "exclude"
+    :param verbose: If True, each line is printed along with the decision
+    :param splitter: RangeSplitter object used to expand "split:" entries
+
+    :return: Generator of Table objects
     """
     print(f"Processing file: {csv_file}")
     counter = 0
 
-    with open(csv_file, "r") as in_file:
-        for line in in_file:
-            counter += 1
-            decision = ""
+    with open(csv_file, "r", newline="") as in_file:
+        for counter, cols in enumerate(csv.reader(in_file), start=1):
+            cols = [col.strip() for col in cols]
 
-            # Following cases fall into this category.
-            #  1. Table with no filter conditions
-            #  2. All tables in a schema (E.g., HR,%)
-            if len(line.split(",")) == 2:
-                schema, table = line.split(",")
+            if len(cols) < 2 or not cols[0]:
+                continue
 
-                # Remove any special chars
-                schema = schema.strip()
-                table = table.strip("\n").strip()
+            schema, table = cols[0], cols[1]
+
+            size = None
+            if len(cols) > 2 and cols[-1].lower().startswith(SIZE_PREFIX):
+                hint = cols.pop()
+
+                try:
+                    size = float(hint[len(SIZE_PREFIX) :])
+                except ValueError:
+                    print(f"{counter:>5} - Ignoring size hint: {hint}")
+
+            # An exclude entry leaves out the whole table. Anything after the table name
+            # is ignored.
+            if action == "exclude":
                 table_obj = Table(
-                    schema=schema, table=table, filters=[], auto_partitioned=False
+                    schema=schema,
+                    table=table,
+                    filters=[],
+                    auto_partitioned=False,
+                    action=action,
                 )
+                decision = "Exclude" if len(cols) == 2 else "Exclude (Ignoring filters)"
 
-                add_to_non_filter_tables(schema, table_obj)
+            elif len(cols) == 2:
+                table_obj = Table(
+                    schema=schema,
+                    table=table,
+                    filters=[],
+                    auto_partitioned=False,
+                    action=action,
+                    size=size,
+                )
                 decision = "No Filter conditions"
 
-            # These are the tables with filter conditions.
-            if len(line.split(",")) > 3:
-                cols = line.split(",")
-                schema, table = (
-                    cols[0],
-                    cols[1],
-                )  # First two positions have schema, table respectively.
-
-                schema = schema.strip()
-                table = table.strip()
-
-                # Identify filter count. Each filter is a set of 3 columns.
-                filter_count = int(len(cols) - 2) / 3
-                index = 2
-
-                # holds all filter conditions of a given table.
-                filters = list()
-
-                for i in range(0, int(filter_count)):
-                    column, operator, value = (
-                        cols[index],
-                        cols[index + 1],
-                        cols[index + 2],
-                    )
+            # Split the table into key ranges, each range gets a DMS task of its own.
+            # (E.g., HR,ORDERS,split:ORDER_ID:16)
+            elif len(cols) == 3 and cols[2].lower().startswith(SPLIT_PREFIX):
+                if splitter is None:
+                    splitter = RangeSplitter()
 
-                    column = column.strip()
-                    operator = operator.strip()
-                    value = value.strip("\n").strip()
+                column, ranges = splitter.expand(schema, table, cols[2])
 
-                    # Store the filter details in a named table.
-                    filter_condition = Filter(
-                        column=column, operator=operator, value=value
+                if verbose:
+                    print(
+                        f"{counter:>5} - {','.join(cols):<120} - {len(ranges)} key ranges"
                     )
-                    filters.append(filter_condition)
 
-                    # Add the index to process next filter condition.
-                    index += 3
+                if not ranges:
+                    yield Table(
+                        schema=schema,
+                        table=table,
+                        filters=[],
+                        auto_partitioned=False,
+                        action=action,
+                        size=size,
+                    )
 
-                # Create a Table object.
-                table_obj = Table(
-                    schema=schema, table=table, filters=filters, auto_partitioned=False
-                )
+                for operator, value in ranges:
+                    yield Table(
+                        schema=schema,
+                        table=table,
+                        filters=[Filter(column=column, operator=operator, value=value)],
+                        auto_partitioned=False,
+                        action=action,
+                        size=None if size is None else size / len(ranges),
+                    )
 
-                filter_tables.append(table_obj)
-                decision = "Filter conditions"
+                continue
 
             # If an entry has exactly 3 columns, at this point, it is assumed that the 3rd column
             # specifies "partition-auto" specified. This condition needs to be revisited in case more
             # scenarios need to be handled in future.
-            if len(line.split(",")) == 3:
-                schema, table, auto_partition_flag = line.split(",")
+            elif len(cols) == 3:
                 table_obj = Table(
-                    schema=schema, table=table, filters=[], auto_partitioned=True
+                    schema=schema,
+                    table=table,
+                    filters=[],
+                    auto_partitioned=True,
+                    action=action,
+                    size=size,
                 )
-                add_to_non_filter_tables(schema, table_obj)
-
                 decision = "No Filter conditions & Auto Partition"
 
-            print(f"{counter:>5} - {line.strip():<120} - {decision:>20}")
+            # These are the tables with filter conditions.
+            else:
+                filters = [
+                    Filter(column=cols[i], operator=cols[i + 1], value=cols[i + 2])
+                    for i in range(2, len(cols) - 2, 3)
+                ]
+
+                table_obj = Table(
+                    schema=schema,
+                    table=table,
+                    filters=filters,
+                    auto_partitioned=False,
+                    action=action,
+                    size=size,
+                )
+                decision = "Filter conditions"
+
+            if verbose:
+                print(f"{counter:>5} - {','.join(cols):<120} - {decision:>20}")
+
+            yield table_obj
+
+    print(f"{counter} lines read from file: {csv_file}")
 
 
-def add_to_non_filter_tables(schema, obj):
+def save_table_catalog(source_url, schemas, catalog_file=table_catalog_file):
     """
-    Adds a table object to the dict.
+    Reads all the tables of the schemas from the Source DB, and saves them to
+    "catalog_file" (See planner.read_table_catalog).
+
+    :return: Dict with schema as the key, and the set of its table names as the value
     """
+    # Imported here, as only --save_table_catalog needs a connection to the Source DB.
+    from data_validator import Database
+
+    source = Database(source_url)
 
-    # Create an entry for the schema.
-    if schema not in non_filter_tables.keys():
-        non_filter_tables[schema] = []
+    try:
+        catalog = {schema: set(source.tables(schema)) for schema in schemas}
+    finally:
+        source.close()
 
-    # Append the table object.
-    non_filter_tables[schema].append(obj)
+    write_table_catalog(catalog, catalog_file)
 
+    return catalog
 
-def create_tasks_for_no_filter_tables(tables):
+
+def create_tasks_for_no_filter_tables(
+    tables, manifest, sizes=None, catalog=None, verbose=False
+):
     """
     Creates JSON files for tables that DO NOT have any filter conditions. Following tables fall under this
     case.
         1. Tables with no filter conditions (E.g., HR.EMPLOYEE)
         2. Schema with all tables (E.g., HR,%)
         3. Tables with "partitions-auto" specified (E.g., HR,EMPLOYEE,partitions-auto)
+        4. Exclude rules that go along with "%" entries (See resolver.py)
 
     Our intention is to create a single DMS task to process all tables that belong a single schema.
     As a result, a single JSON file will be created for a single schema.
+
+    If TASKS_PER_SCHEMA (config.py) is more than 1, the tables of each schema are spread
+    over that many JSON files, so that each task gets about the same load. Sizes of the
+    tables come from "sizes" (See planner.py).
+
+    A JSON file whose table mapping would go over MAX_RULES_PER_TASK or
+    MAX_TABLE_MAPPING_BYTES is split into more files. If COMPACT_TABLE_MAPPINGS is True,
+    a schema that is not spread is selected with a "%" rule and exclude rules where that
+    takes fewer rules (See planner.find_wildcard_excludes). All the tables of each schema
+    are listed in "catalog" (See planner.read_table_catalog). Schemas that are not in it are
+    not compacted.
+
+    A plan with the tables, rules, bytes & predicted load of each JSON file is printed.
+    """
+    sizes = sizes or {}
+    plan = []
+
+    for schema in tables.keys():
+        groups = pack_tables(tables[schema], sizes, TASKS_PER_SCHEMA)
+        size_of = size_function(tables[schema], sizes)
+        files = []
+
+        for group, load in groups:
+            excludes = None
+
+            if COMPACT_TABLE_MAPPINGS and len(groups) == 1:
+                excludes = find_wildcard_excludes(group, (catalog or {}).get(schema))
+
+            if excludes is not None:
+                data = build_no_filter_table_mapping(group, verbose, excludes)
+
+                if fits_mapping_limits(data):
+                    files.append((group, load, data))
+                    continue
+
+            def build(chunk):
+                return build_no_filter_table_mapping(chunk, verbose)
+
+            def balance(chunk, count):
+                return [part for part, _ in pack_tables(chunk, sizes, count)]
+
+            parts = split_by_mapping_limits(group, build, balance)
+
+            for part, data in parts:
+                files.append((part, sum(size_of(table) for table in part), data))
+
+        for number, (group, load, data) in enumerate(files, start=1):
+            if len(files) == 1:
+                file_name = schema.lower() + ".all_tables.json"
+            else:
+                file_name = f"{schema.lower()}.all_tables.part{number}.json"
+
+            # With no sizes at all, the load is just the no of tables.
+            size = manifest.write(file_name, data, load if sizes else None)
+            plan.append([schema, file_name, len(group), load, len(data["rules"]), size])
+
+    if plan:
+        print_plan(plan)
+
+
+def build_no_filter_table_mapping(tables, verbose=False, wildcard_excludes=None):
     """
-    schemas = tables.keys()
+    Builds the table mapping with a selection rule for each of the tables. Tables with
+    action "exclude" get an exclude rule.
+
+    If "wildcard_excludes" is given, the tables are selected with a single "%" rule, and
+    an exclude rule for each of the table names in it. Tables with "partitions-auto" still
+    get a rule of their own, as it carries their "parallel-load" setting.
+    """
+    data = dict()
+    data["rules"] = []
+
+    # Rule IDs only need to be unique within a file. Numbering them per file keeps the
+    # content of a file unchanged when tables of other schemas change.
     index = 5
 
-    for schema in schemas:
-        data = dict()
-        data["rules"] = []
-        file_name = schema.lower() + ".all_tables.json"
+    def add_rule(schema, table_name, action, parallel_load=False):
+        nonlocal index
+        index += 1
 
-        for table in tables[schema]:
-            print("Processing table: {}.{}".format(table.schema, table.table))
-            index += 1
-
-            entry = {
-                "rule-type": "selection",
-                "rule-id": index,
-                "rule-name": index,
-                "object-locator": {
-                    "schema-name": table.schema,
-                    "table-name": table.table,
-                },
-                "rule-action": "include",
-            }
+        entry = {
+            "rule-type": "selection",
+            "rule-id": index,
+            "rule-name": index,
+            "object-locator": {
+                "schema-name": schema,
+                "table-name": table_name,
+            },
+            "rule-action": action,
+        }
 
-            # If the table is specified to have have "partitions-auto" in the input csv file
-            # create this entry.
-            if table.auto_partitioned:
-                entry["parallel-load"] = {"type": "partitions-auto"}
+        # If the table is specified to have have "partitions-auto" in the input csv file
+        # create this entry.
+        if parallel_load:
+            entry["parallel-load"] = {"type": "partitions-auto"}
 
-            data["rules"].append(entry)
+        data["rules"].append(entry)
 
-        if not homegeneous_migration:
-            # Add a Transformation
-            data["rules"].append(convert_schemas_to_lowercase())
-            data["rules"].append(convert_tables_to_lowercase())
-            data["rules"].append(convert_columns_to_lowercase())
+    if wildcard_excludes is not None and tables:
+        schema = tables[0].schema
+        add_rule(schema, "%", "include")
+
+        for table_name in wildcard_excludes:
+            if verbose:
+                print("Excluding table: {}.{}".format(schema, table_name))
+            add_rule(schema, table_name, "exclude")
+
+        tables = [table for table in tables if table.auto_partitioned]
+
+    for table in tables:
+        if verbose:
+            verb = "Excluding" if table.action == "exclude" else "Processing"
+            print("{} table: {}.{}".format(verb, table.schema, table.table))
+
+        add_rule(table.schema, table.table, table.action, table.auto_partitioned)
 
-        with open(os.path.join(json_files_location, file_name), "w") as fp:
-            json.dump(data, fp)
+    if not homegeneous_migration:
+        # Add a Transformation
+        data["rules"].append(convert_schemas_to_lowercase())
+        data["rules"].append(convert_tables_to_lowercase())
+        data["rules"].append(convert_columns_to_lowercase())
 
+    return data
 
-def create_tasks_for_filter_tables(tables):
+
+def create_tasks_for_filter_tables(tables, manifest, sizes=None, verbose=False):
     """
     Creates JSON files for tables that DO HAVE any filter conditions.
 
-    One JSON file will be created for each table/condition.
+    One JSON file will be created for each table/condition. The load of a file is the size
+    hint of the entry, or else the size of the whole table in "sizes".
     """
-    index = 5
+    sizes = sizes or {}
 
     for table in tables:
         data = dict()
         data["rules"] = []
 
-        print("Processing table: {}.{}".format(table.schema, table.table))
+        # Each file has a single selection rule. Rule IDs 3 - 5 are used by transformations.
+        index = 5
+
+        if verbose:
+            print("Processing table: {}.{}".format(table.schema, table.table))
         index += 1
 
         entry = {
@@ -293,5 +648,8 @@ def create_tasks_for_filter_tables(tables):
         file_name = f"{table.schema}-{table.table}-{part_of_filename}.json"
         file_name = file_name.replace("_", "-").lower()
 
-        with open(os.path.join(json_files_location, file_name), "w") as fp:
-            json.dump(data, fp)
+        load = table.size
+        if load is None:
+            load = sizes.get((table.schema, table.table))
+
+        manifest.write(file_name, data, load)
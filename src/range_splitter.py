@@ -0,0 +1,162 @@
+import csv
+import os
+import sys
+
+from config import split_bounds_file, split_histogram_file
+from utils import print_messages
+
+# ------------------------------------------------------------------------------------------------#
+# Splits a huge table into key ranges, so that each range can be loaded by its own DMS task      #
+# ------------------------------------------------------------------------------------------------#
+# An include file entry like this one:
+#
+#   HR,ORDERS,split:ORDER_ID:16
+#
+# is expanded into 16 ranges of ORDER_ID. The ranges come from either
+#   1. A histogram of the column ("split_histogram_file"). Lines like HR,ORDERS,ORDER_ID,<value>,<rows>
+#      where <rows> is the no of rows with a key up to <value> (and above the previous value).
+#      Ranges are cut so that each one gets about the same no of rows.
+#   2. Min & Max of the column ("split_bounds_file"). Lines like HR,ORDERS,ORDER_ID,1,16000000
+#      The range between them is cut into equal parts.
+#
+# The first range has no lower bound and the last one has no upper bound, so rows with keys
+# outside of the known bounds are not missed. Ranges in between use "between", whose bounds
+# are inclusive: each range starts right after the previous one ends, so no key is loaded twice.
+# Only integer keys are supported.
+SPLIT_PREFIX = "split:"
+
+
+class RangeSplitter:
+    """
+    Reads the bounds & histogram files once, and expands "split:" entries into ranges.
+    """
+
+    def __init__(
+        self, bounds_file=split_bounds_file, histogram_file=split_histogram_file
+    ):
+        self.bounds = {}
+        self.histograms = {}
+
+        for schema, table, column, values in read_key_file(bounds_file):
+            self.bounds[(schema, table, column)] = (int(values[0]), int(values[1]))
+
+        for schema, table, column, values in read_key_file(histogram_file):
+            buckets = self.histograms.setdefault((schema, table, column), [])
+            buckets.append((int(values[0]), int(values[1])))
+
+        for buckets in self.histograms.values():
+            buckets.sort()
+
+    def expand(self, schema, table, directive):
+        """
+        Expands a "split:<column>:<no of ranges>" directive into ranges. The no of ranges
+        must be 1 or more.
+
+        :return: (column, list of (operator, value)). Operator is one of "ste", "between"
+                 or "gte". Value of "between" is "<lower>~<upper>".
+        """
+        try:
+            _, column, count = directive.split(":")
+            count = int(count)
+        except ValueError:
+            count = 0
+
+        if count < 1:
+            exit_with_error(
+                f"Invalid split directive for {schema}.{table}: {directive}",
+                "Expected format: split:<column>:<no of ranges> (E.g., split:ORDER_ID:16)",
+            )
+
+        key = (schema, table, column)
+
+        if key in self.histograms:
+            cuts = cuts_from_histogram(self.histograms[key], count)
+        elif key in self.bounds:
+            cuts = cuts_from_bounds(*self.bounds[key], count)
+        else:
+            exit_with_error(
+                f"No bounds found to split {schema}.{table} on {column}",
+                f"Add a line to {split_bounds_file} (E.g., {schema},{table},{column},<min>,<max>)"
+                f" or to {split_histogram_file}",
+            )
+
+        return column, ranges_from_cuts(cuts)
+
+
+def read_key_file(file_name):
+    """
+    Yields (schema, table, column, remaining values) for each line of the file.
+    """
+    if not os.path.exists(file_name):
+        return
+
+    with open(file_name, "r", newline="") as in_file:
+        for cols in csv.reader(in_file):
+            cols = [col.strip() for col in cols]
+
+            if len(cols) < 5 or not cols[0]:
+                continue
+
+            try:
+                int(cols[3]), int(cols[4])
+            except ValueError:
+                # Header line, or a key that is not an integer.
+                continue
+
+            yield cols[0], cols[1], cols[2], cols[3:]
+
+
+def cuts_from_bounds(lower, upper, count):
+    """
+    Returns the upper bound (inclusive) of each range but the last, when [lower, upper] is
+    cut into "count" ranges of about the same width.
+    """
+    width = upper - lower + 1
+    cuts = [lower + (width * i) // count - 1 for i in range(1, count)]
+
+    return sorted({cut for cut in cuts if lower <= cut < upper})
+
+
+def cuts_from_histogram(buckets, count):
+    """
+    Returns the upper bound (inclusive) of each range but the last, so that each range gets
+    about the same no of rows. Cuts can only be made at bucket boundaries, so a coarse
+    histogram can give fewer ranges than asked for.
+
+    :param buckets: Sorted list of (upper key of the bucket, no of rows in the bucket)
+    """
+    total = sum(rows for _, rows in buckets)
+    cuts = []
+    running_total = 0
+
+    for value, rows in buckets[:-1]:
+        running_total += rows
+
+        # Cut once the rows so far reach the share of the next range.
+        if running_total >= total * (len(cuts) + 1) / count and len(cuts) < count - 1:
+            cuts.append(value)
+
+    return cuts
+
+
+def ranges_from_cuts(cuts):
+    """
+    Turns the cuts into ranges. Keys up to the first cut go to the first range, keys above
+    the last cut go to the last one. No cuts means no ranges: the table is loaded whole.
+    """
+    if not cuts:
+        return []
+
+    ranges = [("ste", str(cuts[0]))]
+
+    for lower, upper in zip(cuts, cuts[1:]):
+        ranges.append(("between", f"{lower + 1}~{upper}"))
+
+    ranges.append(("gte", str(cuts[-1] + 1)))
+
+    return ranges
+
+
+def exit_with_error(*messages):
+    print_messages([[message] for message in messages], ["Error"])
+    sys.exit(1)
@@ -0,0 +1,288 @@
+import collections
+import re
+
+from utils import print_rows
+
+# ------------------------------------------------------------------------------------------------#
+# Resolves the entries of the include & exclude files into the tables each task should load     #
+# ------------------------------------------------------------------------------------------------#
+# Entries are indexed by schema, with exact table names in dicts and "%" patterns kept apart, so
+# that resolving N entries takes about N dict lookups plus one regex match per entry for the
+# schemas that have patterns.
+#
+# Rules applied:
+#   1. An excluded table is not loaded. Include entries it matches are dropped, and each "%"
+#      include of its schema gets an exclude rule for it, as DMS applies exclude rules only
+#      within the task they are in.
+#   2. A table with filter conditions gets tasks of its own. If the table is also included
+#      without filters, the plain entry is dropped, and "%" includes get an exclude rule for
+#      it. Otherwise the rows of the filter tasks would be loaded a second time.
+#   3. Repeated entries are loaded once.
+#
+# Every entry that is dropped or changed is reported as an Issue.
+Issue = collections.namedtuple("Issue", "kind, schema, table, detail")
+
+ISSUE_HEADERS = ["Kind", "Schema", "Table", "Detail"]
+
+# Result of a resolution.
+#   no_filter_tables: Dict with schema as the key, and a list of Table objects as the value.
+#                     Exclude rules come as Table objects with action "exclude".
+#   filter_tables: List of Table objects with filter conditions
+Resolution = collections.namedtuple(
+    "Resolution", "no_filter_tables, filter_tables, issues"
+)
+
+
+def is_pattern(name):
+    return "%" in name
+
+
+def pattern_to_regex(pattern):
+    """
+    Returns a regex for a DMS name pattern, where "%" matches any no of characters.
+    """
+    return ".*".join(re.escape(part) for part in pattern.split("%"))
+
+
+class PatternSet:
+    """
+    A set of "%" patterns, matched with a single compiled regex.
+    """
+
+    def __init__(self):
+        self.patterns = []
+        self.regex = None
+
+    def add(self, pattern):
+        self.patterns.append(pattern)
+        self.regex = None
+
+    def match(self, name):
+        if not self.patterns:
+            return False
+
+        if self.regex is None:
+            self.regex = re.compile(
+                "|".join(f"(?:{pattern_to_regex(p)})" for p in self.patterns)
+            )
+
+        return self.regex.fullmatch(name) is not None
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+
+class Resolver:
+    """
+    Collects the entries of the input files, and resolves them once all have been read.
+
+        resolver = Resolver()
+        for table in tables:
+            resolver.add(table)
+        resolution = resolver.resolve()
+    """
+
+    def __init__(self):
+        # Include entries with no filter conditions: schema -> {table name: Table}
+        self.includes = {}
+        # Include entries with "%" in the table name: schema -> {pattern: Table}
+        self.include_patterns = {}
+        # Include entries with filter conditions: (schema, table) -> {filters: Table}
+        self.filtered = {}
+
+        # Exclude entries: schema -> {table name or pattern: Table}
+        self.excludes = {}
+        # Exclude entries with "%" in the schema name
+        self.schema_pattern_excludes = []
+
+        self.issues = []
+
+    def add(self, table):
+        """
+        Adds an entry of an include or exclude file.
+        """
+        if table.action == "exclude":
+            self.add_exclude(table)
+        elif table.filters:
+            by_filters = self.filtered.setdefault((table.schema, table.table), {})
+            key = tuple(table.filters)
+
+            if key in by_filters:
+                self.issue("duplicate", table, "Same filter conditions listed again")
+            else:
+                by_filters[key] = table
+        else:
+            if is_pattern(table.table):
+                entries = self.include_patterns.setdefault(table.schema, {})
+            else:
+                entries = self.includes.setdefault(table.schema, {})
+
+            previous = entries.get(table.table)
+
+            if previous is not None:
+                self.issue("duplicate", table, "Table listed again")
+
+                # Keep "partitions-auto" if either entry has it.
+                if table.auto_partitioned and not previous.auto_partitioned:
+                    entries[table.table] = table
+            else:
+                entries[table.table] = table
+
+    def add_exclude(self, table):
+        table = table._replace(filters=[], auto_partitioned=False)
+
+        if is_pattern(table.schema):
+            self.schema_pattern_excludes.append(table)
+        else:
+            self.excludes.setdefault(table.schema, {})[table.table] = table
+
+    def issue(self, kind, table, detail):
+        self.issues.append(Issue(kind, table.schema, table.table, detail))
+
+    def excludes_of(self, schema):
+        """
+        Returns the exclude entries that apply to the schema: (dict of exact table names,
+        dict of table name patterns), both with Table objects as the values.
+        """
+        names, patterns = {}, {}
+
+        for table_name, table in self.excludes.get(schema, {}).items():
+            (patterns if is_pattern(table_name) else names)[table_name] = table
+
+        for table in self.schema_pattern_excludes:
+            if re.fullmatch(pattern_to_regex(table.schema), schema):
+                patterns.setdefault(table.table, table._replace(schema=schema))
+
+        return names, patterns
+
+    def resolve(self):
+        """
+        :return: Resolution object
+        """
+        schemas = dict.fromkeys([*self.includes, *self.include_patterns])
+        schemas.update(dict.fromkeys(schema for schema, _ in self.filtered))
+
+        excludes = {}
+
+        for schema in schemas:
+            names, patterns = self.excludes_of(schema)
+            matcher = PatternSet()
+
+            for pattern in patterns:
+                matcher.add(pattern)
+
+            excludes[schema] = (names, patterns, matcher)
+
+        used = set()
+
+        def is_excluded(schema, table_name):
+            names, _, matcher = excludes[schema]
+
+            if table_name in names:
+                used.add((schema, table_name))
+                return True
+
+            return matcher.match(table_name)
+
+        filter_tables = []
+        # Tables with filter tasks: schema -> {table name: Table}
+        filtered = {}
+
+        for (schema, table_name), by_filters in self.filtered.items():
+            if not is_pattern(table_name) and is_excluded(schema, table_name):
+                for table in by_filters.values():
+                    self.issue(
+                        "excluded", table, "Filter task dropped, table is excluded"
+                    )
+                continue
+
+            filter_tables.extend(by_filters.values())
+            filtered.setdefault(schema, {})[table_name] = next(
+                iter(by_filters.values())
+            )
+
+        no_filter_tables = {}
+
+        # Schemas in the order they were first read
+        for schema in dict.fromkeys([*self.includes, *self.include_patterns]):
+            include_patterns = PatternSet()
+
+            for pattern in self.include_patterns.get(schema, {}):
+                include_patterns.add(pattern)
+
+            tables = []
+
+            for table_name, table in self.includes.get(schema, {}).items():
+                if is_excluded(schema, table_name):
+                    self.issue(
+                        "excluded", table, "Include entry dropped, table is excluded"
+                    )
+                elif table_name in filtered.get(schema, {}):
+                    self.issue(
+                        "overlap",
+                        table,
+                        "Include entry dropped, the table has tasks with filter conditions",
+                    )
+                elif table.auto_partitioned or not include_patterns.match(table_name):
+                    tables.append(table)
+                else:
+                    self.issue(
+                        "redundant", table, "Include entry dropped, a % entry covers it"
+                    )
+
+            tables.extend(self.include_patterns.get(schema, {}).values())
+
+            if include_patterns:
+                names, patterns, _ = excludes[schema]
+
+                # Exclude rules for the excluded tables the "%" entries would pick up
+                for table_name, table in names.items():
+                    if include_patterns.match(table_name):
+                        used.add((schema, table_name))
+                        tables.append(table)
+
+                tables.extend(patterns.values())
+
+                # ... and for the tables with filter tasks
+                for table_name, table in filtered.get(schema, {}).items():
+                    if is_pattern(table_name) or include_patterns.match(table_name):
+                        self.issue(
+                            "overlap",
+                            table,
+                            "Excluded from the % entry, the table has tasks with filter "
+                            "conditions",
+                        )
+                        tables.append(
+                            table._replace(
+                                filters=[], auto_partitioned=False, action="exclude"
+                            )
+                        )
+
+            if tables:
+                no_filter_tables[schema] = tables
+
+        for schema, names in self.excludes.items():
+            for table_name, table in names.items():
+                if not is_pattern(table_name) and (schema, table_name) not in used:
+                    self.issue(
+                        "unused", table, "Exclude entry matches no included table"
+                    )
+
+        return Resolution(no_filter_tables, filter_tables, self.issues)
+
+
+def print_issues(issues, verbose=False):
+    """
+    Prints the no of issues of each kind, and each issue if "verbose" is True.
+    """
+    if not issues:
+        return
+
+    counts = collections.Counter(issue.kind for issue in issues)
+    print(
+        "Include/Exclude entries resolved: "
+        + ", ".join(f"{kind}: {count}" for kind, count in sorted(counts.items()))
+    )
+
+    if verbose:
+        print_rows(issues, ISSUE_HEADERS)
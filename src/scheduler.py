@@ -0,0 +1,553 @@
+import collections
+import csv
+import heapq
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import (INSTANCE_MAX_RUNNING_TASKS, MAX_API_ATTEMPTS,
+                    MAX_RUNNING_TASKS, POLL_CHUNK_SIZE, POLL_MAX_DELAY,
+                    POLL_MIN_DELAY, TASK_START_WORKERS, logs_location,
+                    schedule_history_file, task_priorities_file)
+from planner import mapping_load
+from task_poller import (DELETED, FAILURE_STATES, FAILURE_STOP_REASONS,
+                         describe_task_states, print_progress)
+from utils import (AdaptiveBackoff, call_with_backoff, get_error_code,
+                   print_messages, print_rows, task_id_prefix)
+
+# ------------------------------------------------------------------------------------------------#
+# Starts DMS tasks in waves, keeping each replication instance within its budget                 #
+# ------------------------------------------------------------------------------------------------#
+# Tasks are queued by replication instance. An instance runs at most its budget of tasks at a
+# time (MAX_RUNNING_TASKS & INSTANCE_MAX_RUNNING_TASKS in config.py). As soon as a running task
+# stops, the next task of its instance is started: the highest priority first, then the
+# largest predicted load, so that the longest tasks do not start last and stretch the run.
+#
+# The makespan of each instance (from its first task starting to its last task stopping) is
+# printed, and appended to "schedule_history_file" along with the budget. Comparing the runs
+# in that file shows which budget gets the tasks done the soonest.
+ScheduledTask = collections.namedtuple(
+    "ScheduledTask", "task_arn, task_id, instance_arn, priority, load"
+)
+
+# Outcome of running a task. "started" & "ended" are seconds since the start of the run (None
+# if the task was not started). "status" is the final status of the task (E.g., "stopped").
+# "error" is the error starting the task, or the stop reason of a task that stopped on an
+# error (See task_poller.FAILURE_STOP_REASONS).
+TaskRun = collections.namedtuple("TaskRun", "task, started, ended, status, error")
+
+NOT_STARTED = "not started"
+
+# States in which a task no longer holds a slot of its instance
+DONE_STATES = {"stopped", DELETED, *FAILURE_STATES}
+
+INSTANCE_REPORT_HEADERS = [
+    "Replication Instance",
+    "Budget",
+    "Tasks",
+    "Stopped",
+    "Failed",
+    "Not Started",
+    "Peak Running",
+    "Avg Running",
+    "Paused sec",
+    "Makespan sec",
+]
+
+TASK_RUN_FIELDS = [
+    "task_id",
+    "task_arn",
+    "instance_arn",
+    "priority",
+    "load",
+    "started_sec",
+    "ended_sec",
+    "run_sec",
+    "status",
+    "error",
+]
+
+HISTORY_FIELDS = [
+    "run_time",
+    "instance_arn",
+    "budget",
+    "tasks",
+    "stopped",
+    "failed",
+    "not_started",
+    "peak_running",
+    "avg_running",
+    "paused_sec",
+    "load",
+    "makespan_sec",
+]
+
+
+def read_task_priorities(priority_file=task_priorities_file):
+    """
+    Reads the priority of the tasks from a CSV file with lines like: hr.employees.json,10
+
+    A line names a JSON file, or the ID of a task without its time suffix (E.g.,
+    hr-employees). Tasks with a higher priority are started first. Tasks that are not listed
+    have priority 0. The file is optional.
+
+    :return: Dict with the task ID prefix (See utils.task_id_prefix) as the key, and
+             priority as the value
+    """
+    priorities = {}
+
+    if not os.path.exists(priority_file):
+        return priorities
+
+    with open(priority_file, "r", newline="") as in_file:
+        for cols in csv.reader(in_file):
+            cols = [col.strip() for col in cols]
+
+            if len(cols) < 2 or not cols[0]:
+                continue
+
+            try:
+                priorities[task_id_prefix(cols[0])] = float(cols[1])
+            except ValueError:
+                # Header line, or a priority that is not a number.
+                continue
+
+    return priorities
+
+
+def get_budget(instance_arn, budget=None):
+    """
+    Returns the max no of tasks that may run at the same time on the replication instance,
+    or None if there is no limit.
+
+    :param budget: If given, overrides the budget of every instance in config.py
+    """
+    if budget is None:
+        budget = INSTANCE_MAX_RUNNING_TASKS.get(instance_arn, MAX_RUNNING_TASKS)
+
+    # No task could ever be started, and the tasks would be waited for forever.
+    if budget < 0:
+        print_messages(
+            [[f"{instance_arn}: {budget}"]],
+            ["Max running tasks can not be negative (0 means no limit)"],
+        )
+        sys.exit(1)
+
+    return budget or None
+
+
+def stopped_cleanly(task_run):
+    """
+    Tells whether the task stopped without an error.
+    """
+    return task_run.status == "stopped" and not task_run.error
+
+
+def fits_budget(task_count, budget=None):
+    """
+    Tells whether "task_count" tasks can all run at once, whichever instance they are on.
+    """
+    if budget is None:
+        budgets = [MAX_RUNNING_TASKS, *INSTANCE_MAX_RUNNING_TASKS.values()]
+    else:
+        budgets = [budget]
+
+    return all(not limit or task_count <= limit for limit in budgets)
+
+
+def describe_scheduled_tasks(
+    dms, arn_list, sizes, priorities, chunk_size=POLL_CHUNK_SIZE
+):
+    """
+    Fetches the replication instance & table mapping of the tasks, in batches of
+    "chunk_size" ARNs, and predicts the load of each task from its table mapping.
+
+    :param sizes: Dict with (schema, table) as the key, and size as the value
+    :param priorities: See read_task_priorities
+
+    :return: (List of ScheduledTask in the same order as the ARNs, List of ARNs DMS does not
+             know about)
+    """
+    backoff = AdaptiveBackoff()
+    tasks = {}
+
+    for i in range(0, len(arn_list), chunk_size):
+        chunk = arn_list[i : i + chunk_size]
+        kwargs = {
+            "Filters": [{"Name": "replication-task-arn", "Values": chunk}],
+            "MaxRecords": min(max(20, len(chunk)), 100),
+        }
+
+        while True:
+            try:
+                response, _ = call_with_backoff(
+                    dms.describe_replication_tasks, backoff, MAX_API_ATTEMPTS, **kwargs
+                )
+            except Exception as error:
+                # Raised when none of the tasks exist.
+                if get_error_code(error) == "ResourceNotFoundFault":
+                    break
+                raise
+
+            for task in response["ReplicationTasks"]:
+                task_id = task["ReplicationTaskIdentifier"]
+                # Task IDs end with 5 parts of time (See dms.task_id_suffix).
+                priority = priorities.get(
+                    task_id, priorities.get(task_id.rsplit("-", 5)[0], 0)
+                )
+
+                tasks[task["ReplicationTaskArn"]] = ScheduledTask(
+                    task_arn=task["ReplicationTaskArn"],
+                    task_id=task_id,
+                    instance_arn=task["ReplicationInstanceArn"],
+                    priority=priority,
+                    load=mapping_load(json.loads(task["TableMappings"]), sizes),
+                )
+
+            if not response.get("Marker"):
+                break
+
+            kwargs["Marker"] = response["Marker"]
+
+    return (
+        [tasks[arn] for arn in arn_list if arn in tasks],
+        [arn for arn in arn_list if arn not in tasks],
+    )
+
+
+class WaveScheduler:
+    """
+    Starts the tasks so that each replication instance runs at most its budget of tasks at a
+    time, and waits for all of them to stop.
+
+        scheduler = WaveScheduler(dms, start_task)
+        runs = scheduler.run(tasks)
+        scheduler.print_report()
+
+    The DMS client & the function that starts a task are passed in, so that the scheduler
+    can be driven against a stand-in (See benchmark.py).
+    """
+
+    def __init__(
+        self,
+        dms,
+        start_task,
+        budget=None,
+        workers=TASK_START_WORKERS,
+        chunk_size=POLL_CHUNK_SIZE,
+        min_delay=POLL_MIN_DELAY,
+        max_delay=POLL_MAX_DELAY,
+        on_progress=None,
+        backpressure=None,
+    ):
+        """
+        :param dms: boto3 DMS client
+        :param start_task: Function that starts a task, given its ARN. Raises an exception
+                           if the task could not be started.
+        :param budget: Overrides the budget of every instance (See get_budget)
+        :param workers: No of tasks started in parallel, when several slots free up at once
+        :param chunk_size: No of ARNs passed in each "describe_replication_tasks" call
+        :param min_delay: Seconds between polls, right after a change
+        :param max_delay: Max seconds between polls
+        :param on_progress: Function called after each poll with (elapsed seconds, Counter
+                            of states). Defaults to printing a line with the counts.
+        :param backpressure: Backpressure object. If given, tasks are started on an
+                             instance only as far as its metrics allow (See
+                             backpressure.py).
+        """
+        self.dms = dms
+        self.start_task = start_task
+        self.budget = budget
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.on_progress = on_progress or print_progress
+        self.backpressure = backpressure
+        self.backoff = AdaptiveBackoff()
+        self.runs = []
+        self.peak_running = collections.Counter()
+        self.elapsed = 0.0
+
+    def try_start(self, task):
+        try:
+            self.start_task(task.task_arn)
+            print("Task: {} has been started".format(task.task_arn))
+            return ""
+        except Exception as error:
+            print("Error starting task with ARN: {}".format(task.task_arn))
+            print(error)
+            return str(error)
+
+    def run(self, tasks):
+        """
+        :param tasks: List of ScheduledTask
+
+        :return: List of TaskRun, in the same order as the tasks
+        """
+        start_time = time.monotonic()
+
+        # Instance ARN -> heap of (-priority, -load, position, task)
+        queues = {}
+
+        for position, task in enumerate(tasks):
+            heapq.heappush(
+                queues.setdefault(task.instance_arn, []),
+                (-task.priority, -task.load, position, task),
+            )
+
+        # ARN -> (task, seconds at which it was started)
+        running = {}
+        running_count = collections.Counter()
+        statuses = {}
+        stop_reasons = {}
+        runs = {}
+        delay = self.min_delay
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            while running or any(queues.values()):
+                batch = []
+
+                if self.backpressure is not None:
+                    # Metrics of all the instances with queued tasks, in one reading
+                    self.backpressure.refresh(
+                        [arn for arn, queue in queues.items() if queue]
+                    )
+
+                for instance_arn, queue in queues.items():
+                    budget = get_budget(instance_arn, self.budget)
+                    count = len(queue)
+
+                    if budget is not None:
+                        count = min(count, budget - running_count[instance_arn])
+
+                    if count > 0 and self.backpressure is not None:
+                        count = self.backpressure.take(instance_arn, count)
+
+                    for _ in range(count):
+                        batch.append(heapq.heappop(queue)[-1])
+                        running_count[instance_arn] += 1
+
+                for task, error in zip(batch, executor.map(self.try_start, batch)):
+                    if error:
+                        running_count[task.instance_arn] -= 1
+                        runs[task.task_arn] = TaskRun(
+                            task, None, None, NOT_STARTED, error
+                        )
+                    else:
+                        running[task.task_arn] = (task, time.monotonic() - start_time)
+
+                for instance_arn, count in running_count.items():
+                    self.peak_running[instance_arn] = max(
+                        self.peak_running[instance_arn], count
+                    )
+
+                if not running:
+                    if not batch:
+                        # Held back by the backpressure, until the next reading
+                        time.sleep(self.min_delay)
+                    continue
+
+                arns = list(running)
+                changed = finished = False
+
+                for i in range(0, len(arns), self.chunk_size):
+                    chunk = arns[i : i + self.chunk_size]
+
+                    for arn, state in describe_task_states(
+                        self.dms, chunk, self.backoff
+                    ).items():
+                        stop_reasons[arn] = state["StopReason"]
+
+                        if statuses.get(arn) != state["Status"]:
+                            statuses[arn] = state["Status"]
+                            changed = True
+
+                now = time.monotonic() - start_time
+
+                for arn in arns:
+                    status = statuses[arn]
+
+                    if status in DONE_STATES:
+                        task, started = running.pop(arn)
+                        running_count[task.instance_arn] -= 1
+                        error = ""
+
+                        if stop_reasons[arn] in FAILURE_STOP_REASONS:
+                            error = stop_reasons[arn]
+
+                        runs[arn] = TaskRun(task, started, now, status, error)
+                        finished = True
+
+                states = collections.Counter(statuses[arn] for arn in running)
+                states["queued"] = sum(len(queue) for queue in queues.values())
+                self.on_progress(now, +states)
+
+                # Start the next tasks right away.
+                if finished and any(queues.values()):
+                    delay = self.min_delay
+                    continue
+
+                if not running:
+                    continue
+
+                delay = self.min_delay if changed else min(delay * 2, self.max_delay)
+                time.sleep(random.uniform(delay / 2, delay))
+
+        self.elapsed = time.monotonic() - start_time
+        self.runs = [runs[task.task_arn] for task in tasks]
+
+        return self.runs
+
+    def instance_report(self):
+        """
+        Returns a row per replication instance: instance, budget, tasks, stopped, failed &
+        not started tasks (a task that stopped on an error is counted as failed), peak &
+        average no of tasks running, seconds paused by the backpressure, and makespan in
+        seconds.
+        """
+        rows = []
+        by_instance = collections.defaultdict(list)
+
+        for task_run in self.runs:
+            by_instance[task_run.task.instance_arn].append(task_run)
+
+        for instance_arn, runs in by_instance.items():
+            started = [run for run in runs if run.started is not None]
+            makespan = 0.0
+            busy = 0.0
+
+            if started:
+                makespan = max(run.ended for run in started) - min(
+                    run.started for run in started
+                )
+                busy = sum(run.ended - run.started for run in started)
+
+            statuses = collections.Counter(run.status for run in runs)
+            stopped = sum(1 for run in runs if stopped_cleanly(run))
+            paused = ""
+
+            if self.backpressure is not None:
+                paused = f"{self.backpressure.paused_time(instance_arn):.0f}"
+
+            rows.append(
+                [
+                    instance_arn,
+                    get_budget(instance_arn, self.budget) or "",
+                    len(runs),
+                    stopped,
+                    len(started) - stopped,
+                    statuses[NOT_STARTED],
+                    self.peak_running[instance_arn],
+                    f"{busy / makespan:.1f}" if makespan > 0 else "",
+                    paused,
+                    f"{makespan:.0f}",
+                ]
+            )
+
+        return rows
+
+    def print_report(self, output="table"):
+        print_rows(
+            self.instance_report(),
+            INSTANCE_REPORT_HEADERS,
+            output=output,
+            keys=[
+                header.lower().replace(" ", "_") for header in INSTANCE_REPORT_HEADERS
+            ],
+        )
+
+    def write_runs(self):
+        """
+        Writes the outcome of each task to a CSV file in "logs" directory.
+        """
+        current_time = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+        result_file = os.path.join(logs_location, f"run_dms_tasks_{current_time}.csv")
+
+        with open(result_file, "w", newline="") as file_handle:
+            writer = csv.writer(file_handle)
+            writer.writerow(TASK_RUN_FIELDS)
+
+            for run in self.runs:
+                run_sec = ""
+
+                if run.started is not None:
+                    run_sec = f"{run.ended - run.started:.1f}"
+
+                writer.writerow(
+                    [
+                        run.task.task_id,
+                        run.task.task_arn,
+                        run.task.instance_arn,
+                        run.task.priority,
+                        run.task.load,
+                        "" if run.started is None else f"{run.started:.1f}",
+                        "" if run.ended is None else f"{run.ended:.1f}",
+                        run_sec,
+                        run.status,
+                        run.error,
+                    ]
+                )
+
+        print(f"Task run results written to: {result_file}")
+
+    def record_history(self, history_file=schedule_history_file):
+        """
+        Appends the budget & makespan of each instance to "history_file".
+        """
+        run_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        loads = collections.Counter()
+
+        for run in self.runs:
+            loads[run.task.instance_arn] += run.task.load
+
+        new_file = not os.path.exists(history_file)
+
+        with open(history_file, "a", newline="") as file_handle:
+            writer = csv.writer(file_handle)
+
+            if new_file:
+                writer.writerow(HISTORY_FIELDS)
+
+            for row in self.instance_report():
+                writer.writerow([run_time, *row[:-1], loads[row[0]], row[-1]])
+
+    def summary(self, not_found=()):
+        """
+        Returns a summary text of the run.
+
+        :param not_found: ARNs that could not be scheduled, as DMS does not know about them
+        """
+        hours, remainder = divmod(int(self.elapsed), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        stopped = [run for run in self.runs if stopped_cleanly(run)]
+        not_started = [run for run in self.runs if run.status == NOT_STARTED]
+        failed = [
+            run
+            for run in self.runs
+            if run.status != NOT_STARTED and not stopped_cleanly(run)
+        ]
+
+        lines = [
+            f"DMS run completed in {hours:02d}:{minutes:02d}:{seconds:02d}",
+            f"Tasks    : {len(self.runs) + len(not_found)}",
+            f"Stopped  : {len(stopped)}",
+            f"Failed   : {len(failed)}",
+            f"Not started (errors): {len(not_started) + len(not_found)}",
+        ]
+
+        for run in failed:
+            reason = f"{run.status}: {run.error}" if run.error else run.status
+            lines.append(f"  FAILED: {run.task.task_arn} ({reason})")
+
+        for run in not_started:
+            lines.append(f"  NOT STARTED: {run.task.task_arn} - {run.error}")
+
+        for task_arn in not_found:
+            lines.append(f"  NOT STARTED: {task_arn} - Task not found")
+
+        return "\n".join(lines)
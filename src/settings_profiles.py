@@ -0,0 +1,216 @@
+import collections
+import copy
+import json
+import os
+import sys
+import threading
+
+from config import (SETTINGS_SIZE_CLASSES, json_manifest_file,
+                    task_settings_overrides_file)
+from planner import mapping_load, read_table_sizes
+from task_settings import settings_profiles, task_settings
+from utils import print_messages, task_id_prefix
+
+# ------------------------------------------------------------------------------------------------#
+# Settings of each DMS task, layered: base -> size class -> override of the task                  #
+# ------------------------------------------------------------------------------------------------#
+# The size class of a task comes from its predicted load, which "generate_json_files" records
+# in the manifest of the JSON files. If the manifest has no load for a file, it is predicted
+# from the table mapping & "table_sizes_file" (See planner.mapping_load).
+#
+# Overrides are read from "task_settings_overrides_file", a JSON object like:
+#   {
+#       "hr.all_tables.json": {"profile": "large"},
+#       "sales-orders": {"FullLoadSettings": {"CommitRate": 50000}}
+#   }
+# A key names a JSON file, or the ID of a task without its time suffix. A key also applies to
+# the tasks whose ID starts with it and a "-" (E.g., "sales-orders" covers all the slices of
+# SALES.ORDERS). The longest key wins. "profile" picks the size class, the rest is layered
+# over it.
+#
+# Merged settings are cached by (size class, override), so that they are merged & serialized
+# once, however many tasks share them.
+BASE_PROFILE = "base"
+
+ChosenSettings = collections.namedtuple("ChosenSettings", "profile, settings")
+
+
+def merge_settings(base, overlay):
+    """
+    Returns a copy of "base", with the values of "overlay" layered over it. Nested dicts are
+    merged, any other value (lists included) is replaced.
+    """
+    merged = copy.deepcopy(base)
+
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+
+    return merged
+
+
+def size_class(load, size_classes=SETTINGS_SIZE_CLASSES):
+    """
+    Returns the name of the first class whose upper bound is above the load, or BASE_PROFILE
+    if the load is not known.
+    """
+    if load is None:
+        return BASE_PROFILE
+
+    for name, upper_bound in size_classes:
+        if upper_bound is None or load < upper_bound:
+            return name
+
+    return size_classes[-1][0]
+
+
+def read_task_loads(manifest_file=json_manifest_file):
+    """
+    :return: Dict with JSON file name as the key, and its predicted load as the value
+    """
+    if not os.path.exists(manifest_file):
+        return {}
+
+    with open(manifest_file, "r") as fp:
+        return json.load(fp).get("loads", {})
+
+
+def read_settings_overrides(
+    overrides_file=task_settings_overrides_file, profiles=settings_profiles
+):
+    """
+    Reads the settings overrides of the tasks. The file is optional.
+
+    :return: Dict with the task ID prefix (See utils.task_id_prefix) as the key, and the
+             override as the value
+    """
+    if not os.path.exists(overrides_file):
+        return {}
+
+    try:
+        with open(overrides_file, "r") as fp:
+            overrides = {
+                task_id_prefix(key): value for key, value in json.load(fp).items()
+            }
+    except (ValueError, AttributeError) as error:
+        print_messages(
+            [[f"Error reading file: {overrides_file}"], [str(error)]], ["Error"]
+        )
+        sys.exit(1)
+
+    unknown = [
+        [f"{key}: {override['profile']}"]
+        for key, override in overrides.items()
+        if "profile" in override
+        and override["profile"] not in profiles
+        and override["profile"] != BASE_PROFILE
+    ]
+
+    if unknown:
+        print_messages(unknown, [f"Unknown profiles in file: {overrides_file}"])
+        sys.exit(1)
+
+    return overrides
+
+
+class SettingsProfiles:
+    """
+    Chooses the settings of the DMS task of each JSON file.
+
+        profiles = SettingsProfiles()
+        chosen = profiles.choose(json_file, table_mapping)
+        print(chosen.profile)   # E.g., "large" or "large+sales-orders"
+
+    One object is shared by all the tasks created in a run. It is thread safe.
+    """
+
+    def __init__(
+        self,
+        base=task_settings,
+        profiles=settings_profiles,
+        size_classes=SETTINGS_SIZE_CLASSES,
+        loads=None,
+        overrides=None,
+        sizes=None,
+    ):
+        """
+        :param base: Settings of all the tasks (JSON string)
+        :param profiles: Dict of size class -> settings layered over "base"
+        :param loads: Dict of JSON file -> predicted load. Read from the manifest if None.
+        :param overrides: Dict of task ID prefix -> override. Read from
+                          "task_settings_overrides_file" if None.
+        :param sizes: Table sizes, used for files with no load in "loads". Read from
+                      "table_sizes_file" if None.
+        """
+        self.base = json.loads(base)
+        self.profiles = profiles
+        self.size_classes = size_classes
+        self.loads = read_task_loads() if loads is None else loads
+        self.overrides = read_settings_overrides() if overrides is None else overrides
+        self.sizes = sizes
+        self.lock = threading.Lock()
+        # (size class, override key) -> settings (JSON string)
+        self.cache = {}
+
+    def find_override(self, json_file):
+        """
+        :return: Key of the override of the task of the JSON file, or None
+        """
+        prefix = task_id_prefix(json_file)
+        keys = [
+            key
+            for key in self.overrides
+            if prefix == key or prefix.startswith(key + "-")
+        ]
+
+        return max(keys, key=len) if keys else None
+
+    def predict_load(self, json_file, table_mapping):
+        if json_file in self.loads:
+            return self.loads[json_file]
+
+        if table_mapping is None:
+            return None
+
+        with self.lock:
+            if self.sizes is None:
+                self.sizes = read_table_sizes()
+
+        # With no sizes at all, there is nothing to tell tasks apart.
+        return mapping_load(table_mapping, self.sizes) if self.sizes else None
+
+    def choose(self, json_file, table_mapping=None):
+        """
+        :param table_mapping: Table mapping of the file (Dict with "rules"), used when its
+                              load is not in the manifest
+
+        :return: ChosenSettings, with the name of the profile and the settings (JSON string)
+        """
+        override_key = self.find_override(json_file)
+        override = self.overrides.get(override_key, {})
+
+        if "profile" in override:
+            name = override["profile"]
+        else:
+            name = size_class(
+                self.predict_load(json_file, table_mapping), self.size_classes
+            )
+
+        cache_key = (name, override_key)
+
+        with self.lock:
+            if cache_key not in self.cache:
+                settings = merge_settings(self.base, self.profiles.get(name, {}))
+                settings = merge_settings(
+                    settings,
+                    {key: value for key, value in override.items() if key != "profile"},
+                )
+                self.cache[cache_key] = json.dumps(settings)
+
+            settings = self.cache[cache_key]
+
+        profile = name if override_key is None else f"{name}+{override_key}"
+
+        return ChosenSettings(profile=profile, settings=settings)
@@ -0,0 +1,166 @@
+import collections
+
+# ------------------------------------------------------------------------------------------------#
+# Table statistics of DMS tasks, stored column by column                                          #
+# ------------------------------------------------------------------------------------------------#
+# Name of the column, and the key in the "describe_table_statistics" response it comes from.
+COLUMNS = [
+    ("task_id", None),
+    ("schema", "SchemaName"),
+    ("table", "TableName"),
+    ("state", "TableState"),
+    ("inserts", "Inserts"),
+    ("updates", "Updates"),
+    ("deletes", "Deletes"),
+    ("full_load_rows", "FullLoadRows"),
+    ("full_load_error_rows", "FullLoadErrorRows"),
+    ("full_load_start_time", "FullLoadStartTime"),
+    ("full_load_end_time", "FullLoadEndTime"),
+]
+
+HEADERS = [
+    "Task ID",
+    "Schema",
+    "Table",
+    "State",
+    "Inserts",
+    "Updates",
+    "Deletes",
+    "Full Load Rows",
+    "Full Load Error Rows",
+    "Full Load Start Time",
+    "Full Load End Time",
+]
+
+ROLLUP_HEADERS = {
+    "schema": [
+        "Schema",
+        "Tables",
+        "Full Load Rows",
+        "Full Load Error Rows",
+        "Load Duration",
+    ],
+    "task_id": [
+        "Task ID",
+        "Tables",
+        "Full Load Rows",
+        "Full Load Error Rows",
+        "Load Duration",
+    ],
+}
+
+
+class TableStatistics:
+    """
+    Table statistics of one or more DMS tasks.
+
+    Each column is a list, so that statistics of thousands of tables stay compact, and
+    totals can be computed over a single column without touching the others.
+    """
+
+    def __init__(self):
+        self.columns = {name: [] for name, _ in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns["task_id"])
+
+    def append(self, task_arn, table_statistics):
+        """
+        Adds an entry of the "describe_table_statistics" response.
+        """
+        self.columns["task_id"].append(task_arn.split(":")[-1])
+
+        for name, key in COLUMNS[1:]:
+            self.columns[name].append(table_statistics.get(key))
+
+    def extend(self, other):
+        """
+        Merges the statistics of another TableStatistics object into this one.
+        """
+        for name in self.columns:
+            self.columns[name].extend(other.columns[name])
+
+    def rows(self):
+        """
+        Yields one row per table, sorted by schema & table name.
+        """
+        order = sorted(
+            range(len(self)),
+            key=lambda i: (self.columns["schema"][i], self.columns["table"][i]),
+        )
+
+        for i in order:
+            row = [self.columns[name][i] for name, _ in COLUMNS]
+            row[-2] = format_time(row[-2])
+            row[-1] = format_time(row[-1])
+            yield row
+
+    def table_sizes(self):
+        """
+        Returns the full load rows of each table. A table loaded by several tasks (E.g.,
+        with filter conditions) gets the total of all of them.
+
+        :return: Dict with (schema, table) as the key, and no of rows as the value
+        """
+        sizes = {}
+
+        for schema, table, rows in zip(
+            self.columns["schema"],
+            self.columns["table"],
+            self.columns["full_load_rows"],
+        ):
+            sizes[(schema, table)] = sizes.get((schema, table), 0) + (rows or 0)
+
+        return sizes
+
+    def rollup(self, by):
+        """
+        Totals the statistics by "schema" or "task_id".
+
+        Load duration is the time between the first table starting to load and the last
+        table finishing, within the group.
+
+        :param by: "schema" or "task_id"
+
+        :return: List of rows [group, no of tables, full load rows, error rows, duration]
+        """
+        groups = collections.OrderedDict()
+
+        keys = self.columns[by]
+        rows = self.columns["full_load_rows"]
+        error_rows = self.columns["full_load_error_rows"]
+        start_times = self.columns["full_load_start_time"]
+        end_times = self.columns["full_load_end_time"]
+
+        for i in range(len(self)):
+            group = groups.setdefault(keys[i], [keys[i], 0, 0, 0, None, None])
+            group[1] += 1
+            group[2] += rows[i] or 0
+            group[3] += error_rows[i] or 0
+
+            if start_times[i] is not None:
+                group[4] = (
+                    start_times[i]
+                    if group[4] is None
+                    else min(group[4], start_times[i])
+                )
+
+            if end_times[i] is not None:
+                group[5] = (
+                    end_times[i] if group[5] is None else max(group[5], end_times[i])
+                )
+
+        result = []
+
+        for key in sorted(groups):
+            name, tables, full_load_rows, full_load_error_rows, start, end = groups[key]
+            duration = str(end - start).split(".")[0] if start and end else ""
+            result.append(
+                [name, tables, full_load_rows, full_load_error_rows, duration]
+            )
+
+        return result
+
+
+def format_time(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value is not None else ""
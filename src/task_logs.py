@@ -0,0 +1,295 @@
+import collections
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+from config import (LOG_FOLLOW_INTERVAL, LOG_FOLLOW_LOOKBACK_MINUTES,
+                    MAX_API_ATTEMPTS, POLL_CHUNK_SIZE, logs_location)
+from utils import AdaptiveBackoff, call_with_backoff, get_error_code
+
+# ------------------------------------------------------------------------------------------------#
+# Fetches the CloudWatch log events of a DMS task                                                 #
+# ------------------------------------------------------------------------------------------------#
+# A DMS log message looks like this:
+#   2021-09-26T01:01:17 [SOURCE_CAPTURE  ]I:  Source endpoint is Oracle (oracle_endpoint.c:123)
+#
+# It is broken down into these parts.
+LogLine = collections.namedtuple(
+    "LogLine", "timestamp, severity, component, message, event_id, event_time"
+)
+
+LOG_LINE_PATTERN = re.compile(r"^(\S+)\s+\[([^\]]*)\]\s*([A-Z])?:?\s*(.*)$", re.DOTALL)
+
+
+def get_task_log_location(dms, task_arn):
+    """
+    Returns the CloudWatch log group & log stream of a DMS task.
+    """
+    response = dms.describe_replication_tasks(
+        Filters=[
+            {
+                "Name": "replication-task-arn",
+                "Values": [
+                    task_arn,
+                ],
+            }
+        ]
+    )
+
+    replication_task = response["ReplicationTasks"][0]
+    logging = json.loads(replication_task["ReplicationTaskSettings"])["Logging"]
+
+    return logging["CloudWatchLogGroup"], logging["CloudWatchLogStream"]
+
+
+def get_task_log_locations(dms, task_arns, chunk_size=POLL_CHUNK_SIZE):
+    """
+    Returns the CloudWatch log group & log stream of many DMS tasks, asking DMS about
+    "chunk_size" tasks per call.
+
+    :return: Dict with task ARN as the key, and (log group, log stream) as the value.
+             Tasks that are not found, or have no CloudWatch logging, are left out.
+    """
+    backoff = AdaptiveBackoff()
+    locations = {}
+
+    for i in range(0, len(task_arns), chunk_size):
+        kwargs = {
+            "Filters": [
+                {"Name": "replication-task-arn", "Values": task_arns[i : i + chunk_size]}
+            ]
+        }
+
+        while True:
+            try:
+                response, _ = call_with_backoff(
+                    dms.describe_replication_tasks, backoff, MAX_API_ATTEMPTS, **kwargs
+                )
+            except Exception as error:
+                if get_error_code(error) == "ResourceNotFoundFault":
+                    break
+                raise
+
+            for task in response["ReplicationTasks"]:
+                logging = json.loads(task["ReplicationTaskSettings"]).get("Logging", {})
+
+                if logging.get("CloudWatchLogGroup"):
+                    locations[task["ReplicationTaskArn"]] = (
+                        logging["CloudWatchLogGroup"],
+                        logging["CloudWatchLogStream"],
+                    )
+
+            if not response.get("Marker"):
+                break
+
+            kwargs["Marker"] = response["Marker"]
+
+    return locations
+
+
+def iter_log_events(
+    cloudwatch,
+    log_group,
+    log_stream,
+    start_time=None,
+    end_time=None,
+    filter_pattern=None,
+    backoff=None,
+):
+    """
+    Yields the log events of a log stream, following "nextToken" until all the pages have
+    been read.
+
+    :param cloudwatch: boto3 CloudWatch Logs client
+    :param start_time: Epoch milliseconds. Only events at or after this time are returned
+    :param end_time: Epoch milliseconds. Only events before this time are returned
+    :param filter_pattern: CloudWatch Logs filter pattern (E.g., "?ERROR ?WARN")
+    :param backoff: AdaptiveBackoff object, when shared with other threads
+
+    :return: Generator of events (Dicts with "eventId", "timestamp" & "message")
+    """
+    backoff = backoff or AdaptiveBackoff()
+    kwargs = {"logGroupName": log_group, "logStreamNames": [log_stream]}
+
+    if start_time is not None:
+        kwargs["startTime"] = start_time
+
+    if end_time is not None:
+        kwargs["endTime"] = end_time
+
+    if filter_pattern:
+        kwargs["filterPattern"] = filter_pattern
+
+    while True:
+        response, _ = call_with_backoff(
+            cloudwatch.filter_log_events, backoff, MAX_API_ATTEMPTS, **kwargs
+        )
+
+        yield from response["events"]
+
+        # A page can be empty, and still have more pages after it.
+        if not response.get("nextToken"):
+            break
+
+        kwargs["nextToken"] = response["nextToken"]
+
+
+def parse_log_event(event):
+    """
+    Breaks a DMS log event down into a LogLine. Messages that do not follow the usual
+    format are kept whole in "message".
+    """
+    match = LOG_LINE_PATTERN.match(event["message"])
+
+    if match is None:
+        timestamp, severity, component, message = "", "", "", event["message"]
+    else:
+        timestamp, component, severity, message = match.groups()
+
+    return LogLine(
+        timestamp=timestamp,
+        severity=severity or "",
+        component=(component or "").strip(),
+        message=message.rstrip("\n"),
+        event_id=event.get("eventId", ""),
+        event_time=event["timestamp"],
+    )
+
+
+class LogCheckpoint:
+    """
+    Remembers the last log event read from a task's log stream, so that the next fetch
+    asks CloudWatch only for the newer events.
+
+    CloudWatch timestamps are in milliseconds, and several events can share the same one.
+    So, the IDs of the events seen at the last timestamp are kept as well, and skipped when
+    the next fetch starts from that timestamp.
+
+    Events read with a filter pattern are not all the events of the stream, so each filter
+    pattern has a checkpoint of its own.
+    """
+
+    def __init__(self, task_arn, filter_pattern=None, location=logs_location):
+        task_id = task_arn.split(":")[-1]
+
+        if filter_pattern:
+            digest = hashlib.sha256(filter_pattern.encode("utf-8")).hexdigest()[:12]
+            task_id = f"{task_id}.{digest}"
+
+        self.file_name = os.path.join(location, f"{task_id}.log_checkpoint.json")
+        self.filter_pattern = filter_pattern
+        self.timestamp = None
+        self.event_ids = set()
+
+        if os.path.exists(self.file_name):
+            with open(self.file_name, "r") as fp:
+                data = json.load(fp)
+                self.timestamp = data["timestamp"]
+                self.event_ids = set(data["event_ids"])
+
+    def is_new(self, event):
+        if self.timestamp is None or event["timestamp"] > self.timestamp:
+            return True
+
+        return event["timestamp"] == self.timestamp and event["eventId"] not in self.event_ids
+
+    def reset(self):
+        self.timestamp = None
+        self.event_ids = set()
+
+    def update(self, event):
+        if self.timestamp is None or event["timestamp"] > self.timestamp:
+            self.timestamp = event["timestamp"]
+            self.event_ids = set()
+
+        if event["timestamp"] == self.timestamp:
+            self.event_ids.add(event["eventId"])
+
+    def save(self):
+        with open(self.file_name, "w") as fp:
+            json.dump(
+                {
+                    "timestamp": self.timestamp,
+                    "event_ids": sorted(self.event_ids),
+                    "filter_pattern": self.filter_pattern,
+                },
+                fp,
+            )
+
+
+def follow_log_events(
+    cloudwatch,
+    log_group,
+    log_stream,
+    checkpoint,
+    start_time=None,
+    filter_pattern=None,
+    interval=LOG_FOLLOW_INTERVAL,
+):
+    """
+    Yields new log events as they arrive, until interrupted (Ctrl+C).
+
+    Reading starts from "start_time", if given, and the checkpoint is started over.
+    Otherwise it starts from the checkpoint or, with no checkpoint,
+    LOG_FOLLOW_LOOKBACK_MINUTES ago. The checkpoint is saved after each poll, so that a
+    later run carries on from where this one stopped.
+    """
+    if start_time is not None:
+        checkpoint.reset()
+    elif checkpoint.timestamp is None:
+        start_time = to_epoch_millis(
+            datetime.now() - timedelta(minutes=LOG_FOLLOW_LOOKBACK_MINUTES)
+        )
+    else:
+        start_time = checkpoint.timestamp
+
+    while True:
+        for event in iter_log_events(
+            cloudwatch,
+            log_group,
+            log_stream,
+            start_time=start_time,
+            filter_pattern=filter_pattern,
+        ):
+            if checkpoint.is_new(event):
+                checkpoint.update(event)
+                yield event
+
+        if checkpoint.timestamp is not None:
+            start_time = checkpoint.timestamp
+            checkpoint.save()
+
+        time.sleep(interval)
+
+
+def to_epoch_millis(value):
+    return int(value.timestamp() * 1000)
+
+
+def parse_time(value):
+    """
+    Converts a time passed on the command line to epoch milliseconds. Either an absolute
+    time ("2021-09-26 01:00", "2021-09-26") or a time relative to now ("30m", "2h", "1d").
+    """
+    if value is None:
+        return None
+
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip())
+
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = amount * {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+        return to_epoch_millis(datetime.now() - timedelta(seconds=seconds))
+
+    for time_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return to_epoch_millis(datetime.strptime(value.strip(), time_format))
+        except ValueError:
+            continue
+
+    raise ValueError(
+        f"Invalid time: {value}. Use 'YYYY-MM-DD HH:MM' or a relative time like 30m, 2h, 1d"
+    )
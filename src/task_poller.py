@@ -0,0 +1,200 @@
+import collections
+import random
+import time
+
+from config import (MAX_API_ATTEMPTS, POLL_CHUNK_SIZE, POLL_MAX_DELAY,
+                    POLL_MIN_DELAY, POLL_TIMEOUT_PER_TASK)
+from utils import AdaptiveBackoff, call_with_backoff, get_error_code
+
+# ------------------------------------------------------------------------------------------------#
+# Polls the status of DMS tasks until they reach the expected state                              #
+# ------------------------------------------------------------------------------------------------#
+# Tasks that are no longer returned by DMS are reported with this status.
+DELETED = "deleted"
+
+# States a task can not move out of on its own. Waiting for them any longer is pointless.
+FAILURE_STATES = {"failed", "failed-move"}
+
+# Stop reasons of a task that stopped on an error, rather than by finishing its load or by
+# being stopped. Such a task is in the "stopped" state all the same.
+FAILURE_STOP_REASONS = {
+    "Stop Reason FATAL_ERROR",
+    "Stop Reason RECOVERABLE_ERROR",
+    "Stop Reason STOPPED_DUE_TO_LOW_MEMORY",
+    "Stop Reason STOPPED_DUE_TO_LOW_DISK",
+}
+
+# The boto3 waiter names used across the tool, and the states they wait for.
+WAITER_STATES = {
+    "replication_task_ready": {"ready"},
+    "replication_task_running": {"running"},
+    "replication_task_stopped": {"stopped"},
+    "replication_task_deleted": {DELETED},
+}
+
+# Outcome of polling a set of tasks.
+#   statuses  - Last known status of each task ARN
+#   converged - ARNs that reached one of the target states
+#   failed    - ARNs that ended up in one of the failure states
+#   timed_out - ARNs whose status did not change within the timeout
+#   elapsed   - Seconds spent polling
+PollResult = collections.namedtuple(
+    "PollResult", "statuses, converged, failed, timed_out, elapsed"
+)
+
+
+def poll_task_status(
+    dms,
+    arn_list,
+    target_states,
+    failure_states=FAILURE_STATES,
+    chunk_size=POLL_CHUNK_SIZE,
+    timeout_per_task=POLL_TIMEOUT_PER_TASK,
+    min_delay=POLL_MIN_DELAY,
+    max_delay=POLL_MAX_DELAY,
+    on_progress=None,
+):
+    """
+    Polls the status of the given DMS tasks until each of them reaches one of the target
+    states, ends up in a failure state, or gets stuck.
+
+    ARNs are split into chunks, and each chunk is fetched with a single
+    "describe_replication_tasks" call. Only the tasks still pending are polled again. The
+    delay between polls grows while nothing changes, and shrinks back as soon as a task
+    changes its status. A random jitter is added to the delay.
+
+    :param dms: boto3 DMS client
+    :param arn_list: List of task ARNs
+    :param target_states: Set of states to wait for (E.g., {"ready"})
+    :param failure_states: Set of states that will never reach the target states
+    :param chunk_size: No of ARNs passed in each "describe_replication_tasks" call
+    :param timeout_per_task: A task whose status does not change for these many seconds
+                             is reported as timed out. None means wait forever.
+    :param min_delay: Seconds to wait between polls, right after a change
+    :param max_delay: Max seconds to wait between polls
+    :param on_progress: Function called after each poll with (elapsed seconds, Counter of
+                        states). Defaults to printing a line with the counts.
+
+    :return: PollResult
+    """
+    on_progress = on_progress or print_progress
+    start_time = time.monotonic()
+    backoff = AdaptiveBackoff()
+
+    statuses = {arn: "" for arn in arn_list}
+    last_change = {arn: start_time for arn in arn_list}
+    pending = list(dict.fromkeys(arn_list))
+
+    converged, failed, timed_out = [], [], []
+    delay = min_delay
+
+    while pending:
+        changed = False
+
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i : i + chunk_size]
+
+            for arn, status in describe_task_status(dms, chunk, backoff).items():
+                if statuses[arn] != status:
+                    statuses[arn] = status
+                    last_change[arn] = time.monotonic()
+                    changed = True
+
+        now = time.monotonic()
+        still_pending = []
+
+        for arn in pending:
+            if statuses[arn] in target_states:
+                converged.append(arn)
+            elif statuses[arn] in failure_states:
+                failed.append(arn)
+            elif (
+                timeout_per_task is not None
+                and now - last_change[arn] > timeout_per_task
+            ):
+                timed_out.append(arn)
+            else:
+                still_pending.append(arn)
+
+        pending = still_pending
+
+        on_progress(now - start_time, collections.Counter(statuses.values()))
+
+        if not pending:
+            break
+
+        delay = min_delay if changed else min(delay * 2, max_delay)
+        time.sleep(random.uniform(delay / 2, delay))
+
+    return PollResult(
+        statuses=statuses,
+        converged=converged,
+        failed=failed,
+        timed_out=timed_out,
+        elapsed=time.monotonic() - start_time,
+    )
+
+
+def describe_task_status(dms, arn_list, backoff):
+    """
+    Fetches the status of the given tasks. Tasks DMS does not know about are reported as
+    "deleted".
+
+    :return: Dict of task ARN -> status
+    """
+    return {
+        arn: task["Status"]
+        for arn, task in describe_task_states(dms, arn_list, backoff).items()
+    }
+
+
+def describe_task_states(dms, arn_list, backoff):
+    """
+    Fetches the status & stop reason of the given tasks. Tasks DMS does not know about are
+    reported as "deleted".
+
+    :return: Dict of task ARN -> {"Status": status, "StopReason": stop reason, or ""}
+    """
+    states = {arn: {"Status": DELETED, "StopReason": ""} for arn in arn_list}
+
+    kwargs = {
+        "Filters": [{"Name": "replication-task-arn", "Values": arn_list}],
+        "MaxRecords": min(max(20, len(arn_list)), 100),
+        "WithoutSettings": True,
+    }
+
+    while True:
+        try:
+            response, _ = call_with_backoff(
+                dms.describe_replication_tasks, backoff, MAX_API_ATTEMPTS, **kwargs
+            )
+        except Exception as error:
+            # Raised when none of the tasks exist.
+            if get_error_code(error) == "ResourceNotFoundFault":
+                return states
+            raise
+
+        for task in response["ReplicationTasks"]:
+            states[task["ReplicationTaskArn"]] = {
+                "Status": task["Status"],
+                "StopReason": task.get("StopReason", ""),
+            }
+
+        if not response.get("Marker"):
+            return states
+
+        kwargs["Marker"] = response["Marker"]
+
+
+def print_progress(elapsed, states):
+    """
+    Prints a line with the no of tasks in each state.
+    """
+    minutes, seconds = divmod(int(elapsed), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    counts = " | ".join(
+        f"{state or 'unknown'}: {count}" for state, count in sorted(states.items())
+    )
+
+    print(f"[{hours:02d}:{minutes:02d}:{seconds:02d}] {counts}", flush=True)
@@ -168,3 +168,24 @@ task_settings = """
     "BeforeImageSettings": null
 }
 """
+
+# Settings that are layered over "task_settings" by the size class of a task (See
+# SETTINGS_SIZE_CLASSES in config.py & settings_profiles.py). Only the settings that differ
+# from "task_settings" are given. Nested sections are merged, lists are replaced.
+#   small  - A few lookup tables. Fewer sub tasks, to leave the instance to the big ones.
+#   medium - Same as "task_settings", with larger commits.
+#   large  - Tables (or slices) of a TB or more. More sub tasks, larger commits & buffers,
+#            and threads loading each table (used by targets like PostgreSQL & MySQL).
+settings_profiles = {
+    "small": {
+        "FullLoadSettings": {"MaxFullLoadSubTasks": 4},
+    },
+    "medium": {
+        "FullLoadSettings": {"CommitRate": 20000},
+    },
+    "large": {
+        "TargetMetadata": {"ParallelLoadThreads": 8, "ParallelLoadBufferSize": 1000},
+        "FullLoadSettings": {"MaxFullLoadSubTasks": 16, "CommitRate": 50000},
+        "StreamBufferSettings": {"StreamBufferCount": 4, "StreamBufferSizeInMB": 16},
+    },
+}
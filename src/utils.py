@@ -1,12 +1,19 @@
+import csv
+import itertools
+import json
 import os
+import random
+import sys
 import textwrap
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
-import openpyxl
-from openpyxl.styles.borders import Border, Side
 from tabulate import tabulate
 
+from config import TABLE_OUTPUT_MAX_ROWS
+
 
 def convert_schemas_to_lowercase():
     return {
@@ -65,18 +72,28 @@ def get_aws_cli_profile():
     return profiles
 
 
-def write_to_excel_file(list1, list2):
+def write_to_excel_file(list1, list2, target_file=None):
     """
     Writes the input M x N matrices to an Excel file.
 
     Assumption is that, both the lists are of the same size (i.e, each have
-    M rows, and there are N cells in each row).
+    M rows, and there are N cells in each row). The first row of each list is
+    the headers.
+
+    The file has three sheets:
+        summary              - No of rows compared, matched and mismatched
+        mismatches           - Rows that differ between the lists, side by side
+        structure_comparison - All the rows side by side, with the mismatches highlighted
 
     :param list1: M x N matrix
     :param list2: M x N matrix
+    :param target_file: Defaults to a time stamped file in "../table_structure_validation"
 
     :return: None
     """
+    # Imported here, as openpyxl is slow to import and only this function needs it.
+    from excel_writer import ExcelReport
+
     no_cells_in_each_row_in_list1 = set([len(row) for row in list1])
     no_cells_in_each_row_in_list2 = set([len(row) for row in list2])
 
@@ -104,41 +121,57 @@ def write_to_excel_file(list1, list2):
 
         return
 
-    wb = openpyxl.Workbook()
-    sheet = wb["Sheet"]  # Default sheet name is 'Sheet'
-    sheet.title = "structure_comparison"
-    sheet.sheet_properties.tabColor = "1072BA"
+    if target_file is None:
+        current_time = (
+            datetime.now().strftime("%Y_%m_%d %H:%M").replace(" ", "_").replace(":", "_")
+        )
 
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+        target_file = (
+            "../table_structure_validation/structure_comparison"
+            + "_"
+            + current_time
+            + ".xlsx"
+        )
 
-    current_time = (
-        datetime.now().strftime("%Y_%m_%d %H:%M").replace(" ", "_").replace(":", "_")
-    )
+    # Both the rows side by side, with an empty column in between
+    headers = list(list1[0]) + [None] + list(list2[0])
+    mismatched = [i for i in range(1, len(list1)) if list1[i] != list2[i]]
+
+    def side_by_side(indexes):
+        for i in indexes:
+            yield list(list1[i]) + [None] + list(list2[i])
+
+    report = ExcelReport(target_file)
 
-    target_file = (
-        "../table_structure_validation/structure_comparison"
-        + "_"
-        + current_time
-        + ".xlsx"
+    report.add_sheet(
+        "summary",
+        ["Item", "Rows"],
+        [
+            ["Rows compared", len(list1) - 1],
+            ["Matched", len(list1) - 1 - len(mismatched)],
+            ["Mismatched", len(mismatched)],
+        ],
     )
 
-    for i in range(len(list1)):
-        for j in range(len(list1[i])):
-            sheet.cell(row=i + 1, column=j + 1).value = list1[i][j]
-            sheet.cell(row=i + 1, column=j + 1).border = thin_border
+    report.add_sheet(
+        "mismatches",
+        headers,
+        side_by_side(mismatched),
+        row_style=lambda row: "mismatch",
+        tab_color="C00000",
+    )
 
-        k = len(list1[i]) + 1
+    width = len(list1[0])
 
-        for j in range(len(list2[i])):
-            sheet.cell(row=i + 1, column=k + j + 1).value = list2[i][j]
-            sheet.cell(row=i + 1, column=k + j + 1).border = thin_border
+    report.add_sheet(
+        "structure_comparison",
+        headers,
+        side_by_side(range(1, len(list1))),
+        row_style=lambda row: "mismatch" if row[:width] != row[width + 1 :] else "cell",
+        tab_color="1072BA",
+    )
 
-    wb.save(target_file)
+    report.save()
 
     print(f"-> Data written to excel file: {target_file}")
 
@@ -168,3 +201,238 @@ def print_messages(messages, headers):
             tablefmt="fancy_grid",
         )
     )
+
+
+def print_table_incrementally(rows, headers, sample_size=100, max_width=120):
+    """
+    Prints rows as they are produced, instead of collecting all of them first.
+
+    Column widths are worked out from the headers & the first "sample_size" rows. Later
+    rows are printed with the same widths, values that do not fit are cut short.
+
+    :param rows: Iterable of lists
+    :param headers: List of strings
+    :param sample_size: No of rows used to decide the column widths
+    :param max_width: Max width of a column
+
+    :return: No of rows printed
+    """
+    rows = iter(rows)
+    sample = []
+
+    for row in rows:
+        sample.append([str(value) for value in row])
+
+        if len(sample) >= sample_size:
+            break
+
+    widths = [min(len(header), max_width) for header in headers]
+
+    for row in sample:
+        for i, value in enumerate(row):
+            widths[i] = min(max(widths[i], len(value)), max_width)
+
+    def format_row(values):
+        cells = [
+            str(value)[: widths[i]].ljust(widths[i]) for i, value in enumerate(values)
+        ]
+        return "│ " + " │ ".join(cells) + " │"
+
+    separator = "├─" + "─┼─".join("─" * width for width in widths) + "─┤"
+
+    print(format_row(headers))
+    print(separator)
+
+    count = 0
+
+    for row in itertools.chain(sample, rows):
+        print(format_row(row), flush=count % sample_size == 0)
+        count += 1
+
+    return count
+
+
+# Output formats of the report actions (--output)
+OUTPUT_FORMATS = ["table", "jsonl", "csv"]
+
+
+def print_rows(rows, headers, output="table", keys=None, wrap_width=150, flush=False):
+    """
+    Prints the rows of a report in the requested format.
+
+        table - A fancy grid, if there are no more than TABLE_OUTPUT_MAX_ROWS rows. Larger
+                results are printed as they are produced (See print_table_incrementally).
+        jsonl - One JSON object per row, printed as soon as the row is produced.
+        csv   - A header line, and then one line per row, printed as soon as the row is
+                produced.
+
+    :param rows: Iterable of lists
+    :param headers: List of strings, used by the "table" & "csv" formats
+    :param output: One of OUTPUT_FORMATS
+    :param keys: Names of the fields in the "jsonl" format. Defaults to the headers in
+                 lower case, with "_" in place of spaces.
+    :param wrap_width: Long values are wrapped at this width in the fancy grid
+    :param flush: Flush each "jsonl" or "csv" row as soon as it is printed (E.g., when
+                  following logs)
+
+    :return: No of rows printed
+    """
+    count = 0
+
+    if output == "jsonl":
+        keys = keys or [header.lower().replace(" ", "_") for header in headers]
+
+        for count, row in enumerate(rows, start=1):
+            print(json.dumps(dict(zip(keys, row)), default=str), flush=flush)
+
+        return count
+
+    if output == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(headers)
+
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+
+            if flush:
+                sys.stdout.flush()
+
+        return count
+
+    rows = iter(rows)
+    first_rows = list(itertools.islice(rows, TABLE_OUTPUT_MAX_ROWS + 1))
+
+    if len(first_rows) > TABLE_OUTPUT_MAX_ROWS:
+        return print_table_incrementally(itertools.chain(first_rows, rows), headers)
+
+    wrapped_rows = [
+        [
+            "\n".join(textwrap.wrap(value, width=wrap_width, replace_whitespace=False))
+            if isinstance(value, str) and len(value) > wrap_width
+            else value
+            for value in row
+        ]
+        for row in first_rows
+    ]
+
+    print(tabulate(wrapped_rows, headers=headers, tablefmt="fancy_grid"))
+
+    return len(first_rows)
+
+
+def print_info(message, output="table"):
+    """
+    Prints a message that is not part of a report. With the "jsonl" & "csv" formats, it
+    goes to stderr, so that the report can be piped to other tools.
+    """
+    print(message, file=sys.stdout if output == "table" else sys.stderr)
+
+
+# Error codes AWS uses when a call is throttled
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+)
+
+
+def get_error_code(error):
+    """
+    Returns the AWS error code (E.g., "ResourceNotFoundFault") of an exception raised by a
+    boto3 client, or an empty string for any other exception.
+    """
+    return getattr(error, "response", {}).get("Error", {}).get("Code", "")
+
+
+def is_throttling_error(error):
+    """
+    Returns True if the exception raised by a boto3 client is a throttling error.
+
+    :param error: Exception raised by a boto3 client call
+
+    :return: bool
+    """
+    return get_error_code(error) in THROTTLING_ERROR_CODES
+
+
+class AdaptiveBackoff:
+    """
+    Delay shared by all the threads calling the same AWS API.
+
+    Every throttled call doubles the delay, every successful call shrinks it. So, when
+    many workers hit the API together, all of them slow down instead of each one
+    retrying on its own schedule.
+    """
+
+    def __init__(self, base_delay=0.2, max_delay=20.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.throttle_count = 0
+        self.lock = threading.Lock()
+
+    def throttled(self):
+        with self.lock:
+            self.throttle_count += 1
+            self.delay = min(max(self.delay * 2, self.base_delay), self.max_delay)
+
+    def succeeded(self):
+        with self.lock:
+            self.delay = self.delay * 0.75 if self.delay > self.base_delay else 0.0
+
+    def wait(self):
+        delay = self.delay
+
+        # Full jitter, so that the workers do not retry in lock step.
+        if delay > 0:
+            time.sleep(random.uniform(delay / 2, delay))
+
+
+def call_with_backoff(func, backoff, max_attempts, **kwargs):
+    """
+    Calls a boto3 client method, and retries it as long as AWS throttles the call.
+
+    :param func: boto3 client method (E.g., dms.create_replication_task)
+    :param backoff: AdaptiveBackoff object shared by all the callers
+    :param max_attempts: Give up after these many throttled attempts
+    :param kwargs: Parameters to be passed to the client method
+
+    :return: (response, no of attempts). If the call fails, the no of attempts made is
+             set on the exception raised, as "attempts".
+    """
+    attempt = 0
+
+    while True:
+        attempt += 1
+        backoff.wait()
+
+        try:
+            response = func(**kwargs)
+            backoff.succeeded()
+            return response, attempt
+        except Exception as error:
+            if not is_throttling_error(error) or attempt >= max_attempts:
+                error.attempts = attempt
+                raise
+
+            backoff.throttled()
+
+
+def task_id_prefix(json_file):
+    """
+    Returns the ID of the DMS task of a JSON file, without the time suffix. Special chars
+    are replaced, otherwise AWS will complain.
+    """
+    return json_file.replace(".json", "").replace("_", "-").replace(".", "-").strip()
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the value below which "pct" percent of the values fall (nearest rank).
+    """
+    if not sorted_values:
+        return 0.0
+
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+
+    return sorted_values[int(rank) - 1]